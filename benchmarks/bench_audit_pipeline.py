@@ -0,0 +1,51 @@
+"""Per-operation cost of AgentSandbox.log_operation by audit destination
+
+Logging is configured at INFO to a discarded stream, as the API does.
+"direct" writes each record to the segment log as it is logged;
+"pipeline" hands it to AuditPipeline and the time to drain what is
+still buffered afterwards is reported separately.
+
+Run from the repository root:
+    python -m benchmarks.bench_audit_pipeline
+"""
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from src.nexusai.security.audit import AuditPipeline
+from src.nexusai.security.zero_trust import AgentSandbox
+from src.nexusai.storage.log_backend import SegmentLogBackend
+
+NUM_OPERATIONS = 200_000
+
+def per_op(sandbox: AgentSandbox) -> float:
+    timestamp = datetime.utcnow()
+    details = {"rows": 10}
+    start = time.perf_counter()
+    for _ in range(NUM_OPERATIONS):
+        sandbox.log_operation("fetch", timestamp, True, details)
+    return (time.perf_counter() - start) / NUM_OPERATIONS * 1e6
+
+def main():
+    logging.basicConfig(stream=open(os.devnull, "w"), level=logging.INFO)
+    print(f"{'destination':>12} {'us/op':>8} {'drain ms':>9}")
+    print(f"{'memory':>12} {per_op(AgentSandbox(uuid4())):>8.2f} {'-':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        store = SegmentLogBackend(os.path.join(directory, "direct"))
+        print(f"{'direct':>12} {per_op(AgentSandbox(uuid4(), store)):>8.2f} {'-':>9}")
+        store.close()
+
+        pipeline = AuditPipeline(SegmentLogBackend(os.path.join(directory, "pipeline")),
+                                 capacity=NUM_OPERATIONS)
+        cost = per_op(AgentSandbox(uuid4(), audit=pipeline))
+        start = time.perf_counter()
+        pipeline.close()
+        drain = (time.perf_counter() - start) * 1000
+        print(f"{'pipeline':>12} {cost:>8.2f} {drain:>9.1f}")
+        assert pipeline.get_stats()["written"] == NUM_OPERATIONS
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Import time and cold start of the API, each in a fresh interpreter
+
+Times whole processes, interpreter start-up included, as a scale-out
+would see them: "import" imports nexusai.api.main, and "first response"
+also runs the app's lifespan startup and serves one authenticated
+request. The bare interpreter and importing FastAPI alone are the floor.
+Each figure is the median of several runs.
+
+Run from the repository root:
+    python -m benchmarks.bench_cold_start
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 7
+
+SCRIPTS = {
+    "interpreter": "pass",
+    "fastapi": "import fastapi",
+    "import": "import src.nexusai.api.main",
+    "first response": """
+import asyncio
+from src.nexusai.api.main import create_app
+
+async def first_response():
+    # Drive the ASGI lifespan and one request directly, without a test client
+    app = create_app()
+    events = asyncio.Queue()
+    await events.put({"type": "lifespan.startup"})
+    replies = asyncio.Queue()
+    lifespan = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}},
+                                       events.get, replies.put))
+    assert (await replies.get())["type"] == "lifespan.startup.complete"
+    token = app.state.components.security_context.create_access_token({"sub": "bench"})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/tasks/queue/stats", "raw_path": b"", "root_path": "",
+        "query_string": b"", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(b"authorization", f"Bearer {token}".encode())]
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    assert sent[0]["status"] == 200
+    await events.put({"type": "lifespan.shutdown"})
+    await lifespan
+
+asyncio.run(first_response())
+""",
+}
+
+def measure(script: str) -> float:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    print(f"{'stage':>16} {'ms':>8}")
+    for name, script in SCRIPTS.items():
+        print(f"{name:>16} {measure(script) * 1000:>8.1f}")
+
+if __name__ == "__main__":
+    main()
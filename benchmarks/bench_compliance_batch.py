@@ -0,0 +1,58 @@
+"""Actions/sec of check_compliance_batch against a loop of check_compliance
+
+Logging goes to a discarded stream at INFO, as configured by the API, so
+per-violation log formatting is included in the cost.
+
+Run from the repository root:
+    python -m benchmarks.bench_compliance_batch
+"""
+import logging
+import os
+import time
+from uuid import uuid4
+
+from src.nexusai.compliance.monitor import ComplianceLevel, ComplianceMonitor
+
+NUM_RULES = 1_000
+NUM_ACTIONS = 20_000
+VIOLATION_RATES = [0.0, 0.05, 0.5]
+
+def build_monitor() -> ComplianceMonitor:
+    monitor = ComplianceMonitor()
+    for i in range(NUM_RULES):
+        monitor.add_rule(
+            f"rule-{i}", "benchmark rule", ComplianceLevel.MEDIUM,
+            {"restricted_operations": [f"op-{i}"]}
+        )
+    return monitor
+
+def build_actions(violation_rate: float):
+    agents = [uuid4() for _ in range(50)]
+    every = int(1 / violation_rate) if violation_rate else 0
+    items = []
+    for i in range(NUM_ACTIONS):
+        operation = f"op-{i % NUM_RULES}" if every and i % every == 0 else "read"
+        items.append((agents[i % len(agents)], {"operation": operation, "row": i}))
+    return items
+
+def main():
+    logging.basicConfig(stream=open(os.devnull, "w"), level=logging.INFO)
+    print(f"{'violating':>10} {'single/s':>12} {'batch/s':>12} {'speedup':>9}")
+    for rate in VIOLATION_RATES:
+        items = build_actions(rate)
+
+        monitor = build_monitor()
+        start = time.perf_counter()
+        for agent_id, action in items:
+            monitor.check_compliance(agent_id, action)
+        single = NUM_ACTIONS / (time.perf_counter() - start)
+
+        monitor = build_monitor()
+        start = time.perf_counter()
+        monitor.check_compliance_batch(items)
+        batch = NUM_ACTIONS / (time.perf_counter() - start)
+
+        print(f"{rate:>10.0%} {single:>12.0f} {batch:>12.0f} {batch / single:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Condition rule matching as rules grow over a fixed set of predicates
+
+Every rule combines three of a fixed pool of field tests, so the rule
+count grows while the number of distinct predicates stays put. Compares
+the shared compiled conditions against evaluating each rule's condition
+on its own (the same closures, with no sharing). Decisions are not cached,
+so every check evaluates the rules.
+
+Run from the repository root:
+    python -m benchmarks.bench_compliance_conditions
+"""
+import itertools
+import logging
+import time
+
+from src.nexusai.compliance.engine import RuleIndex
+from src.nexusai.compliance.rules import ConditionSet
+
+RULE_COUNTS = [10, 100, 1_000]
+CHECKS = 200
+
+PREDICATES = [
+    {"field": "operation", "in": ["export", "share", "delete"]},
+    {"field": "operation", "eq": "read"},
+    {"field": "data.amount", "gt": 10000},
+    {"field": "data.amount", "lte": 10},
+    {"field": "data.recipient", "matches": r"@(?!example\.com$)"},
+    {"field": "data.approved_by", "exists": True},
+    {"field": "data.region", "in": ["eu", "uk"]},
+    {"field": "data.rows", "gte": 1_000_000}
+]
+
+def conditions(num_rules: int):
+    combos = itertools.cycle(itertools.combinations(range(len(PREDICATES)), 3))
+    for i in range(num_rules):
+        a, b, c = next(combos)
+        # Vary the shape so rules are distinct even when predicates repeat
+        if i % 2:
+            yield {"all": [PREDICATES[a], {"any": [PREDICATES[b], {"not": PREDICATES[c]}]}]}
+        else:
+            yield {"any": [PREDICATES[a], {"all": [PREDICATES[b], PREDICATES[c]]}]}
+
+def build_shared(num_rules: int) -> RuleIndex:
+    index = RuleIndex()
+    for i, condition in enumerate(conditions(num_rules)):
+        index.add(i, {"condition": condition})
+    return index
+
+def build_unshared(num_rules: int):
+    # One ConditionSet per rule: nothing is shared between rules
+    rules = []
+    for condition in conditions(num_rules):
+        condition_set = ConditionSet()
+        rules.append((condition_set, condition_set.add(condition)))
+    return rules
+
+def time_per_check(fn, actions) -> float:
+    start = time.perf_counter()
+    for action in actions:
+        fn(action)
+    return (time.perf_counter() - start) / len(actions) * 1e6
+
+def main():
+    logging.disable(logging.CRITICAL)
+    actions = [
+        {"operation": "export", "data": {"amount": 20000 + i, "recipient": "x@evil.org"}}
+        for i in range(CHECKS)
+    ]
+
+    def unshared_check(rules, action):
+        return [condition_set for condition_set, root in rules
+                if root.evaluate(condition_set.extract(action), condition_set.memo())]
+
+    print(f"{'rules':>8} {'nodes':>8} {'unshared us':>12} {'shared us':>12} {'speedup':>10}")
+    for num_rules in RULE_COUNTS:
+        index = build_shared(num_rules)
+        rules = build_unshared(num_rules)
+        unshared = time_per_check(lambda a: unshared_check(rules, a), actions)
+        shared = time_per_check(lambda a: index.match(None, None, *index.extract(a)), actions)
+        print(f"{num_rules:>8} {len(index.conditions):>8} {unshared:>12.2f} "
+              f"{shared:>12.2f} {unshared / shared:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compliance check latency at growing rule counts
+
+Compares the indexed check_compliance against the previous full scan over
+every rule. Actions mostly hit no rule, as on the /tasks/submit path.
+
+Run from the repository root:
+    python -m benchmarks.bench_compliance_rules
+"""
+import logging
+import time
+from uuid import uuid4
+
+from src.nexusai.compliance.monitor import ComplianceLevel, ComplianceMonitor
+
+RULE_COUNTS = [10, 1_000, 100_000]
+CHECKS = 200
+
+def full_scan(monitor: ComplianceMonitor, action: dict) -> int:
+    """Rule loop used by check_compliance before rules were indexed"""
+    hits = 0
+    for rule in monitor.rules.values():
+        if rule.parameters.get("restricted_operations"):
+            if action.get("operation") in rule.parameters["restricted_operations"]:
+                hits += 1
+        if rule.parameters.get("data_sensitivity"):
+            if action.get("data_classification", "LOW") == "HIGH" and \
+               rule.parameters["data_sensitivity"] == "restricted":
+                hits += 1
+    return hits
+
+def build_monitor(num_rules: int) -> ComplianceMonitor:
+    monitor = ComplianceMonitor()
+    for i in range(num_rules):
+        if i % 100 == 99:
+            parameters = {"data_sensitivity": "restricted"}
+        else:
+            parameters = {"restricted_operations": [f"op-{i}", f"op-{i}-bulk"]}
+        monitor.add_rule(f"rule-{i}", "benchmark rule", ComplianceLevel.MEDIUM, parameters)
+    return monitor
+
+def time_per_check(fn, actions) -> float:
+    start = time.perf_counter()
+    for action in actions:
+        fn(action)
+    return (time.perf_counter() - start) / len(actions) * 1e6
+
+def main():
+    logging.disable(logging.CRITICAL)
+    agent_id = uuid4()
+    actions = [{"operation": "task_submission", "data_classification": "LOW"}] * CHECKS
+    print(f"{'rules':>8} {'scan us':>12} {'indexed us':>12} {'speedup':>10}")
+    for num_rules in RULE_COUNTS:
+        monitor = build_monitor(num_rules)
+        scan = time_per_check(lambda a: full_scan(monitor, a), actions)
+        indexed = time_per_check(lambda a: monitor.check_compliance(agent_id, a), actions)
+        print(f"{num_rules:>8} {scan:>12.2f} {indexed:>12.2f} {scan / indexed:>9.0f}x")
+
+if __name__ == "__main__":
+    main()
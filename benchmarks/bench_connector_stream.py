@@ -0,0 +1,67 @@
+"""Peak memory of a streamed transfer against fetch_data + write_data
+
+The source generates rows on demand and the target discards them, so the
+peak traced memory is what the transfer itself buffers.
+
+Run from the repository root:
+    python -m benchmarks.bench_connector_stream
+"""
+import asyncio
+import time
+import tracemalloc
+
+from src.nexusai.connectors.base import ConnectorRegistry, DatabaseConnector
+
+ROW_COUNTS = [10_000, 100_000, 500_000]
+CHUNK_SIZE = 1_000
+
+class GeneratedConnector(DatabaseConnector):
+    total_rows = 0
+
+    async def _execute_query(self, connection, query):
+        offset = query.get("offset", 0)
+        limit = query.get("limit", self.total_rows)
+        end = min(offset + limit, self.total_rows)
+        return [{"id": i, "payload": f"row-{i:08d}"} for i in range(offset, end)]
+
+    async def _execute_write(self, connection, data):
+        return True
+
+def add_connector(registry, name, rows=0):
+    connector_id = registry.register_connector(name, "database", {}, {"cache_ttl": 0})
+    connector = GeneratedConnector(registry.connectors[connector_id].config)
+    connector.total_rows = rows
+    registry.connectors[connector_id] = connector
+    return connector_id
+
+async def measure(rows: int, streamed: bool):
+    registry = ConnectorRegistry()
+    source_id = add_connector(registry, "source", rows)
+    target_id = add_connector(registry, "target")
+    tracemalloc.start()
+    start = time.perf_counter()
+    if streamed:
+        await registry.transfer(source_id, target_id, {}, chunk_size=CHUNK_SIZE)
+    else:
+        data = await registry.get_connector(source_id).fetch_data({})
+        await registry.get_connector(target_id).write_data(data)
+        del data
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await registry.close()
+    return rows / elapsed, peak / 1024 / 1024
+
+async def run():
+    print(f"{'rows':>8} {'mode':>9} {'rows/s':>12} {'peak MB':>9}")
+    for rows in ROW_COUNTS:
+        for streamed in (False, True):
+            rate, peak = await measure(rows, streamed)
+            mode = "stream" if streamed else "list"
+            print(f"{rows:>8} {mode:>9} {rate:>12,.0f} {peak:>9.1f}")
+
+def main():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
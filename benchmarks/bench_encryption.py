@@ -0,0 +1,51 @@
+"""DataEncryption throughput in MB/s
+
+Streams a 64 MB payload at several chunk sizes, and encrypts a list of
+connector-style records in bulk against a per-record encrypt_data loop.
+
+Run from the repository root:
+    python -m benchmarks.bench_encryption
+"""
+import os
+import time
+
+from src.nexusai.security.zero_trust import DataEncryption
+
+KEY = "benchmark-key"
+PAYLOAD_MB = 64
+CHUNK_SIZES = [4 * 1024, 64 * 1024, 1024 * 1024]
+NUM_RECORDS = 50_000
+
+def mb_per_second(nbytes: int, seconds: float) -> float:
+    return nbytes / (1024 * 1024) / seconds
+
+def main():
+    payload = os.urandom(PAYLOAD_MB * 1024 * 1024)
+    view = memoryview(payload)
+    pieces = [view[i:i + 1024 * 1024] for i in range(0, len(payload), 1024 * 1024)]
+    print(f"{'stream chunk':>14} {'encrypt MB/s':>13} {'decrypt MB/s':>13}")
+    for chunk_size in CHUNK_SIZES:
+        start = time.perf_counter()
+        encrypted = list(DataEncryption.encrypt_stream(pieces, KEY, chunk_size))
+        encrypt = mb_per_second(len(payload), time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in DataEncryption.decrypt_stream(encrypted, KEY):
+            pass
+        decrypt = mb_per_second(len(payload), time.perf_counter() - start)
+        print(f"{chunk_size // 1024:>11} KB {encrypt:>13,.0f} {decrypt:>13,.0f}")
+
+    records = [{"id": i, "name": f"customer-{i}", "email": f"user{i}@example.com"}
+               for i in range(NUM_RECORDS)]
+    start = time.perf_counter()
+    for record in records:
+        DataEncryption.encrypt_data(record, KEY)
+    single = NUM_RECORDS / (time.perf_counter() - start)
+    start = time.perf_counter()
+    DataEncryption.encrypt_records(records, KEY)
+    bulk = NUM_RECORDS / (time.perf_counter() - start)
+    print(f"\n{'records':>14} {'records/s':>13}")
+    print(f"{'encrypt_data':>14} {single:>13,.0f}")
+    print(f"{'bulk':>14} {bulk:>13,.0f}")
+
+if __name__ == "__main__":
+    main()
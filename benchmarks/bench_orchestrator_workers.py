@@ -0,0 +1,50 @@
+"""Tasks/sec of AgentOrchestrator as the worker pool grows
+
+Each task awaits a short sleep to stand in for I/O-bound agent work.
+
+Run from the repository root:
+    python -m benchmarks.bench_orchestrator_workers
+"""
+import asyncio
+import logging
+import time
+
+from src.nexusai.core.orchestrator import AgentOrchestrator
+
+NUM_TASKS = 2000
+WORK_SECONDS = 0.002
+WORKER_COUNTS = [1, 2, 4, 8, 16, 32, 64]
+
+async def handler(input_data):
+    await asyncio.sleep(WORK_SECONDS)
+    return input_data
+
+async def run(num_workers: int) -> float:
+    orchestrator = AgentOrchestrator(num_workers=num_workers)
+    orchestrator.set_task_handler(handler)
+    agents = [
+        await orchestrator.register_agent(
+            name=f"agent-{i}",
+            capabilities=[],
+            security_context={},
+            compliance_level="LOW"
+        )
+        for i in range(8)
+    ]
+    for i in range(NUM_TASKS):
+        await orchestrator.submit_task(agents[i % len(agents)].id, {"n": i})
+
+    start = time.perf_counter()
+    orchestrator.start()
+    await orchestrator.shutdown(drain=True)
+    return NUM_TASKS / (time.perf_counter() - start)
+
+def main():
+    logging.disable(logging.CRITICAL)
+    print(f"{'workers':>8} {'tasks/sec':>12}")
+    for num_workers in WORKER_COUNTS:
+        rate = asyncio.run(run(num_workers))
+        print(f"{num_workers:>8} {rate:>12.0f}")
+
+if __name__ == "__main__":
+    main()
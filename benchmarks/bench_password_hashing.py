@@ -0,0 +1,80 @@
+"""Event-loop stalls during a burst of password hashes
+
+A heartbeat coroutine ticks every millisecond while a burst of hashes
+runs inline on the loop, on the thread pool and on the process pool;
+the longest gap between ticks is how long every other request on the
+worker would have been frozen. Uses bcrypt when its passlib backend
+loads, sha256_crypt otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_password_hashing
+"""
+import asyncio
+import logging
+import time
+
+from src.nexusai.security.hashing import DEFAULT_CONTEXT, PasswordHasher, _context
+
+BURST = 32
+FALLBACK_CONTEXT = "[passlib]\nschemes = sha256_crypt\nsha256_crypt__default_rounds = 100000\n"
+
+def pick_context() -> str:
+    try:
+        _context(DEFAULT_CONTEXT).hash("probe")
+        return DEFAULT_CONTEXT
+    except Exception:
+        return FALLBACK_CONTEXT
+
+async def heartbeat(stop: asyncio.Event, gaps: list):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+async def measure(burst) -> tuple:
+    stop = asyncio.Event()
+    gaps: list = []
+    beat = asyncio.create_task(heartbeat(stop, gaps))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await burst()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, max(gaps)
+
+async def run(config: str):
+    context = _context(config)
+
+    async def inline():
+        for _ in range(BURST):
+            context.hash("password")
+
+    hashers = {
+        "threads": PasswordHasher(config, max_workers=4, max_queued=BURST),
+        "processes": PasswordHasher(config, max_workers=4, max_queued=BURST, use_processes=True)
+    }
+    print(f"{'mode':>10} {'hashes/s':>10} {'max stall ms':>13}")
+    elapsed, stall = await measure(inline)
+    print(f"{'inline':>10} {BURST / elapsed:>10.1f} {stall * 1000:>13.1f}")
+    for name, hasher in hashers.items():
+        await hasher.hash("warm-up")
+
+        async def offloaded():
+            await asyncio.gather(*(hasher.hash("password") for _ in range(BURST)))
+
+        elapsed, stall = await measure(offloaded)
+        print(f"{name:>10} {BURST / elapsed:>10.1f} {stall * 1000:>13.1f}")
+        hasher.shutdown()
+
+def main():
+    # passlib warns with a traceback when the bcrypt backend fails to load
+    logging.disable(logging.WARNING)
+    config = pick_context()
+    print(f"scheme: {_context(config).default_scheme()}")
+    asyncio.run(run(config))
+
+if __name__ == "__main__":
+    main()
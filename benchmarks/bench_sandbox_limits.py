@@ -0,0 +1,43 @@
+"""Cost of AgentSandbox.verify_operation with and without limits enforced
+
+Run from the repository root:
+    python -m benchmarks.bench_sandbox_limits
+"""
+import time
+from uuid import uuid4
+
+from src.nexusai.security.zero_trust import AgentSandbox, SandboxManager
+
+NUM_CALLS = 500_000
+
+def rate(sandbox: AgentSandbox) -> float:
+    start = time.perf_counter()
+    for _ in range(NUM_CALLS):
+        sandbox.verify_operation("fetch")
+    return NUM_CALLS / (time.perf_counter() - start)
+
+def main():
+    plain = AgentSandbox(uuid4())
+    plain.add_allowed_operation("fetch")
+
+    limited = AgentSandbox(uuid4())
+    limited.add_allowed_operation("fetch")
+    limited.set_resource_limits(cpu_percent=80, memory_mb=512, network_calls_per_minute=60_000_000)
+    limited.set_rate_limit("fetch", calls_per_minute=60_000_000)
+
+    base = rate(plain)
+    enforced = rate(limited)
+    print(f"{'sandbox':>10} {'checks/s':>14} {'ns/check':>10}")
+    print(f"{'allowlist':>10} {base:>14,.0f} {1e9 / base:>10.0f}")
+    print(f"{'limits':>10} {enforced:>14,.0f} {1e9 / enforced:>10.0f}")
+
+    manager = SandboxManager(default_operations=["fetch"])
+    agents = [uuid4() for _ in range(1_000)]
+    start = time.perf_counter()
+    for i in range(NUM_CALLS):
+        manager.get_sandbox(agents[i % len(agents)])
+    lookup = NUM_CALLS / (time.perf_counter() - start)
+    print(f"{'lookup':>10} {lookup:>14,.0f} {1e9 / lookup:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Task throughput of a sharded orchestrator against shard count
+
+Each task runs a CPU-bound handler. With ProcessShards every shard has
+its own interpreter, so throughput should grow with the number of shards
+up to the number of cores; the single-process orchestrator is the
+baseline. Also reports the routing cost per task with in-process shards.
+
+Run from the repository root:
+    python -m benchmarks.bench_sharding
+"""
+import asyncio
+import logging
+import os
+import time
+
+from src.nexusai.core.orchestrator import AgentOrchestrator
+from src.nexusai.core.sharding import LocalShard, ProcessShard, ShardedOrchestrator
+
+NUM_AGENTS = 64
+NUM_TASKS = 2_000
+WORK = 20_000
+ROUTING_TASKS = 100_000
+
+def cpu_task(input_data):
+    return {"sum": sum(i * i for i in range(WORK))}
+
+async def register_agents(orchestrator):
+    return [
+        (await orchestrator.register_agent(
+            name=f"agent-{i}", capabilities=[], security_context={}, compliance_level="LOW"
+        )).id
+        for i in range(NUM_AGENTS)
+    ]
+
+async def baseline_rate() -> float:
+    orchestrator = AgentOrchestrator()
+    orchestrator.set_task_handler(cpu_task)
+    agents = await register_agents(orchestrator)
+    start = time.perf_counter()
+    await orchestrator.submit_tasks([(agents[i % NUM_AGENTS], {}) for i in range(NUM_TASKS)])
+    orchestrator.start()
+    await orchestrator.shutdown(drain=True)
+    return NUM_TASKS / (time.perf_counter() - start)
+
+async def sharded_rate(num_shards: int) -> float:
+    sharded = ShardedOrchestrator(
+        [ProcessShard(f"shard-{i}", handler=cpu_task) for i in range(num_shards)]
+    )
+    await sharded.start()
+    try:
+        agents = await register_agents(sharded)
+        start = time.perf_counter()
+        results = await sharded.submit_tasks(
+            [(agents[i % NUM_AGENTS], {}) for i in range(NUM_TASKS)]
+        )
+        await asyncio.gather(*(
+            sharded.get_task_result(result["task_id"], timeout=600) for result in results
+        ))
+        return NUM_TASKS / (time.perf_counter() - start)
+    finally:
+        await sharded.shutdown()
+
+async def submit_time(orchestrator) -> float:
+    agents = await register_agents(orchestrator)
+    items = [(agents[i % NUM_AGENTS], {}) for i in range(ROUTING_TASKS)]
+    start = time.perf_counter()
+    await orchestrator.submit_tasks(items)
+    return time.perf_counter() - start
+
+async def routing_cost() -> float:
+    """Extra submit cost per task over one orchestrator, best of 3 rounds"""
+    sharded = min([
+        await submit_time(ShardedOrchestrator([LocalShard(f"shard-{i}") for i in range(4)]))
+        for _ in range(3)
+    ])
+    single = min([await submit_time(AgentOrchestrator()) for _ in range(3)])
+    return (sharded - single) / ROUTING_TASKS
+
+async def main():
+    logging.disable(logging.INFO)
+    print(f"cores: {os.cpu_count()}")
+    base = await baseline_rate()
+    print(f"{'shards':>8} {'tasks/s':>10} {'speedup':>8}")
+    print(f"{'single':>8} {base:>10,.0f} {1.0:>7.2f}x")
+    for num_shards in (1, 2, 4):
+        rate = await sharded_rate(num_shards)
+        print(f"{num_shards:>8} {rate:>10,.0f} {rate / base:>7.2f}x")
+    overhead = await routing_cost()
+    print(f"routing overhead: {overhead * 1e9:,.0f} ns/task")
+
+if __name__ == "__main__":
+    asyncio.run(main())
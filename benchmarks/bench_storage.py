@@ -0,0 +1,77 @@
+"""Durable violation storage: write throughput and memory footprint
+
+Part 1 measures appends/sec to the segment log at different fsync batch
+sizes. Part 2 creates and resolves violations in batches and reports the
+monitor's traced heap size as history grows, with and without a store.
+
+Run from the repository root:
+    python -m benchmarks.bench_storage
+"""
+import logging
+import tempfile
+import time
+import tracemalloc
+from uuid import uuid4
+
+from src.nexusai.compliance.monitor import ComplianceLevel, ComplianceMonitor
+from src.nexusai.storage.base import StoredViolation
+from src.nexusai.storage.log_backend import SegmentLogBackend
+
+NUM_WRITES = 20_000
+SYNC_EVERY = [1, 16, 256, 4096]
+HISTORY_STEPS = [10_000, 20_000, 40_000, 80_000]
+BATCH = 1_000
+
+def write_throughput(sync_every: int) -> float:
+    rule_id, agent_id = uuid4(), uuid4()
+    details = {"violation_type": "restricted_operation", "operation": "delete"}
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SegmentLogBackend(directory, sync_every=sync_every)
+        count = NUM_WRITES if sync_every > 1 else NUM_WRITES // 10
+        start = time.perf_counter()
+        for seq in range(1, count + 1):
+            backend.append_violations([StoredViolation(seq, rule_id, agent_id, time.time(), details)])
+        backend.flush()
+        elapsed = time.perf_counter() - start
+        backend.close()
+    return count / elapsed
+
+def footprint(store_dir):
+    store = SegmentLogBackend(store_dir) if store_dir else None
+    monitor = ComplianceMonitor(store=store)
+    monitor.add_rule("restricted", "", ComplianceLevel.HIGH,
+                     {"restricted_operations": ["delete"]})
+    agent_id = uuid4()
+    tracemalloc.start()
+    created = 0
+    sizes = []
+    for target in HISTORY_STEPS:
+        while created < target:
+            result = monitor.check_compliance_batch(
+                [(agent_id, {"operation": "delete"})] * BATCH
+            )
+            for violation_id in result.violation_ids:
+                monitor.resolve_violation(violation_id, "auto")
+            created += BATCH
+        sizes.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+    if store:
+        store.close()
+    return sizes
+
+def main():
+    logging.disable(logging.CRITICAL)
+    print(f"{'sync_every':>10} {'writes/sec':>12}")
+    for sync_every in SYNC_EVERY:
+        print(f"{sync_every:>10} {write_throughput(sync_every):>12.0f}")
+
+    print()
+    in_memory = footprint(None)
+    with tempfile.TemporaryDirectory() as directory:
+        stored = footprint(directory)
+    print(f"{'violations':>10} {'memory MB':>12} {'store MB':>12}")
+    for step, mem, disk in zip(HISTORY_STEPS, in_memory, stored):
+        print(f"{step:>10} {mem / 1e6:>12.1f} {disk / 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
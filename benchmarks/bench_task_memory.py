@@ -0,0 +1,62 @@
+"""Bytes per task held in the orchestrator registry
+
+Compares a dict of Pydantic Task models (the previous representation)
+with the slotted TaskRecord registry. input_data dicts are allocated
+before measuring, so only the per-task overhead is counted.
+
+Run from the repository root:
+    python -m benchmarks.bench_task_memory
+"""
+import logging
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from src.nexusai.core.orchestrator import Task
+from src.nexusai.core.records import TaskRecord
+
+NUM_TASKS = 100_000
+
+def input_data(i: int) -> dict:
+    return {"text": "summarize the attached report", "n": i}
+
+def measure(build) -> float:
+    inputs = [input_data(i) for i in range(NUM_TASKS)]
+    agent_id = uuid4()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    registry = build(inputs, agent_id)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(registry) == NUM_TASKS
+    return (after - before) / NUM_TASKS
+
+def pydantic_tasks(inputs, agent_id):
+    tasks = {}
+    for data in inputs:
+        now = datetime.now(UTC)
+        task = Task(
+            id=uuid4(), agent_id=agent_id, status="PENDING", created_at=now,
+            updated_at=now, input_data=data, output_data=None, error=None,
+            priority="LOW"
+        )
+        tasks[task.id] = task
+    return tasks
+
+def task_records(inputs, agent_id):
+    tasks = {}
+    for data in inputs:
+        task = TaskRecord(uuid4(), agent_id, data, "LOW", time.time())
+        tasks[task.id] = task
+    return tasks
+
+def main():
+    logging.disable(logging.CRITICAL)
+    print(f"{'representation':>16} {'bytes/task':>12}")
+    for name, build in (("pydantic Task", pydantic_tasks),
+                        ("TaskRecord", task_records)):
+        print(f"{name:>16} {measure(build):>12.0f}")
+
+if __name__ == "__main__":
+    main()
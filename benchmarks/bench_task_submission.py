@@ -0,0 +1,71 @@
+"""Tasks/sec of batched submission against one submit_task per task
+
+Both paths run the compliance check and enqueue that /tasks/submit and
+/tasks/submit:batch perform, without HTTP. Logging goes to a discarded
+stream at INFO, as configured by the API.
+
+Run from the repository root:
+    python -m benchmarks.bench_task_submission
+"""
+import asyncio
+import logging
+import os
+import time
+
+from src.nexusai.compliance.monitor import ComplianceLevel, ComplianceMonitor
+from src.nexusai.core.orchestrator import AgentOrchestrator
+
+NUM_AGENTS = 50
+NUM_TASKS = 20_000
+BATCH_SIZES = [10, 100, 1_000]
+
+async def setup():
+    orchestrator = AgentOrchestrator(archive_size=NUM_TASKS)
+    monitor = ComplianceMonitor()
+    monitor.add_rule(
+        "no-delete", "benchmark rule", ComplianceLevel.HIGH,
+        {"restricted_operations": ["delete"]}
+    )
+    agents = []
+    for i in range(NUM_AGENTS):
+        agent = await orchestrator.register_agent(f"agent-{i}", ["bench"], {}, "MEDIUM")
+        agents.append(agent.id)
+    items = [(agents[i % NUM_AGENTS], {"row": i}) for i in range(NUM_TASKS)]
+    return orchestrator, monitor, items
+
+async def single(orchestrator, monitor, items) -> float:
+    start = time.perf_counter()
+    for agent_id, input_data in items:
+        if not monitor.check_compliance(
+                agent_id, {"operation": "task_submission", "data": input_data}):
+            await orchestrator.submit_task(agent_id, input_data)
+    return NUM_TASKS / (time.perf_counter() - start)
+
+async def batched(orchestrator, monitor, items, batch_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(items), batch_size):
+        batch = items[offset:offset + batch_size]
+        checked = monitor.check_compliance_batch(
+            (agent_id, {"operation": "task_submission", "data": input_data})
+            for agent_id, input_data in batch
+        )
+        flagged = set(checked.item_index)
+        await orchestrator.submit_tasks(
+            item for position, item in enumerate(batch) if position not in flagged
+        )
+    return NUM_TASKS / (time.perf_counter() - start)
+
+async def run():
+    rate = await single(*await setup())
+    print(f"{'batch':>7} {'tasks/s':>12} {'speedup':>9}")
+    print(f"{'single':>7} {rate:>12,.0f} {1.0:>8.1f}x")
+    for batch_size in BATCH_SIZES:
+        batch_rate = await batched(*await setup(), batch_size)
+        print(f"{batch_size:>7} {batch_rate:>12,.0f} {batch_rate / rate:>8.1f}x")
+
+def main():
+    logging.basicConfig(stream=open(os.devnull, "w"), level=logging.INFO)
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
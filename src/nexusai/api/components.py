@@ -0,0 +1,131 @@
+from typing import Any, Callable, Dict, Optional, Union
+import logging
+import os
+
+from ..core.orchestrator import AgentOrchestrator
+from ..core.sharding import ProcessShard, ShardedOrchestrator
+from ..core.state import InMemoryStateBackend, SqliteStateBackend, StateBackend
+from ..security.zero_trust import SecurityContext
+from ..compliance.monitor import ComplianceMonitor
+from ..connectors.base import ConnectorRegistry
+from ..connectors.cache import QueryResultCache
+from ..telemetry import metrics
+
+logger = logging.getLogger(__name__)
+
+def build_orchestrator() -> Union[AgentOrchestrator, ShardedOrchestrator]:
+    """An orchestrator, sharded over NEXUSAI_SHARDS worker processes if set
+
+    Sharded agent registrations are kept in the SQLite file named by
+    NEXUSAI_STATE_DB, and restored onto the shards on start-up, or in
+    memory without it. Shards are this process's children, so run a
+    single API worker and scale with the shard count instead.
+    """
+    shards = int(os.getenv("NEXUSAI_SHARDS", "0"))
+    if shards <= 0:
+        return AgentOrchestrator()
+    state_db = os.getenv("NEXUSAI_STATE_DB")
+    state: StateBackend = SqliteStateBackend(state_db) if state_db else InMemoryStateBackend()
+    return ShardedOrchestrator([ProcessShard(f"shard-{i}") for i in range(shards)], state=state)
+
+def build_connector_registry() -> ConnectorRegistry:
+    """A connector registry, caching query results if NEXUSAI_QUERY_CACHE_TTL is set
+
+    The TTL is in seconds; cached reads may be that far out of date, so
+    caching is off unless it is set to a positive value.
+    """
+    ttl = float(os.getenv("NEXUSAI_QUERY_CACHE_TTL", "0"))
+    return ConnectorRegistry(QueryResultCache(ttl=ttl) if ttl > 0 else None)
+
+BUILDERS: Dict[str, Callable[[], Any]] = {
+    "orchestrator": build_orchestrator,
+    "security_context": SecurityContext,
+    "compliance_monitor": ComplianceMonitor,
+    "connector_registry": build_connector_registry
+}
+
+class Components:
+    """The API's core components, each built on first use
+
+    Components passed to the constructor are used as given, so tests and
+    deployments can supply their own. Building nothing up front keeps
+    importing the API and creating an app cheap; start and stop run the
+    background work of whichever components exist.
+    """
+
+    def __init__(self, **components):
+        unknown = set(components) - set(BUILDERS)
+        if unknown:
+            raise ValueError(f"Unknown components: {', '.join(sorted(unknown))}")
+        self._components: Dict[str, Any] = {}
+        self.collector = metrics.PlatformCollector()
+        self.running = False
+        for name, component in components.items():
+            self._add(name, component)
+
+    @property
+    def orchestrator(self) -> Union[AgentOrchestrator, ShardedOrchestrator]:
+        return self._get("orchestrator")
+
+    @property
+    def security_context(self) -> SecurityContext:
+        return self._get("security_context")
+
+    @property
+    def compliance_monitor(self) -> ComplianceMonitor:
+        return self._get("compliance_monitor")
+
+    @property
+    def connector_registry(self) -> ConnectorRegistry:
+        return self._get("connector_registry")
+
+    def built(self, name: str) -> bool:
+        return name in self._components
+
+    async def start(self):
+        """Start the task workers, and warm and probe any connectors"""
+        orchestrator = self.orchestrator
+        if isinstance(orchestrator, ShardedOrchestrator):
+            await orchestrator.start()
+            await orchestrator.restore_agents()
+        else:
+            orchestrator.start()
+        registry: Optional[ConnectorRegistry] = self._components.get("connector_registry")
+        if registry is not None:
+            # Connectors are opened concurrently, so warm-up takes as long as the slowest
+            await registry.health.warm_up()
+            registry.health.start()
+        self.running = True
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Drain the task workers, then stop probes and close connectors"""
+        self.running = False
+        # Tasks still running may read and write through connectors
+        orchestrator = self._components.get("orchestrator")
+        if orchestrator is not None:
+            await orchestrator.shutdown(drain=True, timeout=timeout)
+            if isinstance(orchestrator, ShardedOrchestrator):
+                orchestrator.state.close()
+        registry: Optional[ConnectorRegistry] = self._components.get("connector_registry")
+        if registry is not None:
+            await registry.health.stop()
+            await registry.close()
+        security_context: Optional[SecurityContext] = self._components.get("security_context")
+        if security_context is not None:
+            security_context.password_hasher.shutdown()
+
+    def _get(self, name: str) -> Any:
+        component = self._components.get(name)
+        if component is None:
+            component = BUILDERS[name]()
+            self._add(name, component)
+            logger.info(f"Built {name}")
+        return component
+
+    def _add(self, name: str, component: Any):
+        self._components[name] = component
+        # Queue metrics are read synchronously, so only from a local orchestrator
+        if hasattr(self.collector, name) and not isinstance(component, ShardedOrchestrator):
+            setattr(self.collector, name, component)
+        if name == "connector_registry" and self.running:
+            component.health.start()
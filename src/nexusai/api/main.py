@@ -1,45 +1,71 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.security import OAuth2PasswordBearer
-from typing import Dict, List
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from datetime import datetime
 from uuid import UUID
-import uvicorn
+import inspect
+import json
 import logging
 
-from ..core.orchestrator import AgentOrchestrator
-from ..security.zero_trust import SecurityContext
-from ..compliance.monitor import ComplianceMonitor, ComplianceLevel
-from ..connectors.base import ConnectorRegistry
+from ..compliance.monitor import ComplianceLevel
+from ..telemetry import metrics
+from ..telemetry.middleware import MetricsMiddleware
+from .components import BUILDERS, Components
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="NexusAI API",
-    description="Enterprise AI Agent Orchestration Platform API",
-    version="0.1.0"
-)
+# Bearer tokens are issued out of band by SecurityContext.create_access_token;
+# the API has no token endpoint
+bearer_scheme = HTTPBearer(auto_error=False)
 
-# Initialize core components
-orchestrator = AgentOrchestrator()
-security_context = SecurityContext()
-compliance_monitor = ComplianceMonitor()
-connector_registry = ConnectorRegistry()
+async def get_components(request: Request) -> Components:
+    return request.app.state.components
 
-# Setup OAuth2
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+async def get_current_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    components: Components = Depends(get_components)
+) -> Dict:
+    """Resolve the bearer token to its verified claims"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"}
+        )
+    try:
+        return components.security_context.verify_token(credentials.credentials)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"}
+        )
+
+router = APIRouter()
+# Routes served without a bearer token, such as the Prometheus scrape target
+public_router = APIRouter()
+
+class ComplianceCheckItem(BaseModel):
+    """One action to evaluate in a batch compliance check"""
+    agent_id: UUID
+    action: Dict
 
-@app.post("/agents/register")
+class TaskSubmission(BaseModel):
+    """One task in a batch submission"""
+    agent_id: UUID
+    input_data: Dict
+
+@router.post("/agents/register")
 async def register_agent(
     name: str,
     capabilities: List[str],
     security_context: Dict,
-    compliance_level: str
+    compliance_level: str,
+    components: Components = Depends(get_components)
 ):
     """Register a new AI agent"""
     try:
-        agent = await orchestrator.register_agent(
+        agent = await components.orchestrator.register_agent(
             name=name,
             capabilities=capabilities,
             security_context=security_context,
@@ -50,12 +76,15 @@ async def register_agent(
         logger.error(f"Failed to register agent: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/tasks/submit")
-async def submit_task(agent_id: UUID, input_data: Dict):
+@router.post("/tasks/submit")
+async def submit_task(agent_id: UUID, input_data: Dict,
+                      priority: Optional[ComplianceLevel] = None,
+                      deadline: Optional[datetime] = None,
+                      components: Components = Depends(get_components)):
     """Submit a task for execution"""
     try:
         # Check compliance before submitting task
-        violations = compliance_monitor.check_compliance(
+        violations = components.compliance_monitor.check_compliance(
             agent_id=agent_id,
             action={"operation": "task_submission", "data": input_data}
         )
@@ -66,65 +95,176 @@ async def submit_task(agent_id: UUID, input_data: Dict):
                 "violations": [v.dict() for v in violations]
             }
             
-        task = await orchestrator.submit_task(
+        task = await components.orchestrator.submit_task(
             agent_id=agent_id,
-            input_data=input_data
+            input_data=input_data,
+            priority=priority.value if priority else None,
+            deadline=deadline
         )
+        if task.status == "REJECTED":
+            raise HTTPException(status_code=429, detail=task.error)
         return {"task_id": task.id, "status": task.status}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to submit task: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/agents/{agent_id}/status")
-async def get_agent_status(agent_id: UUID):
+@router.post("/tasks/submit:batch")
+async def submit_tasks(tasks: List[TaskSubmission],
+                       priority: Optional[ComplianceLevel] = None,
+                       deadline: Optional[datetime] = None,
+                       components: Components = Depends(get_components)):
+    """Submit a batch of tasks with one compliance pass and one enqueue"""
+    try:
+        checked = components.compliance_monitor.check_compliance_batch(
+            (task.agent_id, {"operation": "task_submission", "data": task.input_data})
+            for task in tasks
+        )
+        violations: Dict[int, List[UUID]] = {}
+        for position, violation_id in zip(checked.item_index, checked.violation_ids):
+            violations.setdefault(position, []).append(violation_id)
+            
+        submitted = iter(await components.orchestrator.submit_tasks(
+            ((task.agent_id, task.input_data)
+             for position, task in enumerate(tasks) if position not in violations),
+            priority=priority.value if priority else None,
+            deadline=deadline
+        ))
+        results = []
+        for position in range(len(tasks)):
+            if position in violations:
+                results.append({"status": "rejected", "violation_ids": violations[position]})
+            else:
+                result = next(submitted)
+                results.append({
+                    "task_id": result["task_id"],
+                    "status": result["status"],
+                    "error": result["error"]
+                })
+        accepted = sum(1 for result in results if result["status"] == "PENDING")
+        return {"submitted": accepted, "results": results}
+    except Exception as e:
+        logger.error(f"Failed to submit task batch: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/agents/{agent_id}/status")
+async def get_agent_status(agent_id: UUID, components: Components = Depends(get_components)):
     """Get the current status of an agent"""
     try:
-        status = await orchestrator.get_agent_status(agent_id)
+        status = await components.orchestrator.get_agent_status(agent_id)
         return status
     except Exception as e:
         logger.error(f"Failed to get agent status: {e}")
         raise HTTPException(status_code=404, detail=str(e))
 
-@app.get("/tasks/{task_id}/status")
-async def get_task_status(task_id: UUID):
+@router.get("/tasks/queue/stats")
+async def get_queue_stats(components: Components = Depends(get_components)):
+    """Get task queue depth and wait times per priority class"""
+    stats = components.orchestrator.get_queue_stats()
+    if inspect.isawaitable(stats):
+        # A sharded orchestrator gathers each shard's stats
+        stats = await stats
+    return stats
+
+@router.get("/tasks/events")
+async def stream_task_events(agent_id: Optional[UUID] = None,
+                             components: Components = Depends(get_components)):
+    """Stream task state transitions as server-sent events"""
+    try:
+        subscription = components.orchestrator.subscribe(agent_id=agent_id)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    async def events():
+        try:
+            while True:
+                event = await subscription.get(timeout=15)
+                if event is None:
+                    # Comment line keeps idle connections open through proxies
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: task\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+        finally:
+            subscription.close()
+            
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/tasks/{task_id}/result")
+async def get_task_result(task_id: UUID, timeout: float = Query(30.0, ge=0, le=60),
+                          components: Components = Depends(get_components)):
+    """Get a task's result, waiting up to timeout seconds for it to finish"""
+    try:
+        return await components.orchestrator.get_task_result(task_id, timeout=timeout)
+    except Exception as e:
+        logger.error(f"Failed to get task result: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/tasks/{task_id}/status")
+async def get_task_status(task_id: UUID, components: Components = Depends(get_components)):
     """Get the current status of a task"""
     try:
-        status = await orchestrator.get_task_status(task_id)
+        status = await components.orchestrator.get_task_status(task_id)
         return status
     except Exception as e:
         logger.error(f"Failed to get task status: {e}")
         raise HTTPException(status_code=404, detail=str(e))
 
-@app.post("/connectors/register")
+@router.post("/connectors/register")
 async def register_connector(
     name: str,
     type_: str,
     credentials: Dict,
-    settings: Dict
+    settings: Dict,
+    components: Components = Depends(get_components)
 ):
     """Register a new data connector"""
     try:
-        connector_id = connector_registry.register_connector(
+        connector_id = components.connector_registry.register_connector(
             name=name,
             type_=type_,
             credentials=credentials,
             settings=settings
         )
+        components.connector_registry.health.warm_up_later([connector_id])
         return {"connector_id": connector_id, "status": "registered"}
     except Exception as e:
         logger.error(f"Failed to register connector: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/compliance/rules")
+@router.get("/connectors/health")
+async def get_connector_health(connector_id: Optional[UUID] = None, refresh: bool = False,
+                               components: Components = Depends(get_components)):
+    """Get connector health, latency and probe history, optionally probing first"""
+    try:
+        if refresh:
+            await components.connector_registry.health.check_all(
+                [connector_id] if connector_id is not None else None
+            )
+        return components.connector_registry.health.get_health(connector_id)
+    except Exception as e:
+        logger.error(f"Failed to get connector health: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/connectors/cache/stats")
+async def get_connector_cache_stats(components: Components = Depends(get_components)):
+    """Get connector query result cache counters"""
+    cache = components.connector_registry.cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Connector query cache is not enabled")
+    return cache.get_stats()
+
+@router.post("/compliance/rules")
 async def add_compliance_rule(
     name: str,
     description: str,
     level: ComplianceLevel,
-    parameters: Dict
+    parameters: Dict,
+    components: Components = Depends(get_components)
 ):
     """Add a new compliance rule"""
     try:
-        rule = compliance_monitor.add_rule(
+        rule = components.compliance_monitor.add_rule(
             name=name,
             description=description,
             level=level,
@@ -135,15 +275,116 @@ async def add_compliance_rule(
         logger.error(f"Failed to add compliance rule: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/compliance/violations")
-async def get_active_violations():
-    """Get all active compliance violations"""
+@router.post("/compliance/check:batch")
+async def check_compliance_batch(items: List[ComplianceCheckItem],
+                                 components: Components = Depends(get_components)):
+    """Check a batch of actions against compliance rules"""
+    try:
+        result = components.compliance_monitor.check_compliance_batch(
+            (item.agent_id, item.action) for item in items
+        )
+        return {
+            "checked": result.size,
+            "violation_count": len(result),
+            "violations": result.to_columns()
+        }
+    except Exception as e:
+        logger.error(f"Failed to check compliance batch: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/compliance/cache/stats")
+async def get_compliance_cache_stats(components: Components = Depends(get_components)):
+    """Get compliance decision cache counters"""
+    return components.compliance_monitor.get_cache_stats()
+
+@router.get("/compliance/summary")
+async def get_compliance_summary(components: Components = Depends(get_components)):
+    """Get running violation counts by status, level, rule, agent and hour"""
+    return components.compliance_monitor.get_summary()
+
+@router.get("/compliance/violations")
+async def get_active_violations(
+    agent_id: Optional[UUID] = None,
+    rule_id: Optional[UUID] = None,
+    status: str = "OPEN",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    components: Components = Depends(get_components)
+):
+    """Get compliance violations, active ones by default
+    
+    Results are paginated with limit (100 by default, at most 1000) and
+    the returned next_cursor.
+    """
     try:
-        violations = compliance_monitor.get_active_violations()
-        return {"violations": [v.dict() for v in violations]}
+        violations, next_cursor = components.compliance_monitor.query_violations(
+            agent_id=agent_id,
+            status=status,
+            rule_id=rule_id,
+            since=since,
+            until=until,
+            cursor=cursor,
+            limit=limit
+        )
+        return {
+            "violations": [v.dict() for v in violations],
+            "next_cursor": next_cursor
+        }
     except Exception as e:
         logger.error(f"Failed to get violations: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@public_router.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics in the text exposition format"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+def create_app(components: Optional[Components] = None,
+               shutdown_timeout: Optional[float] = 30.0) -> FastAPI:
+    """Build the API application
+    
+    Components are built on first use unless given. The lifespan starts
+    the task workers, warms registered connectors in parallel and starts
+    their health probes; on shutdown it drains the workers for up to
+    shutdown_timeout seconds and then closes connectors. Every endpoint but
+    /metrics requires a valid bearer token.
+    """
+    components = components or Components()
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await components.start()
+        metrics.register(components.collector)
+        try:
+            yield
+        finally:
+            metrics.unregister(components.collector)
+            await components.stop(shutdown_timeout)
+            
+    app = FastAPI(
+        title="NexusAI API",
+        description="Enterprise AI Agent Orchestration Platform API",
+        version="0.1.0",
+        lifespan=lifespan
+    )
+    app.state.components = components
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router, dependencies=[Depends(get_current_principal)])
+    app.include_router(public_router)
+    return app
+
+app = create_app()
+
+def __getattr__(name: str):
+    # The default app's components, e.g. main.orchestrator, built on first access
+    if name in BUILDERS:
+        return getattr(app.state.components, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == "__main__":
+    import uvicorn
+    logging.basicConfig(level=logging.INFO)
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,75 @@
+from typing import Dict, Hashable, Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+from uuid import UUID
+
+UNKNOWN_LEVEL = "UNKNOWN"
+
+def _increment(counts: Dict, key: Hashable, delta: int = 1):
+    value = counts.get(key, 0) + delta
+    if value:
+        counts[key] = value
+    else:
+        del counts[key]
+
+class ComplianceAggregator:
+    """Running violation counts maintained in O(1) per event
+
+    Counts are kept by status, compliance level, rule, agent and fixed
+    time window (window_seconds wide, the most recent max_windows kept),
+    so a summary never has to revisit individual violations.
+    """
+
+    def __init__(self, window_seconds: int = 3600, max_windows: int = 168):
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self.total = 0
+        self.by_status: Dict[str, int] = {}
+        self.by_level: Dict[str, int] = {}
+        self.by_rule: Dict[UUID, int] = {}
+        self.by_agent: Dict[UUID, int] = {}
+        self.by_window: "OrderedDict[int, int]" = OrderedDict()
+
+    def record_created(self, rule_id: UUID, agent_id: UUID, level: Optional[str],
+                       timestamp: float, status: str = "OPEN"):
+        """Count a new violation; timestamp is seconds since the epoch"""
+        self.total += 1
+        _increment(self.by_status, status)
+        _increment(self.by_level, level or UNKNOWN_LEVEL)
+        _increment(self.by_rule, rule_id)
+        _increment(self.by_agent, agent_id)
+        window = int(timestamp // self.window_seconds)
+        if window in self.by_window:
+            self.by_window[window] += 1
+        elif not self.by_window or window > next(reversed(self.by_window)):
+            self.by_window[window] = 1
+            if len(self.by_window) > self.max_windows:
+                self.by_window.popitem(last=False)
+        # Violations older than every retained window are not windowed
+
+    def record_status_change(self, previous: str, status: str):
+        """Move one violation between status counts"""
+        if previous != status:
+            _increment(self.by_status, previous, -1)
+            _increment(self.by_status, status)
+
+    def _window_start(self, window: int) -> datetime:
+        # Naive UTC, like violation timestamps
+        start = datetime.fromtimestamp(window * self.window_seconds, timezone.utc)
+        return start.replace(tzinfo=None)
+
+    def summary(self) -> Dict:
+        """Snapshot of the running counts"""
+        return {
+            "total_violations": self.total,
+            "open_violations": self.by_status.get("OPEN", 0),
+            "resolved_violations": self.by_status.get("RESOLVED", 0),
+            "by_status": dict(self.by_status),
+            "by_level": dict(self.by_level),
+            "by_rule": dict(self.by_rule),
+            "by_agent": dict(self.by_agent),
+            "by_window": {
+                self._window_start(window): count for window, count in self.by_window.items()
+            },
+            "timestamp": datetime.utcnow()
+        }
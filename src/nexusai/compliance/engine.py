@@ -0,0 +1,161 @@
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional, Tuple
+from uuid import UUID
+import itertools
+
+from .rules import ConditionSet, Node
+
+RESTRICTED_OPERATION = "restricted_operation"
+DATA_SENSITIVITY = "data_sensitivity"
+CONDITION = "condition"
+
+# Classifications caught by a rule with data_sensitivity == "restricted"
+RESTRICTED_CLASSIFICATIONS = frozenset({"HIGH"})
+
+class CompiledRule:
+    """Index keys a rule was filed under, kept so it can be unfiled"""
+    __slots__ = ("order", "operations", "classifications", "condition")
+
+    def __init__(self, order: int, operations: FrozenSet[Hashable],
+                 classifications: FrozenSet[Hashable], condition: Optional[Node] = None):
+        self.order = order
+        self.operations = operations
+        self.classifications = classifications
+        self.condition = condition
+
+class RuleIndex:
+    """Compiled index from action fields to the rules that can match them
+
+    Each rule's parameters are compiled once, when the rule is added, into
+    entries in two hash maps: operation -> rules restricting it and data
+    classification -> rules restricting it. Matching an action is then two
+    dict lookups plus work proportional to the rules that actually match,
+    independent of the total number of rules.
+
+    A rule's "condition" parameter is compiled into a shared ConditionSet
+    and the rule filed under the condition's root node. Rules with equal
+    conditions share a root, and roots share subexpressions, so matching
+    evaluates each distinct predicate at most once per action.
+    """
+
+    def __init__(self):
+        self._seq = itertools.count()
+        self._compiled: Dict[UUID, CompiledRule] = {}
+        # Values are insertion-ordered sets (dicts with None values)
+        self._by_operation: Dict[Hashable, Dict[UUID, None]] = {}
+        self._by_classification: Dict[Hashable, Dict[UUID, None]] = {}
+        self.conditions = ConditionSet()
+        self._by_condition: Dict[Node, Dict[UUID, None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._compiled)
+
+    def __contains__(self, rule_id: UUID) -> bool:
+        return rule_id in self._compiled
+
+    def add(self, rule_id: UUID, parameters: Dict):
+        """Compile a rule's parameters into the index, replacing any previous entry
+
+        Raises ValueError for an invalid condition, leaving any previous
+        entry in place.
+        """
+        condition = parameters.get("condition")
+        # Compiled before the old entry goes, so shared nodes are reused
+        root = self.conditions.add(condition) if condition is not None else None
+        order = None
+        if rule_id in self._compiled:
+            # Re-indexing keeps the rule's original evaluation order
+            order = self._compiled[rule_id].order
+            self.remove(rule_id)
+        compiled = CompiledRule(
+            order=next(self._seq) if order is None else order,
+            operations=self._compile_operations(parameters),
+            classifications=self._compile_classifications(parameters),
+            condition=root
+        )
+        self._compiled[rule_id] = compiled
+        for operation in compiled.operations:
+            self._by_operation.setdefault(operation, {})[rule_id] = None
+        for classification in compiled.classifications:
+            self._by_classification.setdefault(classification, {})[rule_id] = None
+        if root is not None:
+            self._by_condition.setdefault(root, {})[rule_id] = None
+
+    def remove(self, rule_id: UUID):
+        """Remove a rule from the index"""
+        compiled = self._compiled.pop(rule_id, None)
+        if compiled is None:
+            return
+        self._unfile(self._by_operation, compiled.operations, rule_id)
+        self._unfile(self._by_classification, compiled.classifications, rule_id)
+        if compiled.condition is not None:
+            self._unfile(self._by_condition, (compiled.condition,), rule_id)
+            self.conditions.release(compiled.condition)
+
+    def extract(self, action: Dict) -> Tuple:
+        """Action field values read by rule conditions, to pass on to match"""
+        return self.conditions.extract(action)
+
+    def match(self, operation: Optional[Hashable], classification: Optional[Hashable],
+              *values) -> List[Tuple[UUID, str]]:
+        """Return (rule_id, violation_type) pairs matching an action
+
+        values are the action's fields as returned by extract, and are
+        required once any rule has a condition. Pairs come back in rule
+        insertion order, with a rule's restricted operation match ahead of
+        its data sensitivity match, ahead of its condition match.
+        """
+        by_operation = self._lookup(self._by_operation, operation)
+        by_classification = self._lookup(self._by_classification, classification)
+        by_condition = self._match_conditions(values) if self._by_condition else ()
+        if not by_operation and not by_classification and not by_condition:
+            return []
+        compiled = self._compiled
+        matches = [(compiled[r].order, 0, r, RESTRICTED_OPERATION) for r in by_operation]
+        matches.extend(
+            (compiled[r].order, 1, r, DATA_SENSITIVITY) for r in by_classification
+        )
+        matches.extend((compiled[r].order, 2, r, CONDITION) for r in by_condition)
+        if len(matches) > 1:
+            matches.sort()
+        return [(rule_id, violation_type) for _, _, rule_id, violation_type in matches]
+
+    def _match_conditions(self, values: Tuple) -> List[UUID]:
+        memo = self.conditions.memo()
+        matched: List[UUID] = []
+        for root, rules in self._by_condition.items():
+            if root.evaluate(values, memo):
+                matched.extend(rules)
+        return matched
+
+    @staticmethod
+    def _lookup(index: Dict[Hashable, Dict[UUID, None]],
+                key: Optional[Hashable]) -> Dict[UUID, None]:
+        try:
+            return index.get(key, {})
+        except TypeError:
+            # Unhashable action values cannot equal any indexed key
+            return {}
+
+    @staticmethod
+    def _unfile(index: Dict[Any, Dict[UUID, None]], keys, rule_id: UUID):
+        for key in keys:
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(rule_id, None)
+                if not bucket:
+                    del index[key]
+
+    @staticmethod
+    def _compile_operations(parameters: Dict) -> FrozenSet[Hashable]:
+        operations = parameters.get("restricted_operations")
+        if not operations:
+            return frozenset()
+        if isinstance(operations, str):
+            operations = [operations]
+        return frozenset(op for op in operations if isinstance(op, Hashable))
+
+    @staticmethod
+    def _compile_classifications(parameters: Dict) -> FrozenSet[Hashable]:
+        if parameters.get("data_sensitivity") == "restricted":
+            return RESTRICTED_CLASSIFICATIONS
+        return frozenset()
@@ -1,12 +1,24 @@
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple, Union
+from collections import Counter
+from datetime import datetime, timezone
 from uuid import UUID
 from enum import Enum
 import logging
 from pydantic import BaseModel
 
+from ..storage.base import StorageBackend, StoredViolation
+from ..telemetry import metrics
+from .aggregate import ComplianceAggregator
+from .cache import DecisionCache
+from .engine import DATA_SENSITIVITY, RuleIndex
+from .scanner import PayloadScanner, max_classification, redact
+from .violation_index import ViolationIndex
+
 logger = logging.getLogger(__name__)
 
+_CHECKS_CLEAN = metrics.COMPLIANCE_CHECKS.labels("clean")
+_CHECKS_VIOLATING = metrics.COMPLIANCE_CHECKS.labels("violation")
+
 class ComplianceLevel(str, Enum):
     LOW = "LOW"
     MEDIUM = "MEDIUM"
@@ -33,18 +45,153 @@ class ComplianceViolation(BaseModel):
     status: str  # OPEN, RESOLVED, IGNORED
     resolution: Optional[str]
 
-class ComplianceMonitor:
-    """Monitors and enforces compliance rules"""
+def _epoch(timestamp: datetime) -> float:
+    # Violation timestamps are naive UTC
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+def _violation_details(action: Dict, violation_type: str) -> Dict:
+    details: Dict[str, Any] = {"action": action, "violation_type": violation_type}
+    if violation_type == DATA_SENSITIVITY:
+        details["classification"] = action.get("data_classification")
+    else:
+        details["operation"] = action.get("operation")
+    return details
+
+def _build_violation(violation_id: UUID, rule_id: UUID, agent_id: UUID,
+                     timestamp: datetime, action: Dict,
+                     violation_type: str) -> ComplianceViolation:
+    return ComplianceViolation(
+        id=violation_id,
+        rule_id=rule_id,
+        agent_id=agent_id,
+        timestamp=timestamp,
+        details=_violation_details(action, violation_type),
+        status="OPEN",
+        resolution=None
+    )
+
+def _from_stored(stored: StoredViolation) -> ComplianceViolation:
+    return ComplianceViolation(
+        id=UUID(int=stored.seq),
+        rule_id=stored.rule_id,
+        agent_id=stored.agent_id,
+        timestamp=datetime.fromtimestamp(stored.timestamp, timezone.utc).replace(tzinfo=None),
+        details=stored.details,
+        status=stored.status,
+        resolution=stored.resolution
+    )
+
+# Arguments to _build_violation for a violation not yet materialized
+ViolationRow = Tuple[UUID, UUID, UUID, datetime, Dict, str]
+
+class ViolationTable(MutableMapping):
+    """Violations keyed by id, built into models on first access
+    
+    Batch checks store compact argument tuples; the ComplianceViolation
+    model is only built (and then kept) when a caller reads the entry.
+    """
     
     def __init__(self):
+        self._records: Dict[UUID, Union[ComplianceViolation, ViolationRow]] = {}
+        
+    def __getitem__(self, violation_id: UUID) -> ComplianceViolation:
+        record = self._records[violation_id]
+        if isinstance(record, tuple):
+            record = self._records[violation_id] = _build_violation(*record)
+        return record
+        
+    def __setitem__(self, violation_id: UUID, violation: ComplianceViolation):
+        self._records[violation_id] = violation
+        
+    def __delitem__(self, violation_id: UUID):
+        del self._records[violation_id]
+        
+    def __iter__(self) -> Iterator[UUID]:
+        return iter(self._records)
+        
+    def __len__(self) -> int:
+        return len(self._records)
+        
+    def __contains__(self, violation_id: object) -> bool:
+        return violation_id in self._records
+        
+    def add_row(self, row: ViolationRow):
+        """Store a violation to be built on first access"""
+        self._records[row[0]] = row
+
+class BatchComplianceResult:
+    """Violations found by a batch compliance check, stored column-wise
+    
+    Row i of the columns is one violation raised by the action at
+    position item_index[i] of the batch. Violation models are only built
+    when violations() is called.
+    """
+    
+    def __init__(self, table: ViolationTable):
+        self.size = 0
+        self.item_index: List[int] = []
+        self.violation_ids: List[UUID] = []
+        self.rule_ids: List[UUID] = []
+        self.violation_types: List[str] = []
+        self._table = table
+        
+    def __len__(self) -> int:
+        return len(self.violation_ids)
+        
+    def violations(self) -> List[ComplianceViolation]:
+        """Violation records in row order"""
+        return [self._table[violation_id] for violation_id in self.violation_ids]
+        
+    def flagged_items(self) -> List[int]:
+        """Positions of the actions that raised at least one violation"""
+        return sorted(set(self.item_index))
+        
+    def to_columns(self) -> Dict:
+        """Columnar representation for serialization"""
+        return {
+            "item_index": self.item_index,
+            "violation_id": self.violation_ids,
+            "rule_id": self.rule_ids,
+            "violation_type": self.violation_types
+        }
+
+class ComplianceMonitor:
+    """Monitors and enforces compliance rules
+    
+    With a storage backend, violations are persisted as they are created
+    and resolved, open violations are restored from it on start-up, and
+    resolved violations are dropped from memory so the in-memory footprint
+    tracks the open set rather than the full history. Use
+    iter_violation_history to read past violations back from the store.
+    """
+    
+    def __init__(self, decision_cache_size: int = 10000,
+                 decision_ttl: Optional[float] = 300.0,
+                 store: Optional[StorageBackend] = None,
+                 scanner: Optional[PayloadScanner] = None, scan_payloads: bool = True):
         self.rules: Dict[UUID, ComplianceRule] = {}
-        self.violations: Dict[UUID, ComplianceViolation] = {}
+        self.violations: ViolationTable = ViolationTable()
+        self._violation_index = ViolationIndex()
+        self._violation_seq = 0
+        self._rule_index = RuleIndex()
+        self._rule_seq = 0
+        # Bumped on every rule change; part of every decision cache key
+        self.rule_version = 0
+        self._decision_cache = DecisionCache(decision_cache_size, decision_ttl)
+        self.aggregator = ComplianceAggregator()
+        self.scanner = scanner if scanner is not None or not scan_payloads else PayloadScanner()
+        self.store = store
+        if store is not None:
+            self._restore_from_store()
         
     def add_rule(self, name: str, description: str, level: ComplianceLevel, 
                 parameters: Dict) -> ComplianceRule:
         """Add a new compliance rule"""
+        self._rule_seq += 1
         rule = ComplianceRule(
-            id=UUID(int=len(self.rules) + 1),
+            id=UUID(int=self._rule_seq),
             name=name,
             description=description,
             level=level,
@@ -52,56 +199,212 @@ class ComplianceMonitor:
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
+        # Indexed first: an invalid condition raises before the rule is kept
+        self._rule_index.add(rule.id, rule.parameters)
         self.rules[rule.id] = rule
+        self._rules_changed()
         logger.info(f"Added compliance rule: {rule.name}")
         return rule
+
+    def update_rule(self, rule_id: UUID, **changes) -> ComplianceRule:
+        """Update fields of an existing rule and recompile it"""
+        if rule_id not in self.rules:
+            raise ValueError(f"Rule {rule_id} not found")
+            
+        rule = self.rules[rule_id].model_copy(
+            update={**changes, "updated_at": datetime.utcnow()}
+        )
+        self._rule_index.add(rule.id, rule.parameters)
+        self.rules[rule_id] = rule
+        self._rules_changed()
+        logger.info(f"Updated compliance rule: {rule.name}")
+        return rule
+
+    def remove_rule(self, rule_id: UUID):
+        """Remove a compliance rule"""
+        if rule_id not in self.rules:
+            raise ValueError(f"Rule {rule_id} not found")
+            
+        rule = self.rules.pop(rule_id)
+        self._rule_index.remove(rule_id)
+        self._rules_changed()
+        logger.info(f"Removed compliance rule: {rule.name}")
         
     def check_compliance(self, agent_id: UUID, action: Dict) -> List[ComplianceViolation]:
-        """Check an action against compliance rules"""
-        violations = []
+        """Check an action against compliance rules
         
-        for rule in self.rules.values():
-            # Example compliance checks based on rule parameters
-            if rule.parameters.get("restricted_operations"):
-                if action.get("operation") in rule.parameters["restricted_operations"]:
-                    violation = ComplianceViolation(
-                        id=UUID(int=len(self.violations) + 1),
-                        rule_id=rule.id,
-                        agent_id=agent_id,
-                        timestamp=datetime.utcnow(),
-                        details={
-                            "action": action,
-                            "violation_type": "restricted_operation",
-                            "operation": action.get("operation")
-                        },
-                        status="OPEN",
-                        resolution=None
-                    )
-                    self.violations[violation.id] = violation
-                    violations.append(violation)
-                    logger.warning(f"Compliance violation detected: {violation.details}")
-                    
-            if rule.parameters.get("data_sensitivity"):
-                if action.get("data_classification", "LOW") == "HIGH" and \
-                   rule.parameters["data_sensitivity"] == "restricted":
-                    violation = ComplianceViolation(
-                        id=UUID(int=len(self.violations) + 1),
-                        rule_id=rule.id,
-                        agent_id=agent_id,
-                        timestamp=datetime.utcnow(),
-                        details={
-                            "action": action,
-                            "violation_type": "data_sensitivity",
-                            "classification": action.get("data_classification")
-                        },
-                        status="OPEN",
-                        resolution=None
-                    )
-                    self.violations[violation.id] = violation
-                    violations.append(violation)
-                    logger.warning(f"Compliance violation detected: {violation.details}")
+        A payload under the action's "data" is scanned first, and raises
+        its data classification to that of any sensitive content found.
+        Only rules indexed under the action's operation or data
+        classification, or whose condition holds, are considered, and
+        decisions for repeated actions are served from the decision cache.
+        """
+        violations = []
+        action, recorded = self._classify(action)
+        matches = self._decide(self._fingerprint(action))
+        for rule_id, violation_type in matches:
+            violation = self._record_violation(rule_id, agent_id, recorded, violation_type)
+            violations.append(violation)
+            logger.warning(f"Compliance violation detected: {violation.details}")
+        (_CHECKS_VIOLATING if violations else _CHECKS_CLEAN).inc()
         
         return violations
+
+    def check_compliance_batch(self, items: Iterable[Tuple[UUID, Dict]]) -> BatchComplianceResult:
+        """Check many (agent_id, action) pairs against compliance rules
+        
+        Actions are grouped by operation, data classification and the
+        fields rule conditions read, and each distinct group is matched
+        against the rules once. Violations are recorded as for
+        check_compliance, share one timestamp, are built lazily and are
+        reported with a single log line for the whole batch.
+        """
+        result = BatchComplianceResult(self.violations)
+        decisions: Dict[Tuple, Tuple[Tuple[UUID, str], ...]] = {}
+        decide = self._decide
+        fingerprint = self._fingerprint
+        add_row = self.violations.add_row
+        index_violation = self._violation_index.add
+        aggregate = self.aggregator.record_created
+        timestamp = datetime.utcnow()
+        epoch = _epoch(timestamp)
+        stored: List[StoredViolation] = []
+        index = -1
+        classify = self._classify
+        for index, (agent_id, action) in enumerate(items):
+            action, recorded = classify(action)
+            key = fingerprint(action)
+            try:
+                matches = decisions[key]
+            except KeyError:
+                matches = decisions[key] = decide(key)
+            except TypeError:
+                matches = decide(key)
+            for rule_id, violation_type in matches:
+                self._violation_seq += 1
+                violation_id = UUID(int=self._violation_seq)
+                add_row((violation_id, rule_id, agent_id, timestamp, recorded, violation_type))
+                index_violation(self._violation_seq, agent_id, rule_id, epoch, "OPEN")
+                aggregate(rule_id, agent_id, self._rule_level(rule_id), epoch)
+                if self.store is not None:
+                    stored.append(StoredViolation(
+                        self._violation_seq, rule_id, agent_id, epoch,
+                        _violation_details(recorded, violation_type)
+                    ))
+                result.item_index.append(index)
+                result.violation_ids.append(violation_id)
+                result.rule_ids.append(rule_id)
+                result.violation_types.append(violation_type)
+        result.size = index + 1
+        if stored and self.store is not None:
+            self.store.append_violations(stored)
+                
+        violating = len(set(result.item_index))
+        _CHECKS_VIOLATING.inc(violating)
+        _CHECKS_CLEAN.inc(result.size - violating)
+        if result:
+            # One counter update per label set rather than per violation
+            counts: Counter = Counter()
+            for rule_id, violation_type in zip(result.rule_ids, result.violation_types):
+                counts[(self._rule_level(rule_id) or "unknown", violation_type)] += 1
+            for labels, count in counts.items():
+                metrics.COMPLIANCE_VIOLATIONS.labels(*labels).inc(count)
+            logger.warning(
+                f"Compliance violations detected: {len(result)} in batch of {result.size} actions"
+            )
+        return result
+
+    def get_cache_stats(self) -> Dict:
+        """Decision cache counters, plus the current rule-set version"""
+        return {**self._decision_cache.get_stats(), "rule_version": self.rule_version}
+
+    def _classify(self, action: Dict) -> Tuple[Dict, Dict]:
+        # A payload under "data" raises the action's data classification to
+        # what the scanner finds in it. Rules match the classified action;
+        # violations record a copy with the findings' values redacted, so
+        # secrets never reach logs, API responses or the store, and keep
+        # only where they were and how they were classified
+        data = action.get("data")
+        if self.scanner is None or not isinstance(data, (dict, list)):
+            return action, action
+        scan = self.scanner.scan(data)
+        if not scan.findings:
+            return action, action
+        declared = action.get("data_classification", "LOW")
+        classified = {
+            **action,
+            "data_classification": max_classification(declared, scan.classification),
+            "payload_findings": scan.to_list()
+        }
+        return classified, {**classified, "data": redact(data, scan)}
+
+    def _fingerprint(self, action: Dict) -> Tuple:
+        # The action fields the rule index can match on; nothing else
+        # (including the agent) changes which rules apply
+        fingerprint: Tuple = (action.get("operation"), action.get("data_classification", "LOW"))
+        if self._rule_index.conditions:
+            fingerprint += self._rule_index.extract(action)
+        return fingerprint
+
+    def _decide(self, fingerprint: Tuple) -> Tuple[Tuple[UUID, str], ...]:
+        key = (self.rule_version, fingerprint)
+        try:
+            matches = self._decision_cache.get(key)
+        except TypeError:
+            # Unhashable field values are matched directly, uncached
+            return tuple(self._rule_index.match(*fingerprint))
+        if matches is None:
+            matches = tuple(self._rule_index.match(*fingerprint))
+            self._decision_cache.put(key, matches)
+        return matches
+
+    def _rules_changed(self):
+        self.rule_version += 1
+        self._decision_cache.invalidate()
+
+    def _rule_level(self, rule_id: UUID) -> Optional[str]:
+        rule = self.rules.get(rule_id)
+        return rule.level.value if rule is not None else None
+
+    def _record_violation(self, rule_id: UUID, agent_id: UUID, action: Dict,
+                          violation_type: str) -> ComplianceViolation:
+        self._violation_seq += 1
+        violation = _build_violation(
+            UUID(int=self._violation_seq), rule_id, agent_id,
+            datetime.utcnow(), action, violation_type
+        )
+        epoch = _epoch(violation.timestamp)
+        metrics.COMPLIANCE_VIOLATIONS.labels(
+            self._rule_level(rule_id) or "unknown", violation_type
+        ).inc()
+        self.violations[violation.id] = violation
+        self._violation_index.add(self._violation_seq, agent_id, rule_id, epoch, "OPEN")
+        self.aggregator.record_created(rule_id, agent_id, self._rule_level(rule_id), epoch)
+        if self.store is not None:
+            self.store.append_violations([StoredViolation(
+                self._violation_seq, rule_id, agent_id, epoch, violation.details
+            )])
+        return violation
+
+    def _restore_from_store(self):
+        restored = 0
+        for stored in self.store.iter_violations():
+            self._violation_seq = max(self._violation_seq, stored.seq)
+            self.aggregator.record_created(
+                stored.rule_id, stored.agent_id, self._rule_level(stored.rule_id),
+                stored.timestamp, stored.status
+            )
+            if stored.status != "OPEN":
+                continue
+            violation = _from_stored(stored)
+            self.violations[violation.id] = violation
+            self._violation_index.add(
+                stored.seq, stored.agent_id, stored.rule_id, stored.timestamp, "OPEN"
+            )
+            restored += 1
+        # Compacted violations no longer show up above but keep their seqs
+        self._violation_seq = max(self._violation_seq, self.store.last_seq())
+        logger.info(f"Restored {restored} open violations from storage")
         
     def resolve_violation(self, violation_id: UUID, resolution: str):
         """Resolve a compliance violation"""
@@ -109,37 +412,85 @@ class ComplianceMonitor:
             raise ValueError(f"Violation {violation_id} not found")
             
         violation = self.violations[violation_id]
+        self.aggregator.record_status_change(violation.status, "RESOLVED")
         violation.status = "RESOLVED"
         violation.resolution = resolution
+        if self.store is not None:
+            self.store.update_violation(violation_id.int, "RESOLVED", resolution)
+            del self.violations[violation_id]
+            self._violation_index.remove(violation_id.int)
+        else:
+            self._violation_index.set_status(violation_id.int, "RESOLVED")
         logger.info(f"Resolved compliance violation: {violation_id}")
         
+    def query_violations(self, agent_id: Optional[UUID] = None,
+                         status: Optional[str] = None,
+                         rule_id: Optional[UUID] = None,
+                         since: Optional[datetime] = None,
+                         until: Optional[datetime] = None,
+                         cursor: Optional[int] = None,
+                         limit: Optional[int] = None) -> Tuple[List[ComplianceViolation], Optional[int]]:
+        """Query violations through the secondary indexes
+        
+        Results are in creation order. since is inclusive and until is
+        exclusive. Pass the returned cursor back in to fetch the next page;
+        it is None once the results are exhausted.
+        """
+        seqs, next_cursor = self._violation_index.query(
+            agent_id=agent_id,
+            status=status,
+            rule_id=rule_id,
+            since=_epoch(since) if since is not None else None,
+            until=_epoch(until) if until is not None else None,
+            cursor=cursor,
+            limit=limit
+        )
+        return [self.violations[UUID(int=seq)] for seq in seqs], next_cursor
+        
+    def iter_violation_history(self) -> Iterator[ComplianceViolation]:
+        """Iterate over every violation, including resolved ones, oldest first
+        
+        Reads from the storage backend when there is one, so it also covers
+        violations no longer held in memory.
+        """
+        if self.store is None:
+            return iter(list(self.violations.values()))
+        return (_from_stored(stored) for stored in self.store.iter_violations())
+        
+    def get_summary(self) -> Dict:
+        """Summary of all violations from the running aggregates"""
+        return self.aggregator.summary()
+        
     def get_violations_by_agent(self, agent_id: UUID) -> List[ComplianceViolation]:
         """Get all violations for a specific agent"""
-        return [v for v in self.violations.values() if v.agent_id == agent_id]
+        return self.query_violations(agent_id=agent_id)[0]
         
     def get_active_violations(self) -> List[ComplianceViolation]:
         """Get all active (unresolved) violations"""
-        return [v for v in self.violations.values() if v.status == "OPEN"]
+        return self.query_violations(status="OPEN")[0]
 
 class ComplianceReport(BaseModel):
     """Generates compliance reports"""
     
     @staticmethod
-    def generate_summary(violations: List[ComplianceViolation]) -> Dict:
-        """Generate a summary report of compliance violations"""
-        summary = {
-            "total_violations": len(violations),
-            "open_violations": len([v for v in violations if v.status == "OPEN"]),
-            "resolved_violations": len([v for v in violations if v.status == "RESOLVED"]),
-            "by_level": {},
-            "timestamp": datetime.utcnow()
-        }
+    def generate_summary(violations: Iterable[ComplianceViolation],
+                         rules: Optional[Dict[UUID, ComplianceRule]] = None) -> Dict:
+        """Generate a summary report of compliance violations
         
-        # Group violations by compliance level
+        Works in a single pass over any iterable, so violations can be
+        streamed (e.g. from ComplianceMonitor.iter_violation_history)
+        without building a list. Levels are looked up in rules; violations
+        of unknown rules are counted under UNKNOWN.
+        """
+        rules = rules or {}
+        aggregator = ComplianceAggregator()
         for violation in violations:
-            level = violation.rule_id  # In reality, would look up rule level
-            if level not in summary["by_level"]:
-                summary["by_level"][level] = 0
-            summary["by_level"][level] += 1
-            
-        return summary
+            rule = rules.get(violation.rule_id)
+            aggregator.record_created(
+                violation.rule_id,
+                violation.agent_id,
+                rule.level.value if rule is not None else None,
+                _epoch(violation.timestamp),
+                violation.status
+            )
+        return aggregator.summary()
@@ -0,0 +1,334 @@
+"""Declarative rule conditions compiled into shared predicate closures
+
+A condition is JSON: {"all": [...]}, {"any": [...]} and {"not": {...}}
+combine conditions, and a field test names a dotted path into the action
+plus one or more operators, all of which must hold:
+
+    {"all": [
+        {"field": "operation", "in": ["export", "delete"]},
+        {"field": "data.amount", "gt": 10000},
+        {"not": {"field": "data.approved_by", "exists": true}}
+    ]}
+
+Operators are eq, in, gt, gte, lt, lte (numbers only), matches (a regular
+expression searched in a string) and exists (true or false).
+"""
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+import json
+import re
+
+# Value of a field the action does not have
+MISSING = object()
+
+Predicate = Callable[[Any], bool]
+Evaluate = Callable[[Tuple, List], bool]
+
+def _number(operator: str, value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Operator {operator} needs a number, got {value!r}")
+    return value
+
+def _is_number(value: Any) -> bool:
+    # Booleans compare as 0 and 1, as they do for eq and in (and in the
+    # decision cache, where True and 1 are the same key)
+    return isinstance(value, (int, float))
+
+def _compile_eq(value: Any) -> Predicate:
+    return lambda x: x is not MISSING and x == value
+
+def _compile_in(value: Any) -> Predicate:
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f"Operator in needs a list, got {value!r}")
+    members = frozenset(v for v in value if isinstance(v, Hashable))
+    others = [v for v in value if not isinstance(v, Hashable)]
+
+    def test(x):
+        try:
+            if x in members:
+                return True
+        except TypeError:
+            pass
+        return bool(others) and x in others
+
+    return test
+
+def _compile_gt(value: Any) -> Predicate:
+    bound = _number("gt", value)
+    return lambda x: _is_number(x) and x > bound
+
+def _compile_gte(value: Any) -> Predicate:
+    bound = _number("gte", value)
+    return lambda x: _is_number(x) and x >= bound
+
+def _compile_lt(value: Any) -> Predicate:
+    bound = _number("lt", value)
+    return lambda x: _is_number(x) and x < bound
+
+def _compile_lte(value: Any) -> Predicate:
+    bound = _number("lte", value)
+    return lambda x: _is_number(x) and x <= bound
+
+def _compile_matches(value: Any) -> Predicate:
+    if not isinstance(value, str):
+        raise ValueError(f"Operator matches needs a pattern string, got {value!r}")
+    try:
+        search = re.compile(value).search
+    except re.error as e:
+        raise ValueError(f"Invalid pattern {value!r}: {e}")
+    return lambda x: isinstance(x, str) and search(x) is not None
+
+def _compile_exists(value: Any) -> Predicate:
+    if not isinstance(value, bool):
+        raise ValueError(f"Operator exists needs true or false, got {value!r}")
+    if value:
+        return lambda x: x is not MISSING
+    return lambda x: x is MISSING
+
+FIELD_OPERATORS: Dict[str, Callable[[Any], Predicate]] = {
+    "eq": _compile_eq,
+    "in": _compile_in,
+    "gt": _compile_gt,
+    "gte": _compile_gte,
+    "lt": _compile_lt,
+    "lte": _compile_lte,
+    "matches": _compile_matches,
+    "exists": _compile_exists
+}
+
+def field_getter(path: str) -> Callable[[Dict], Any]:
+    """Function reading a dotted path from an action, or MISSING"""
+    keys = path.split(".")
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda action: action.get(key, MISSING)
+
+    def get(action: Dict) -> Any:
+        value = action
+        for key in keys:
+            if not isinstance(value, dict):
+                return MISSING
+            value = value.get(key, MISSING)
+            if value is MISSING:
+                break
+        return value
+
+    return get
+
+def _missing(action: Dict) -> Any:
+    # Getter for a released slot until it is reused or trimmed
+    return MISSING
+
+class Node:
+    """One distinct subexpression, shared by every rule that contains it"""
+    __slots__ = ("key", "index", "children", "refs", "evaluate")
+
+    def __init__(self, key: Tuple, index: int, children: Tuple["Node", ...],
+                 evaluate: Evaluate):
+        self.key = key
+        self.index = index
+        self.children = children
+        self.refs = 0
+        self.evaluate = evaluate
+
+class ConditionSet:
+    """Compiled conditions with common subexpressions shared between rules
+
+    Conditions are hash-consed: structurally equal subexpressions (with
+    all and any children in any order) compile to one Node, so a field
+    test used by a thousand rules is one closure. Every field the
+    conditions read gets a slot in the values tuple built by extract.
+    Evaluation memoizes each node per values tuple, so the work done is
+    bounded by the number of distinct subexpressions, not rules.
+    Nodes are reference counted and dropped with the last rule using them,
+    and so are field slots: a released slot is reused by the next new
+    field, and released slots at the end of the tuple are trimmed.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[Tuple, Node] = {}
+        self._free_indexes: List[int] = []
+        self._size = 0
+        # Field path per slot, None for a released slot
+        self.fields: List[Optional[str]] = []
+        self._field_slots: Dict[str, int] = {}
+        self._field_refs: Dict[str, int] = {}
+        self._free_slots: Set[int] = set()
+        self._getters: List[Callable[[Dict], Any]] = []
+
+    def __len__(self) -> int:
+        """Number of distinct subexpressions"""
+        return len(self._nodes)
+
+    def add(self, condition: Dict) -> Node:
+        """Compile a condition, reusing nodes already compiled, and return its root"""
+        # Validate the whole condition before touching shared state
+        key = self._canonical(condition)
+        return self._intern(key)
+
+    def release(self, node: Node):
+        """Drop a reference to a root returned by add"""
+        node.refs -= 1
+        if node.refs:
+            return
+        del self._nodes[node.key]
+        self._free_indexes.append(node.index)
+        if node.key[0] == "field":
+            self._release_slot(node.key[1])
+        for child in node.children:
+            self.release(child)
+
+    def extract(self, action: Dict) -> Tuple:
+        """Values of every field the conditions read, in slot order"""
+        return tuple([get(action) for get in self._getters])
+
+    def memo(self) -> List:
+        """Fresh per-evaluation memo for evaluate calls sharing one values tuple"""
+        return [None] * self._size
+
+    # Canonical form: ("field", path, operator, value key) for a single
+    # operator test, ("all" | "any", sorted child keys) and ("not", child key)
+
+    def _canonical(self, condition: Any) -> Tuple:
+        if not isinstance(condition, dict) or not condition:
+            raise ValueError(f"Invalid condition: {condition!r}")
+        if "field" in condition:
+            return self._canonical_field(condition)
+        if len(condition) != 1:
+            raise ValueError(f"Combine conditions with all or any: {condition!r}")
+        (operator, operand), = condition.items()
+        if operator == "not":
+            return ("not", self._canonical(operand))
+        if operator in ("all", "any"):
+            if not isinstance(operand, list) or not operand:
+                raise ValueError(f"Operator {operator} needs a non-empty list")
+            unique: Dict[Tuple, Tuple] = {}
+            for child in operand:
+                key = self._canonical(child)
+                # Nested all in all (or any in any) flattens into its parent
+                for key in (key[1] if key[0] == operator else (key,)):
+                    unique.setdefault(self._identity(key), key)
+            children = [unique[identity] for identity in sorted(unique, key=repr)]
+            if len(children) == 1:
+                return children[0]
+            return (operator, tuple(children))
+        raise ValueError(f"Unknown condition operator: {operator}")
+
+    def _canonical_field(self, condition: Dict) -> Tuple:
+        path = condition["field"]
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"Invalid field path: {path!r}")
+        tests = []
+        value_key: Any
+        for operator, value in condition.items():
+            if operator == "field":
+                continue
+            if operator not in FIELD_OPERATORS:
+                raise ValueError(f"Unknown field operator: {operator}")
+            # Compiling here validates the operand before anything is shared
+            FIELD_OPERATORS[operator](value)
+            if operator == "in":
+                value_key = tuple(sorted({json.dumps(v, sort_keys=True) for v in value}))
+            else:
+                value_key = json.dumps(value, sort_keys=True)
+            tests.append(("field", path, operator, value_key, value))
+        if not tests:
+            raise ValueError(f"Field test on {path} has no operator")
+        tests.sort(key=lambda test: repr(test[:4]))
+        if len(tests) == 1:
+            return tests[0]
+        return ("all", tuple(tests))
+
+    def _intern(self, key: Tuple) -> Node:
+        node = self._nodes.get(self._identity(key))
+        if node is None:
+            node = self._build(key)
+        node.refs += 1
+        return node
+
+    @staticmethod
+    def _identity(key: Tuple) -> Tuple:
+        # Field keys carry the raw operand last; it is not part of identity
+        if key[0] == "field":
+            return key[:4]
+        if key[0] == "not":
+            return ("not", ConditionSet._identity(key[1]))
+        return (key[0], tuple(ConditionSet._identity(child) for child in key[1]))
+
+    def _build(self, key: Tuple) -> Node:
+        kind = key[0]
+        if kind == "field":
+            children: Tuple[Node, ...] = ()
+        elif kind == "not":
+            children = (self._intern(key[1]),)
+        else:
+            children = tuple(self._intern(child) for child in key[1])
+        if self._free_indexes:
+            index = self._free_indexes.pop()
+        else:
+            index = self._size
+            self._size += 1
+        node = Node(self._identity(key), index, children, self._closure(key, index, children))
+        self._nodes[node.key] = node
+        return node
+
+    def _closure(self, key: Tuple, index: int, nodes: Tuple[Node, ...]) -> Evaluate:
+        kind = key[0]
+        if kind == "field":
+            _, path, operator, _, value = key
+            slot = self._field_slot(path)
+            test = FIELD_OPERATORS[operator](value)
+
+            def evaluate(values, memo):
+                result = memo[index]
+                if result is None:
+                    result = memo[index] = test(values[slot])
+                return result
+        elif kind == "not":
+            child = nodes[0].evaluate
+
+            def evaluate(values, memo):
+                result = memo[index]
+                if result is None:
+                    result = memo[index] = not child(values, memo)
+                return result
+        else:
+            combine = all if kind == "all" else any
+            children = [child.evaluate for child in nodes]
+
+            def evaluate(values, memo):
+                result = memo[index]
+                if result is None:
+                    result = memo[index] = combine(child(values, memo) for child in children)
+                return result
+        return evaluate
+
+    def _field_slot(self, path: str) -> int:
+        slot = self._field_slots.get(path)
+        if slot is None:
+            if self._free_slots:
+                slot = min(self._free_slots)
+                self._free_slots.remove(slot)
+                self.fields[slot] = path
+                self._getters[slot] = field_getter(path)
+            else:
+                slot = len(self.fields)
+                self.fields.append(path)
+                self._getters.append(field_getter(path))
+            self._field_slots[path] = slot
+        self._field_refs[path] = self._field_refs.get(path, 0) + 1
+        return slot
+
+    def _release_slot(self, path: str):
+        refs = self._field_refs[path] - 1
+        if refs:
+            self._field_refs[path] = refs
+            return
+        del self._field_refs[path]
+        slot = self._field_slots.pop(path)
+        self.fields[slot] = None
+        self._getters[slot] = _missing
+        self._free_slots.add(slot)
+        while self.fields and self.fields[-1] is None:
+            self.fields.pop()
+            self._getters.pop()
+            self._free_slots.discard(len(self.fields))
@@ -0,0 +1,291 @@
+"""Single-pass scanning of nested action payloads for sensitive content"""
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from collections import deque
+from functools import lru_cache, partial
+import re
+
+# Data classifications from least to most sensitive
+CLASSIFICATION_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+# Detector name -> (pattern, classification). Patterns only start a match at
+# a token boundary, so finditer does linear work in the string's length.
+DETECTORS: Dict[str, Tuple[str, str]] = {
+    "private_key": (r"-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----", "HIGH"),
+    "aws_access_key": (r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", "HIGH"),
+    "jwt": (r"\beyJ[\w-]{8,}\.eyJ[\w-]{8,}\.[\w-]{8,}", "HIGH"),
+    "api_token": (
+        r"\b(?:(?:sk|pk|rk)_(?:live|test)_[0-9A-Za-z]{16,}"
+        r"|gh[pousr]_[0-9A-Za-z]{36}|xox[abpr]-[0-9A-Za-z-]{10,})\b",
+        "HIGH"
+    ),
+    "ssn": (r"\b\d{3}-\d{2}-\d{4}\b", "HIGH"),
+    "credit_card": (r"\b(?:\d[ -]?){12,18}\d\b", "HIGH"),
+    "email": (
+        r"(?<![\w.%+-])[\w.%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b",
+        "MEDIUM"
+    ),
+    # North American numbers with separators, or + and a country code
+    "phone": (
+        r"(?<![\w+])(?:(?:\+?1[ .-]?)?(?:\(\d{3}\) ?|\d{3}[ .-])\d{3}[ .-]\d{4}"
+        r"|\+\d{1,3}(?:[ .-]\d{1,4}){2,5})(?!\w)",
+        "MEDIUM"
+    )
+}
+
+# Field names whose non-empty values are sensitive whatever they contain.
+# Keys are split into words (db_password, apiKey, X-Auth-Token) and match
+# when one word, or two adjacent words run together, is in this set.
+SENSITIVE_FIELDS = frozenset({
+    "password", "passwd", "passphrase", "secret", "apikey", "accesstoken",
+    "authtoken", "refreshtoken", "privatekey", "ssn", "creditcard", "cardnumber", "cvv"
+})
+
+_KEY_WORDS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+").findall
+
+def key_words(key: str) -> List[str]:
+    """Lower-cased words of a camelCase, snake_case or kebab-case key"""
+    return [word.lower() for word in _KEY_WORDS(key)]
+
+# Placeholder for values removed by redact
+REDACTED = "[REDACTED]"
+
+# Classifications of findings that are not content detectors
+FINDING_CLASSIFICATIONS = {
+    "sensitive_field": "HIGH",
+    "denied_field": "HIGH",
+    # A payload that is not fully scanned is not assumed to be clean
+    "depth_limit": "MEDIUM",
+    "size_limit": "MEDIUM"
+}
+
+def _luhn(number: str) -> bool:
+    digits = [int(d) for d in number if d.isdigit()]
+    checksum = sum(digits[-1::-2])
+    checksum += sum(d * 2 - 9 if d > 4 else d * 2 for d in digits[-2::-2])
+    return checksum % 10 == 0
+
+def _is_sensitive(key: str, fields: FrozenSet[str]) -> bool:
+    words = key_words(key)
+    if any(word in fields for word in words):
+        return True
+    return any(a + b in fields for a, b in zip(words, words[1:]))
+
+# Detector name -> check a match must also pass
+VALIDATORS: Dict[str, Callable[[str], bool]] = {"credit_card": _luhn}
+
+def max_classification(a: str, b: str) -> str:
+    """The more sensitive of two classifications"""
+    return b if CLASSIFICATION_RANK.get(b, 0) > CLASSIFICATION_RANK.get(a, 0) else a
+
+class ScanResult:
+    """Classification of a payload and the (path, kind) of each finding"""
+    __slots__ = ("classification", "findings", "truncated", "total", "_links")
+
+    def __init__(self):
+        self.classification = "LOW"
+        self.findings: List[Tuple[str, str]] = []
+        self.truncated = False
+        # Findings made, including those past max_findings
+        self.total = 0
+        # Path link of each recorded finding, for redact
+        self._links: List[Optional[tuple]] = []
+
+    def to_list(self) -> List[Dict]:
+        return [{"path": path, "kind": kind} for path, kind in self.findings]
+
+class _PathNode:
+    __slots__ = ("children", "allow", "deny")
+
+    def __init__(self):
+        self.children: Dict[str, "_PathNode"] = {}
+        self.allow = False
+        self.deny = False
+
+def _keys(link: Optional[tuple]) -> List[Any]:
+    # Paths are kept as (parent, key) links and only unwound for findings
+    keys = []
+    while link is not None:
+        link, key = link
+        keys.append(key)
+    keys.reverse()
+    return keys
+
+def _path(link: Optional[tuple]) -> str:
+    return ".".join(str(key) for key in _keys(link))
+
+def redact(payload: Any, result: ScanResult) -> Any:
+    """Copy of a scanned payload with the value at every finding replaced by REDACTED
+
+    Only the containers on the way to a finding are copied. A payload that
+    was not fully scanned, or had more findings than were recorded, may
+    hold values that cannot be located, so it is redacted whole.
+    """
+    if result.truncated or result.total > len(result.findings):
+        return REDACTED
+    # Trie of finding key paths; True marks a value to redact
+    paths: Dict[Any, Any] = {}
+    for link in result._links:
+        keys = _keys(link)
+        if not keys:
+            return REDACTED
+        node = paths
+        for key in keys[:-1]:
+            child = node.setdefault(key, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[keys[-1]] = True
+
+    def copy(value: Any, node: Dict) -> Any:
+        if isinstance(value, dict):
+            value = dict(value)
+        elif isinstance(value, (list, tuple)):
+            value = list(value)
+        else:
+            return value
+        for key, child in node.items():
+            value[key] = REDACTED if child is True else copy(value[key], child)
+        return value
+
+    return copy(payload, paths)
+
+class PayloadScanner:
+    """Classifies nested payloads by the sensitive content they contain
+
+    A scan is one iterative pass over dicts and lists. Every string value
+    is searched once with a single combined regular expression for all
+    detectors, and every key's words are checked against the sensitive
+    field names.
+    Allow and deny paths are dotted field paths relative to the payload,
+    where * matches any one key or list index: allowed subtrees are not
+    scanned, and a denied field is a finding in itself. They are compiled
+    into a trie walked alongside the payload, so the whole scan is linear
+    in payload size. Payloads deeper than max_depth, or with more than
+    max_items values or max_chars characters of keys and strings, are
+    scanned up to the limit and reported as truncated.
+    """
+
+    def __init__(self, detectors: Optional[Dict[str, Tuple[str, str]]] = None,
+                 sensitive_fields: Optional[Iterable[str]] = SENSITIVE_FIELDS,
+                 allow_paths: Iterable[str] = (), deny_paths: Iterable[str] = (),
+                 max_depth: int = 32, max_items: int = 100_000,
+                 max_chars: int = 1_000_000, max_findings: int = 100):
+        detectors = DETECTORS if detectors is None else detectors
+        self.classifications = dict(FINDING_CLASSIFICATIONS)
+        self.classifications.update({name: level for name, (_, level) in detectors.items()})
+        self._search: Optional[Callable[[str], Iterable[re.Match]]] = None
+        if detectors:
+            pattern = "|".join(f"(?P<{name}>{regex})" for name, (regex, _) in detectors.items())
+            self._search = re.compile(pattern).finditer
+        self._sensitive_field: Optional[Callable[[str], bool]] = None
+        if sensitive_fields:
+            # Payloads repeat the same keys, so each key is split only once
+            self._sensitive_field = lru_cache(maxsize=4096)(
+                partial(_is_sensitive, fields=frozenset(sensitive_fields))
+            )
+        self._paths = _PathNode()
+        self._has_paths = False
+        for path in allow_paths:
+            self._add_path(path).allow = True
+        for path in deny_paths:
+            self._add_path(path).deny = True
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.max_findings = max_findings
+
+    def scan(self, payload: Any) -> ScanResult:
+        """Scan a payload and classify it"""
+        result = ScanResult()
+        classifications = self.classifications
+        search = self._search
+        sensitive_field = self._sensitive_field
+        max_depth = self.max_depth
+        items = self.max_items
+        chars = self.max_chars
+
+        def found(link, kind):
+            result.classification = max_classification(
+                result.classification, classifications[kind]
+            )
+            result.total += 1
+            if len(result.findings) < self.max_findings:
+                result.findings.append((_path(link), kind))
+                result._links.append(link)
+
+        # (value, path link, depth, path trie states)
+        root_states: Tuple[_PathNode, ...] = (self._paths,) if self._has_paths else ()
+        # Breadth first, so findings come back in field order, shallowest first
+        queue: Deque[Tuple[Any, Optional[tuple], int, Tuple[_PathNode, ...]]] = \
+            deque([(payload, None, 0, root_states)])
+        while queue:
+            value, link, depth, states = queue.popleft()
+            items -= 1
+            if items < 0:
+                found(link, "size_limit")
+                result.truncated = True
+                break
+            if isinstance(value, str):
+                chars -= len(value)
+                if chars < 0:
+                    found(link, "size_limit")
+                    result.truncated = True
+                    break
+                if search is not None:
+                    for match in search(value):
+                        kind = match.lastgroup or ""
+                        validate = VALIDATORS.get(kind)
+                        if validate is None or validate(match.group()):
+                            found(link, kind)
+                continue
+            children: Iterable[Tuple[Any, Any]]
+            if isinstance(value, dict):
+                children = value.items()
+            elif isinstance(value, (list, tuple)):
+                children = enumerate(value)
+            else:
+                continue
+            if depth >= max_depth:
+                found(link, "depth_limit")
+                result.truncated = True
+                continue
+            for key, child in children:
+                child_link = (link, key)
+                child_states = states
+                if states:
+                    child_states = self._step(states, key)
+                    if any(node.deny for node in child_states):
+                        found(child_link, "denied_field")
+                        continue
+                    if any(node.allow for node in child_states):
+                        continue
+                if isinstance(key, str):
+                    chars -= len(key)
+                    if (sensitive_field is not None and sensitive_field(key)
+                            and child not in (None, "") and not isinstance(child, (dict, list))):
+                        found(child_link, "sensitive_field")
+                        continue
+                queue.append((child, child_link, depth + 1, child_states))
+        return result
+
+    @staticmethod
+    def _step(states: Tuple[_PathNode, ...], key: Any) -> Tuple[_PathNode, ...]:
+        key = str(key)
+        next_states = []
+        for node in states:
+            children = node.children
+            if key in children:
+                next_states.append(children[key])
+            if "*" in children:
+                next_states.append(children["*"])
+        return tuple(next_states)
+
+    def _add_path(self, path: str) -> _PathNode:
+        if not path:
+            raise ValueError("Scanner paths must not be empty")
+        node = self._paths
+        for key in path.split("."):
+            node = node.children.setdefault(key, _PathNode())
+        self._has_paths = True
+        return node
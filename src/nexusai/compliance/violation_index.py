@@ -0,0 +1,191 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from bisect import bisect_left, bisect_right, insort
+from uuid import UUID
+
+class ViolationIndex:
+    """Secondary indexes over violations by agent, rule, status and time
+
+    Violations are identified by their integer sequence number, which is
+    assigned in creation order, so every posting list is kept sorted by
+    appending and a cursor (the last sequence number returned) can be
+    resumed with a binary search. Status changes and removals leave stale
+    entries behind that are skipped on read and compacted away once they
+    outnumber the live violations.
+    """
+
+    def __init__(self, bucket_seconds: int = 3600):
+        self.bucket_seconds = bucket_seconds
+        # seq -> [agent_id, rule_id, timestamp, status]
+        self._records: Dict[int, list] = {}
+        self._all: List[int] = []
+        self._by_agent: Dict[UUID, List[int]] = {}
+        self._by_rule: Dict[UUID, List[int]] = {}
+        self._by_status: Dict[str, List[int]] = {}
+        self._by_bucket: Dict[int, List[int]] = {}
+        self._bucket_keys: List[int] = []
+        self._status_counts: Dict[str, int] = {}
+        self._status_stale: Dict[str, int] = {}
+        self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, seq: int, agent_id: UUID, rule_id: UUID, timestamp: float, status: str):
+        """Index a new violation; seq must be greater than any indexed so far"""
+        self._records[seq] = [agent_id, rule_id, timestamp, status]
+        self._all.append(seq)
+        self._postings(self._by_agent, agent_id).append(seq)
+        self._postings(self._by_rule, rule_id).append(seq)
+        self._postings(self._by_status, status).append(seq)
+        self._status_counts[status] = self._status_counts.get(status, 0) + 1
+        bucket = int(timestamp // self.bucket_seconds)
+        if bucket not in self._by_bucket:
+            if self._bucket_keys and bucket < self._bucket_keys[-1]:
+                insort(self._bucket_keys, bucket)
+            else:
+                self._bucket_keys.append(bucket)
+        self._insert(self._postings(self._by_bucket, bucket), seq)
+
+    def set_status(self, seq: int, status: str):
+        """Move a violation to another status"""
+        record = self._records[seq]
+        previous = record[3]
+        if previous == status:
+            return
+        record[3] = status
+        self._insert(self._postings(self._by_status, status), seq)
+        self._status_counts[status] = self._status_counts.get(status, 0) + 1
+        self._status_counts[previous] -= 1
+        # Status lists are compacted on their own, since a list dominated by
+        # stale entries (e.g. OPEN after most violations are resolved) would
+        # otherwise make status queries cost O(history)
+        stale = self._status_stale.get(previous, 0) + 1
+        if stale > self._status_counts[previous] + 64:
+            self._by_status[previous] = [
+                s for s in self._by_status[previous]
+                if s in self._records and self._records[s][3] == previous
+            ]
+            stale = 0
+        self._status_stale[previous] = stale
+
+    def remove(self, seq: int):
+        """Drop a violation from every index"""
+        record = self._records.pop(seq, None)
+        if record is not None:
+            self._status_counts[record[3]] -= 1
+            self._stale += 1
+            if self._stale > len(self._records) + 1024:
+                self._compact()
+
+    def query(self, agent_id: Optional[UUID] = None, status: Optional[str] = None,
+              rule_id: Optional[UUID] = None, since: Optional[float] = None,
+              until: Optional[float] = None, cursor: Optional[int] = None,
+              limit: Optional[int] = None) -> Tuple[List[int], Optional[int]]:
+        """Return matching sequence numbers after cursor, in creation order
+
+        The second element is the cursor for the next page, or None when
+        there are no more results.
+        """
+        if limit is not None and limit <= 0:
+            return [], cursor
+        candidates = self._candidates(agent_id, status, rule_id, since, until)
+        if candidates is None:
+            return [], None
+        records = self._records
+        results: List[int] = []
+        for seq in candidates(cursor):
+            record = records.get(seq)
+            if record is None:
+                continue
+            record_agent, record_rule, timestamp, record_status = record
+            if agent_id is not None and record_agent != agent_id:
+                continue
+            if rule_id is not None and record_rule != rule_id:
+                continue
+            if status is not None and record_status != status:
+                continue
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp >= until:
+                continue
+            if limit is not None and len(results) == limit:
+                return results, results[-1]
+            results.append(seq)
+        return results, None
+
+    def _candidates(self, agent_id, status, rule_id, since, until):
+        # Pick the smallest posting list that any match must appear in
+        lists = []
+        for index, key in ((self._by_agent, agent_id), (self._by_rule, rule_id),
+                           (self._by_status, status)):
+            if key is not None:
+                postings = index.get(key)
+                if postings is None:
+                    return None
+                lists.append(postings)
+        best = min(lists, key=len) if lists else self._all
+        if since is not None or until is not None:
+            buckets = self._buckets_in_range(since, until)
+            if sum(len(self._by_bucket[b]) for b in buckets) < len(best):
+                return lambda cursor: self._scan_buckets(buckets, cursor)
+        return lambda cursor: self._scan(best, cursor)
+
+    def _buckets_in_range(self, since: Optional[float], until: Optional[float]) -> List[int]:
+        keys = self._bucket_keys
+        start = 0
+        if since is not None:
+            start = bisect_right(keys, int(since // self.bucket_seconds) - 1)
+        end = len(keys)
+        if until is not None:
+            end = bisect_right(keys, int(until // self.bucket_seconds))
+        return keys[start:end]
+
+    def _scan_buckets(self, buckets: List[int], cursor: Optional[int]) -> Iterator[int]:
+        # Buckets are in time order; ids within a bucket are sorted but may
+        # interleave with neighbouring buckets if clocks stepped backwards
+        for bucket in buckets:
+            yield from self._scan(self._by_bucket[bucket], cursor)
+
+    @staticmethod
+    def _scan(postings: List[int], cursor: Optional[int]) -> Iterator[int]:
+        start = bisect_right(postings, cursor) if cursor is not None else 0
+        for i in range(start, len(postings)):
+            yield postings[i]
+
+    @staticmethod
+    def _insert(postings: List[int], seq: int):
+        if not postings or seq > postings[-1]:
+            postings.append(seq)
+            return
+        # Out-of-order insert, e.g. a violation returning to a status it
+        # held before; the stale entry may still be there
+        i = bisect_left(postings, seq)
+        if i == len(postings) or postings[i] != seq:
+            postings.insert(i, seq)
+
+    @staticmethod
+    def _postings(index: Dict, key) -> List[int]:
+        postings = index.get(key)
+        if postings is None:
+            postings = index[key] = []
+        return postings
+
+    def _compact(self):
+        records = self._records
+        self._all = [seq for seq in self._all if seq in records]
+        for index, field in ((self._by_agent, 0), (self._by_rule, 1), (self._by_status, 3)):
+            for key in list(index):
+                live = [seq for seq in index[key] if seq in records and records[seq][field] == key]
+                if live:
+                    index[key] = live
+                else:
+                    del index[key]
+        for bucket in list(self._by_bucket):
+            live = [seq for seq in self._by_bucket[bucket] if seq in records]
+            if live:
+                self._by_bucket[bucket] = live
+            else:
+                del self._by_bucket[bucket]
+        self._bucket_keys = sorted(self._by_bucket)
+        self._status_stale = {}
+        self._stale = 0
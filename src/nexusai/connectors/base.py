@@ -1,10 +1,19 @@
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AsyncGenerator, AsyncIterable, Dict, List, Optional
 from abc import ABC, abstractmethod
 from datetime import datetime
 from uuid import UUID, uuid4
 from pydantic import BaseModel
-import logging
 import asyncio
+import logging
+import time
+
+from .cache import QueryResultCache
+from .health import ConnectorHealthMonitor
+from .pool import ConnectionPool
+from ..telemetry import metrics, tracing
+
+if TYPE_CHECKING:
+    import aiohttp
 
 logger = logging.getLogger(__name__)
 
@@ -29,132 +38,313 @@ class DataSource(BaseModel):
     metadata: Dict
 
 class BaseConnector(ABC):
-    """Base class for all data connectors"""
+    """Base class for all data connectors
+    
+    Connections are held in a ConnectionPool shared by every caller, so
+    concurrent fetches and writes reuse warm connections instead of
+    reconnecting. Subclasses implement the connection hooks; pool limits
+    come from the pool_* keys of the connector settings.
+    
+    When a QueryResultCache is attached, fetch_data results are cached for
+    the cache_ttl setting (the cache default if unset, 0 to disable) and
+    every write invalidates this connector's entries.
+    """
     
-    def __init__(self, config: ConnectorConfig):
+    def __init__(self, config: ConnectorConfig, cache: Optional[QueryResultCache] = None):
         self.config = config
         self.sources: Dict[UUID, DataSource] = {}
-        self._connection = None
+        self.cache = cache
+        settings = config.settings
+        self.pool = ConnectionPool(
+            self._create_connection,
+            self._close_connection,
+            self._check_connection,
+            min_size=settings.get("pool_min_size", 1),
+            max_size=settings.get("pool_max_size", 10),
+            acquire_timeout=settings.get("pool_acquire_timeout", 10.0),
+            max_idle=settings.get("pool_max_idle", 300.0),
+            check_interval=settings.get("pool_check_interval", 30.0),
+            name=config.name
+        )
+        self._fetch_latency = metrics.CONNECTOR_LATENCY.labels(config.name, "fetch")
+        self._write_latency = metrics.CONNECTOR_LATENCY.labels(config.name, "write")
         
-    @abstractmethod
     async def connect(self) -> bool:
-        """Establish connection to the data source"""
-        pass
+        """Open the pool's minimum connections"""
+        try:
+            await self.pool.start()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to connect {self.config.name}: {e}")
+            return False
+            
+    async def disconnect(self):
+        """Close all pooled connections"""
+        await self.pool.close()
+        
+    async def test_connection(self) -> bool:
+        """Check a pooled connection without tearing it down"""
+        try:
+            async with self.pool.connection() as connection:
+                return await self._check_connection(connection)
+        except Exception as e:
+            logger.error(f"Connection test failed for {self.config.name}: {e}")
+            return False
+            
+    async def fetch_data(self, query: Dict) -> List[Dict]:
+        """Fetch data from the source"""
+        if self.cache is None:
+            return await self._fetch(query)
+        return await self.cache.get_or_fetch(
+            self.config.id, query, lambda: self._fetch(query),
+            ttl=self.config.settings.get("cache_ttl")
+        )
+        
+    async def write_data(self, data: List[Dict]) -> bool:
+        """Write data to the source"""
+        start = time.perf_counter()
+        try:
+            with tracing.span("connector.write") as span:
+                if span is not None:
+                    span.set_attribute("nexusai.connector", self.config.name)
+                async with self.pool.connection() as connection:
+                    return await self._execute_write(connection, data)
+        finally:
+            self._write_latency.observe(time.perf_counter() - start)
+            self._invalidate_cache()
+            
+    async def stream_data(self, query: Dict, chunk_size: int = 1000,
+                          prefetch: int = 2) -> AsyncGenerator[List[Dict], None]:
+        """Yield query results in chunks of at most chunk_size records
+        
+        A background reader fetches ahead into a queue of prefetch chunks
+        and blocks once it is full, so memory stays bounded however large
+        the result is. One pooled connection is held until the stream is
+        exhausted or closed.
+        """
+        if chunk_size < 1 or prefetch < 1:
+            raise ValueError("chunk_size and prefetch must be positive")
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+        end = object()
+        
+        async def read():
+            try:
+                async with self.pool.connection() as connection:
+                    async for chunk in self._stream_query(connection, query, chunk_size):
+                        await chunks.put(chunk)
+                await chunks.put(end)
+            except Exception as e:
+                await chunks.put(e)
+                
+        reader = asyncio.create_task(read())
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is end:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+            
+    async def write_stream(self, chunks: AsyncIterable[List[Dict]]) -> int:
+        """Write chunks of records as they arrive and return the record count
+        
+        Each chunk is written before the next is pulled, so a slow target
+        holds back the producer rather than buffering records.
+        """
+        written = 0
+        try:
+            async with self.pool.connection() as connection:
+                async for chunk in chunks:
+                    if chunk:
+                        await self._execute_write(connection, chunk)
+                        written += len(chunk)
+        finally:
+            self._invalidate_cache()
+        logger.info(f"Streamed {written} records to {self.config.name}")
+        return written
+        
+    def get_pool_stats(self) -> Dict:
+        """Connection pool metrics for this connector"""
+        return self.pool.get_stats()
+        
+    async def _fetch(self, query: Dict) -> List[Dict]:
+        # Only calls that reach the source are timed; cache hits are not
+        start = time.perf_counter()
+        try:
+            with tracing.span("connector.fetch") as span:
+                if span is not None:
+                    span.set_attribute("nexusai.connector", self.config.name)
+                async with self.pool.connection() as connection:
+                    return await self._execute_query(connection, query)
+        finally:
+            self._fetch_latency.observe(time.perf_counter() - start)
+            
+    def _invalidate_cache(self):
+        if self.cache is not None:
+            self.cache.invalidate(self.config.id)
         
     @abstractmethod
-    async def disconnect(self):
-        """Close the connection"""
+    async def _create_connection(self) -> Any:
+        """Open a new connection to the data source"""
         pass
         
     @abstractmethod
-    async def test_connection(self) -> bool:
-        """Test if the connection is working"""
+    async def _close_connection(self, connection: Any):
+        """Close a connection"""
         pass
         
+    async def _check_connection(self, connection: Any) -> bool:
+        """Report whether a connection is still usable"""
+        return True
+        
     @abstractmethod
-    async def fetch_data(self, query: Dict) -> List[Dict]:
-        """Fetch data from the source"""
+    async def _execute_query(self, connection: Any, query: Dict) -> List[Dict]:
+        """Run a query on a connection"""
         pass
         
     @abstractmethod
-    async def write_data(self, data: List[Dict]) -> bool:
-        """Write data to the source"""
+    async def _execute_write(self, connection: Any, data: List[Dict]) -> bool:
+        """Write records on a connection"""
         pass
+        
+    async def _stream_query(self, connection: Any, query: Dict,
+                            chunk_size: int) -> AsyncGenerator[List[Dict], None]:
+        """Yield result pages of at most chunk_size records
+        
+        Pages through _execute_query with offset and limit added to the
+        query until a short page comes back; connectors with server-side
+        cursors can override this. A source that ignores offset and limit
+        gives a page longer than chunk_size, or the same page again, and
+        is read as a single unpaged result instead.
+        """
+        offset = 0
+        previous = None
+        while True:
+            page = await self._execute_query(connection, {**query, "offset": offset, "limit": chunk_size})
+            if len(page) > chunk_size:
+                for start in range(0, len(page), chunk_size):
+                    yield page[start:start + chunk_size]
+                return
+            if page == previous:
+                return
+            if page:
+                yield page
+            if len(page) < chunk_size:
+                return
+            previous = page
+            offset += len(page)
 
 class DatabaseConnector(BaseConnector):
     """Connector for database sources"""
     
-    async def connect(self) -> bool:
-        try:
-            # In reality, would establish actual database connection
-            self._connection = {
-                "status": "connected",
-                "timestamp": datetime.utcnow()
-            }
-            logger.info(f"Connected to database: {self.config.name}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to connect to database: {e}")
-            return False
-            
-    async def disconnect(self):
-        if self._connection:
-            # In reality, would close actual database connection
-            self._connection = None
-            logger.info(f"Disconnected from database: {self.config.name}")
-            
-    async def test_connection(self) -> bool:
-        try:
-            await self.connect()
-            await self.disconnect()
-            return True
-        except Exception as e:
-            logger.error(f"Connection test failed: {e}")
-            return False
-            
-    async def fetch_data(self, query: Dict) -> List[Dict]:
-        if not self._connection:
-            await self.connect()
+    async def _create_connection(self) -> Any:
+        # In reality, would establish actual database connection
+        connection = {
+            "status": "connected",
+            "timestamp": datetime.utcnow()
+        }
+        logger.info(f"Connected to database: {self.config.name}")
+        return connection
+        
+    async def _close_connection(self, connection: Any):
+        # In reality, would close actual database connection
+        connection["status"] = "closed"
+        logger.info(f"Disconnected from database: {self.config.name}")
+        
+    async def _check_connection(self, connection: Any) -> bool:
+        return connection["status"] == "connected"
+        
+    async def _execute_query(self, connection: Any, query: Dict) -> List[Dict]:
         # In reality, would execute actual database query
         logger.info(f"Fetching data with query: {query}")
-        return [{"sample": "data"}]
+        rows = [{"sample": "data"}]
+        offset = query.get("offset", 0)
+        limit = query.get("limit")
+        return rows[offset:offset + limit] if limit is not None else rows[offset:]
         
-    async def write_data(self, data: List[Dict]) -> bool:
-        if not self._connection:
-            await self.connect()
+    async def _execute_write(self, connection: Any, data: List[Dict]) -> bool:
         # In reality, would write to actual database
         logger.info(f"Writing {len(data)} records")
         return True
 
 class APIConnector(BaseConnector):
-    """Connector for REST API sources"""
+    """Connector for REST API sources
     
-    async def connect(self) -> bool:
-        try:
-            # In reality, would validate API credentials
-            self._connection = {
-                "status": "connected",
-                "timestamp": datetime.utcnow()
-            }
-            logger.info(f"Connected to API: {self.config.name}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to connect to API: {e}")
-            return False
-            
+    All requests share one aiohttp ClientSession whose TCPConnector keeps
+    up to pool_max_size keep-alive connections to the API; the pool bounds
+    concurrent requests to the same limit. Settings: base_url, read_path,
+    write_path, keepalive_timeout and request_timeout; credentials may
+    carry request headers.
+    """
+    
+    def __init__(self, config: ConnectorConfig, cache: Optional[QueryResultCache] = None):
+        super().__init__(config, cache)
+        self._session: Optional["aiohttp.ClientSession"] = None
+        
     async def disconnect(self):
-        if self._connection:
-            self._connection = None
+        await super().disconnect()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
             logger.info(f"Disconnected from API: {self.config.name}")
             
-    async def test_connection(self) -> bool:
-        try:
-            await self.connect()
-            await self.disconnect()
-            return True
-        except Exception as e:
-            logger.error(f"API connection test failed: {e}")
-            return False
-            
-    async def fetch_data(self, query: Dict) -> List[Dict]:
-        if not self._connection:
-            await self.connect()
-        # In reality, would make actual API request
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            # aiohttp is slow to import and only API connectors need it
+            import aiohttp
+            settings = self.config.settings
+            self._session = aiohttp.ClientSession(
+                base_url=settings.get("base_url"),
+                headers=self.config.credentials.get("headers"),
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool.max_size,
+                    keepalive_timeout=settings.get("keepalive_timeout", 60.0)
+                ),
+                timeout=aiohttp.ClientTimeout(total=settings.get("request_timeout", 30.0))
+            )
+            logger.info(f"Connected to API: {self.config.name}")
+        return self._session
+        
+    async def _create_connection(self) -> Any:
+        # Pooled handles all share the session; sockets live in its TCPConnector
+        return self._get_session()
+        
+    async def _close_connection(self, connection: Any):
+        pass
+        
+    async def _check_connection(self, connection: Any) -> bool:
+        return not connection.closed
+        
+    async def _execute_query(self, connection: Any, query: Dict) -> List[Dict]:
         logger.info(f"Fetching data from API with params: {query}")
-        return [{"sample": "data"}]
+        path = self.config.settings.get("read_path", "")
+        async with connection.get(path, params=query) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        return payload if isinstance(payload, list) else [payload]
         
-    async def write_data(self, data: List[Dict]) -> bool:
-        if not self._connection:
-            await self.connect()
-        # In reality, would make actual API request
+    async def _execute_write(self, connection: Any, data: List[Dict]) -> bool:
         logger.info(f"Sending {len(data)} records to API")
+        path = self.config.settings.get("write_path", "")
+        async with connection.post(path, json=data) as response:
+            response.raise_for_status()
         return True
 
 class ConnectorRegistry:
-    """Registry for managing data connectors"""
+    """Registry for managing data connectors
+    
+    Query results are only cached when a QueryResultCache is passed in,
+    since cached reads can be up to its TTL out of date.
+    """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[QueryResultCache] = None):
         self.connectors: Dict[UUID, BaseConnector] = {}
+        self.cache = cache
+        self.health = ConnectorHealthMonitor(self)
         
     def register_connector(self, name: str, type_: str, 
                          credentials: Dict, settings: Dict) -> UUID:
@@ -170,9 +360,9 @@ class ConnectorRegistry:
         )
         
         if type_ == "database":
-            connector = DatabaseConnector(config)
+            connector = DatabaseConnector(config, self.cache)
         elif type_ == "api":
-            connector = APIConnector(config)
+            connector = APIConnector(config, self.cache)
         else:
             raise ValueError(f"Unsupported connector type: {type_}")
             
@@ -188,6 +378,26 @@ class ConnectorRegistry:
         connector = self.connectors[connector_id]
         return await connector.test_connection()
         
+    async def transfer(self, source_id: UUID, target_id: UUID, query: Dict,
+                       chunk_size: int = 1000, prefetch: int = 2) -> int:
+        """Copy query results from one connector to another in bounded memory
+        
+        Reading the next chunks overlaps with writing the current one.
+        Returns the number of records written.
+        """
+        source = self.get_connector(source_id)
+        target = self.get_connector(target_id)
+        chunks = source.stream_data(query, chunk_size, prefetch)
+        try:
+            return await target.write_stream(chunks)
+        finally:
+            await chunks.aclose()
+        
+    async def close(self):
+        """Close every connector's pooled connections"""
+        for connector in self.connectors.values():
+            await connector.disconnect()
+        
     def get_connector(self, connector_id: UUID) -> BaseConnector:
         """Get a connector by ID"""
         if connector_id not in self.connectors:
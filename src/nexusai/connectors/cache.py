@@ -0,0 +1,148 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, defaultdict
+from uuid import UUID
+import asyncio
+import hashlib
+import json
+import time
+
+# Connector id and query digest
+QueryKey = Tuple[UUID, str]
+
+def query_key(connector_id: UUID, query: Dict) -> QueryKey:
+    """Cache key for a query: connector id plus a digest of the canonical query JSON"""
+    canonical = json.dumps(query, sort_keys=True, separators=(",", ":"), default=str)
+    return connector_id, hashlib.sha256(canonical.encode()).hexdigest()
+
+def result_size(result: Any) -> int:
+    """Approximate size of a query result in bytes, as its JSON encoding"""
+    return len(json.dumps(result, separators=(",", ":"), default=str))
+
+class QueryResultCache:
+    """Byte-bounded LRU cache of connector query results with a TTL
+
+    Identical queries issued while one is already in flight share that
+    backend call. Invalidating a connector drops its entries and stops
+    fetches that started before the invalidation from being cached.
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (result, size, expires_at)
+        self._entries: "OrderedDict[QueryKey, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._keys: Dict[UUID, Set[QueryKey]] = defaultdict(set)
+        self._generations: Dict[UUID, int] = defaultdict(int)
+        self._inflight: Dict[QueryKey, asyncio.Task] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_fetch(self, connector_id: UUID, query: Dict,
+                           fetch: Callable[[], Awaitable[List[Dict]]],
+                           ttl: Optional[float] = None) -> List[Dict]:
+        """Return a cached result or run fetch, sharing it with identical callers
+
+        ttl overrides the cache default for this result; 0 bypasses the cache.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl == 0:
+            return await fetch()
+        key = query_key(connector_id, query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, size, expires_at = entry
+            if expires_at is None or expires_at > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self._remove(key)
+            self.expirations += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+        self.misses += 1
+        generation = self._generations[connector_id]
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._forget(key, task)
+            else:
+                # The caller was cancelled; let the shared fetch finish for the others
+                task.add_done_callback(lambda done: self._forget(key, done))
+        if self._generations[connector_id] == generation:
+            self._put(key, result, ttl)
+        return result
+
+    def invalidate(self, connector_id: UUID):
+        """Drop a connector's cached results, e.g. after a write"""
+        self._generations[connector_id] += 1
+        for key in list(self._keys.pop(connector_id, ())):
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+        for key in [key for key in self._inflight if key[0] == connector_id]:
+            del self._inflight[key]
+
+    def clear(self):
+        """Drop every cached result"""
+        for connector_id in list(self._keys):
+            self.invalidate(connector_id)
+
+    def get_stats(self) -> Dict:
+        """Counters for sizing the cache"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
+
+    def _put(self, key: QueryKey, result: Any, ttl: Optional[float]):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._entries[key] = (result, size, expires_at)
+        self._keys[key[0]].add(key)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _forget(self, key: QueryKey, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark a failure as retrieved even if no caller is left to see it
+            task.exception()
+
+    def _remove(self, key: QueryKey):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+        keys = self._keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
@@ -0,0 +1,139 @@
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional, Set
+from collections import deque
+from datetime import datetime
+from uuid import UUID
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class HealthCheck(NamedTuple):
+    """Outcome of one connector probe"""
+    timestamp: datetime
+    healthy: bool
+    latency: float
+    error: Optional[str]
+
+class ConnectorHealthMonitor:
+    """Concurrent health checks, periodic probes and warm-up for a registry
+
+    Probes run at most concurrency at a time, each bounded by timeout
+    seconds, and the last history_size results are kept per connector.
+    """
+
+    def __init__(self, registry, concurrency: int = 10, timeout: float = 5.0,
+                 interval: float = 30.0, history_size: int = 100):
+        self.registry = registry
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.interval = interval
+        self.history_size = history_size
+        self.history: Dict[UUID, Deque[HealthCheck]] = {}
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._prober: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def check(self, connector_id: UUID) -> HealthCheck:
+        """Probe one connector and record the result"""
+        connector = self.registry.get_connector(connector_id)
+        return await self._run(connector_id, connector.test_connection)
+
+    async def check_all(self, connector_ids: Optional[Iterable[UUID]] = None) -> Dict[UUID, HealthCheck]:
+        """Probe connectors concurrently (all of them by default)"""
+        ids = list(connector_ids) if connector_ids is not None else list(self.registry.connectors)
+        results = await asyncio.gather(*(self.check(connector_id) for connector_id in ids))
+        return dict(zip(ids, results))
+
+    async def warm_up(self, connector_ids: Optional[Iterable[UUID]] = None) -> Dict[UUID, HealthCheck]:
+        """Open each connector's minimum pool connections ahead of traffic"""
+        ids = list(connector_ids) if connector_ids is not None else list(self.registry.connectors)
+        results = await asyncio.gather(*(
+            self._run(connector_id, self.registry.get_connector(connector_id).connect)
+            for connector_id in ids
+        ))
+        warmed = sum(1 for result in results if result.healthy)
+        logger.info(f"Warmed up {warmed} of {len(ids)} connectors")
+        return dict(zip(ids, results))
+
+    def warm_up_later(self, connector_ids: Iterable[UUID]):
+        """Warm connectors in the background without waiting for them"""
+        task = asyncio.create_task(self.warm_up(connector_ids))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def start(self):
+        """Start probing every connector each interval seconds"""
+        if self._prober is None or self._prober.done():
+            self._prober = asyncio.create_task(self._probe())
+
+    async def stop(self):
+        for task in list(self._pending):
+            task.cancel()
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self._prober is not None:
+            self._prober.cancel()
+            try:
+                await self._prober
+            except asyncio.CancelledError:
+                pass
+            self._prober = None
+
+    def get_health(self, connector_id: Optional[UUID] = None) -> Dict[UUID, Dict]:
+        """Latest state, latency summary and history per connector"""
+        ids = [connector_id] if connector_id is not None else list(self.registry.connectors)
+        return {connector_id: self._summarize(connector_id) for connector_id in ids}
+
+    async def _run(self, connector_id: UUID, probe) -> HealthCheck:
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        async with self._limit:
+            started = time.perf_counter()
+            try:
+                healthy = bool(await asyncio.wait_for(probe(), self.timeout))
+                error = None if healthy else "Connection test failed"
+            except asyncio.TimeoutError:
+                healthy, error = False, f"Timed out after {self.timeout}s"
+            except Exception as e:
+                healthy, error = False, str(e)
+            result = HealthCheck(datetime.utcnow(), healthy, time.perf_counter() - started, error)
+        history = self.history.get(connector_id)
+        if history is None:
+            history = self.history[connector_id] = deque(maxlen=self.history_size)
+        history.append(result)
+        if not healthy:
+            logger.warning(f"Connector {connector_id} unhealthy: {error}")
+        return result
+
+    def _summarize(self, connector_id: UUID) -> Dict:
+        connector = self.registry.get_connector(connector_id)
+        history: List[HealthCheck] = list(self.history.get(connector_id, ()))
+        latencies = sorted(check.latency for check in history)
+        failures = 0
+        for check in reversed(history):
+            if check.healthy:
+                break
+            failures += 1
+        latest = history[-1] if history else None
+        return {
+            "name": connector.config.name,
+            "healthy": latest.healthy if latest else None,
+            "last_checked": latest.timestamp if latest else None,
+            "consecutive_failures": failures,
+            "latency": {
+                "last": latest.latency if latest else None,
+                "mean": sum(latencies) / len(latencies) if latencies else None,
+                "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None
+            },
+            "pool": connector.get_pool_stats(),
+            "history": [check._asdict() for check in history]
+        }
+
+    async def _probe(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.error(f"Connector health probe failed: {e}")
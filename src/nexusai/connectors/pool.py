@@ -0,0 +1,219 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from collections import deque
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Errors that mark a connection as broken rather than the operation as failed
+CONNECTION_ERRORS = (ConnectionError, OSError, asyncio.TimeoutError)
+
+class ConnectionPool:
+    """Bounded pool of reusable connections for one connector
+
+    At most max_size connections are open at a time; callers beyond that
+    wait up to acquire_timeout for one to be released. Idle connections
+    are reused most-recently-used first, health-checked before reuse once
+    they have sat idle for check_interval seconds, and closed after
+    max_idle seconds while keeping min_size warm.
+    """
+
+    def __init__(self, create: Callable[[], Awaitable[Any]],
+                 close: Callable[[Any], Awaitable[None]],
+                 check: Optional[Callable[[Any], Awaitable[bool]]] = None,
+                 min_size: int = 1, max_size: int = 10,
+                 acquire_timeout: Optional[float] = 10.0,
+                 max_idle: Optional[float] = 300.0,
+                 check_interval: float = 30.0,
+                 name: str = ""):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self._create = create
+        self._close = close
+        self._check = check
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._reaper: Optional[asyncio.Task] = None
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "acquired": 0,
+            "timeouts": 0,
+            "failed_checks": 0,
+            "errors": 0
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def size(self) -> int:
+        """Open connections, idle and in use"""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    async def start(self):
+        """Open min_size connections and start idle eviction"""
+        self._closed = False
+        while self._size < self.min_size:
+            connection = await self._open()
+            self._idle.append((connection, time.monotonic()))
+        if self.max_idle and self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def acquire(self) -> Any:
+        """Take a connection, opening one if none is idle and the pool has room"""
+        if self._closed:
+            raise ValueError(f"Connection pool {self.name} is closed")
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore().acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise TimeoutError(
+                f"Timed out after {self.acquire_timeout}s acquiring a connection for {self.name}"
+            )
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - started
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        try:
+            connection = await self._take_idle()
+            if connection is None:
+                connection = await self._open()
+        except BaseException:
+            self._semaphore().release()
+            raise
+        self._stats["acquired"] += 1
+        return connection
+
+    async def release(self, connection: Any, discard: bool = False):
+        """Return a connection; discarded connections are closed instead of reused"""
+        try:
+            if discard or self._closed:
+                await self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+        finally:
+            self._semaphore().release()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        """Hold a connection for the duration of the block
+
+        Connection-level errors (ConnectionError, OSError, timeouts) close
+        the connection instead of returning it to the pool.
+        """
+        connection = await self.acquire()
+        discard = False
+        try:
+            yield connection
+        except CONNECTION_ERRORS:
+            discard = True
+            self._stats["errors"] += 1
+            raise
+        finally:
+            await self.release(connection, discard)
+
+    async def evict_idle(self) -> int:
+        """Close connections idle longer than max_idle, keeping min_size open"""
+        if not self.max_idle:
+            return 0
+        cutoff = time.monotonic() - self.max_idle
+        evicted = 0
+        # Oldest idle connections are at the left
+        while self._idle and self._idle[0][1] < cutoff and self._size > self.min_size:
+            connection, _ = self._idle.popleft()
+            await self._discard(connection)
+            evicted += 1
+        return evicted
+
+    async def close(self):
+        """Close idle connections now and in-use ones as they are released"""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        while self._idle:
+            connection, _ = self._idle.popleft()
+            await self._discard(connection)
+
+    def get_stats(self) -> Dict:
+        """Pool occupancy and lifetime counters"""
+        acquired = self._stats["acquired"]
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            "waiting": self._waiting,
+            "max_size": self.max_size,
+            **self._stats,
+            "wait_mean": self._wait_total / acquired if acquired else 0.0,
+            "wait_max": self._wait_max
+        }
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the pool can be built outside a running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_size)
+        return self._slots
+
+    async def _take_idle(self) -> Optional[Any]:
+        now = time.monotonic()
+        while self._idle:
+            connection, last_used = self._idle.pop()
+            if self.max_idle and last_used < now - self.max_idle:
+                await self._discard(connection)
+                continue
+            if self._check is not None and last_used < now - self.check_interval:
+                try:
+                    healthy = await self._check(connection)
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    self._stats["failed_checks"] += 1
+                    await self._discard(connection)
+                    continue
+            return connection
+        return None
+
+    async def _open(self) -> Any:
+        connection = await self._create()
+        self._size += 1
+        self._stats["created"] += 1
+        return connection
+
+    async def _discard(self, connection: Any):
+        self._size -= 1
+        self._stats["closed"] += 1
+        try:
+            await self._close(connection)
+        except Exception as e:
+            logger.warning(f"Failed to close connection for {self.name}: {e}")
+
+    async def _reap(self):
+        interval = max(self.max_idle / 2, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            evicted = await self.evict_idle()
+            if evicted:
+                logger.info(f"Evicted {evicted} idle connections from {self.name}")
@@ -1,12 +1,25 @@
-from typing import Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from collections import defaultdict, deque
+from concurrent.futures import Executor
 from uuid import UUID, uuid4
 from datetime import datetime, UTC
 from pydantic import BaseModel
 import asyncio
 import logging
+import time
+
+from .records import (
+    BUSY, COMPLETED, EXPIRED, FAILED, PROCESSING, READY, REJECTED, TERMINAL_STATUSES,
+    AgentRecord, TaskArchive, TaskRecord
+)
+from .scheduler import PRIORITY_CLASSES, TaskScheduler, priority_class
+from ..telemetry import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+# Histogram children bound once; labels() takes a lock on every call
+_TASK_DURATION = {status: metrics.TASK_DURATION.labels(status) for status in (COMPLETED, FAILED)}
+
 class Agent(BaseModel):
     """Represents an AI agent in the system"""
     id: UUID
@@ -28,81 +41,419 @@ class Task(BaseModel):
     input_data: Dict
     output_data: Optional[Dict]
     error: Optional[str]
+    priority: str = "LOW"
+    deadline: Optional[datetime] = None
+
+# Handlers receive the task's input_data and return its output_data
+TaskHandler = Callable[[Dict], Any]
+
+def _datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, UTC)
+
+def agent_model(record: AgentRecord) -> Agent:
+    """Build the API model for an agent record"""
+    return Agent(
+        id=record.id,
+        name=record.name,
+        capabilities=list(record.capabilities),
+        status=record.status,
+        created_at=_datetime(record.created_at),
+        last_active=_datetime(record.last_active),
+        security_context=record.security_context,
+        compliance_level=record.compliance_level
+    )
+
+def task_model(record: TaskRecord) -> Task:
+    """Build the API model for a task record"""
+    return Task(
+        id=record.id,
+        agent_id=record.agent_id,
+        status=record.status,
+        created_at=_datetime(record.created_at),
+        updated_at=_datetime(record.updated_at),
+        input_data=record.input_data if record.input_data is not None else {},
+        output_data=record.output_data,
+        error=record.error,
+        priority=record.priority,
+        deadline=_datetime(record.deadline) if record.deadline is not None else None
+    )
+
+def task_event(record: TaskRecord) -> Dict:
+    """Describe a task's current state as a transition event"""
+    return {
+        "task_id": record.id,
+        "agent_id": record.agent_id,
+        "status": record.status,
+        "updated_at": _datetime(record.updated_at),
+        "error": record.error
+    }
+
+class TaskSubscription:
+    """Bounded queue of task state transitions for one subscriber
+    
+    Events are dropped (and counted) rather than blocking the orchestrator
+    when the subscriber falls max_queued events behind.
+    """
+    
+    def __init__(self, orchestrator: "AgentOrchestrator", agent_id: Optional[UUID],
+                 max_queued: int):
+        self.agent_id = agent_id
+        self.dropped = 0
+        self._orchestrator = orchestrator
+        self._queue: asyncio.Queue = asyncio.Queue(max_queued)
+        
+    def publish(self, event: Dict):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Wait for the next event, returning None on timeout"""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+            
+    def close(self):
+        self._orchestrator._unsubscribe(self)
 
 class AgentOrchestrator:
-    """Core orchestration engine for managing AI agents"""
+    """Core orchestration engine for managing AI agents
+    
+    Agents and tasks are held as compact slotted records; Pydantic models
+    are only built when they are returned to callers. Finished tasks move
+    from the live tasks registry to a retention-bounded archive.
+    """
     
-    def __init__(self):
-        self.agents: Dict[UUID, Agent] = {}
-        self.tasks: Dict[UUID, Task] = {}
-        self._task_queue = asyncio.Queue()
+    def __init__(self, num_workers: int = 1, max_queue_size: int = 0,
+                 agent_concurrency: int = 0, executor: Optional[Executor] = None,
+                 archive_size: int = 100_000,
+                 archive_retention: Optional[float] = 3600.0):
+        self.agents: Dict[UUID, AgentRecord] = {}
+        # Tasks that have not finished yet; finished ones are in archive
+        self.tasks: Dict[UUID, TaskRecord] = {}
+        self.archive = TaskArchive(archive_size, archive_retention)
+        self._task_queue = TaskScheduler()
+        # Worker pool configuration; 0 means unbounded for the limits
+        self.num_workers = max(1, num_workers)
+        self.max_queue_size = max_queue_size
+        self.agent_concurrency = agent_concurrency
+        self.executor = executor
+        self._handlers: Dict[UUID, TaskHandler] = {}
+        self._default_handler: Optional[TaskHandler] = None
+        self._workers: List[asyncio.Task] = []
+        self._accepting = True
+        # Tasks waiting to run (queued or deferred), used for backpressure
+        self._backlog = 0
+        self._agent_inflight: Dict[UUID, int] = defaultdict(int)
+        self._deferred: Dict[UUID, Deque[TaskRecord]] = defaultdict(deque)
+        # Completion futures, created only for tasks someone is waiting on
+        self._waiters: Dict[UUID, asyncio.Future] = {}
+        # Subscriptions keyed by agent filter; None receives every agent
+        self._subscribers: Dict[Optional[UUID], Set[TaskSubscription]] = {}
         
     async def register_agent(self, name: str, capabilities: List[str], 
-                           security_context: Dict, compliance_level: str) -> Agent:
-        """Register a new agent with the orchestrator"""
-        agent = Agent(
-            id=uuid4(),
+                           security_context: Dict, compliance_level: str,
+                           agent_id: Optional[UUID] = None) -> Agent:
+        """Register a new agent with the orchestrator
+        
+        The id is generated unless agent_id is given, as it is when a
+        sharded orchestrator places the agent on this shard.
+        """
+        agent = AgentRecord(
+            id=agent_id or uuid4(),
             name=name,
-            capabilities=capabilities,
-            status="READY",
-            created_at=datetime.now(UTC),
-            last_active=datetime.now(UTC),
+            capabilities=tuple(capabilities),
             security_context=security_context,
-            compliance_level=compliance_level
+            compliance_level=compliance_level,
+            created_at=time.time()
         )
         self.agents[agent.id] = agent
         logger.info(f"Registered new agent: {agent.name} with ID: {agent.id}")
-        return agent
+        return agent_model(agent)
+
+    def set_task_handler(self, handler: TaskHandler, agent_id: Optional[UUID] = None):
+        """Set the callable that executes tasks, optionally for a single agent
+        
+        Coroutine functions are awaited on the event loop. Plain callables run
+        on the configured executor when there is one, so CPU-bound agent work
+        can use a thread or process pool, and inline otherwise.
+        """
+        if agent_id is None:
+            self._default_handler = handler
+        else:
+            self._handlers[agent_id] = handler
+
+    def set_agent_weight(self, agent_id: UUID, weight: float):
+        """Set an agent's share of dispatches relative to others in its priority class"""
+        if agent_id not in self.agents:
+            raise ValueError(f"Agent {agent_id} not found")
+        self._task_queue.set_weight(agent_id, weight)
 
-    async def submit_task(self, agent_id: UUID, input_data: Dict) -> Task:
-        """Submit a new task for execution"""
+    async def submit_task(self, agent_id: UUID, input_data: Dict,
+                          priority: Optional[str] = None,
+                          deadline: Optional[datetime] = None) -> Task:
+        """Submit a new task for execution
+        
+        The priority class defaults to the agent's compliance level. A task
+        still queued when its deadline passes is not run and ends EXPIRED.
+        When the queue is full or the orchestrator is shutting down the task
+        is returned with status REJECTED and the reason in its error field.
+        """
         if agent_id not in self.agents:
             raise ValueError(f"Agent {agent_id} not found")
+        if deadline is not None and deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=UTC)
             
-        task = Task(
+        task = TaskRecord(
             id=uuid4(),
             agent_id=agent_id,
-            status="PENDING",
-            created_at=datetime.now(UTC),
-            updated_at=datetime.now(UTC),
             input_data=input_data,
-            output_data=None,
-            error=None
+            priority=priority_class(priority or self.agents[agent_id].compliance_level),
+            created_at=time.time(),
+            deadline=deadline.timestamp() if deadline is not None else None
         )
+        if not self._accepting:
+            return self._reject(task, "Orchestrator is shutting down")
+        if self.max_queue_size and self._backlog >= self.max_queue_size:
+            return self._reject(task, "Task queue is full")
         self.tasks[task.id] = task
-        await self._task_queue.put(task)
+        self._backlog += 1
+        self._task_queue.put_nowait(task)
+        if self._subscribers:
+            self._publish(task)
         logger.info(f"Submitted task {task.id} for agent {agent_id}")
-        return task
+        return task_model(task)
+
+    async def submit_tasks(self, items: Iterable[Tuple[UUID, Dict]],
+                           priority: Optional[str] = None,
+                           deadline: Optional[datetime] = None) -> List[Dict]:
+        """Submit many (agent_id, input_data) tasks in one step
+        
+        Agents are validated once per distinct id, all tasks share one
+        timestamp and are enqueued together, and a single log line is
+        written. Returns a result per item, in order, with task_id, status
+        and error; items for unknown agents or beyond the queue's remaining
+        capacity are REJECTED rather than raising.
+        """
+        if deadline is not None and deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=UTC)
+        deadline_ts = deadline.timestamp() if deadline is not None else None
+        now = time.time()
+        capacity = self.max_queue_size - self._backlog if self.max_queue_size else None
+        priorities: Dict[UUID, Optional[str]] = {}
+        accepted: List[TaskRecord] = []
+        results: List[Dict] = []
+        for agent_id, input_data in items:
+            if agent_id not in priorities:
+                agent = self.agents.get(agent_id)
+                priorities[agent_id] = priority_class(priority or agent.compliance_level) \
+                    if agent is not None else None
+            task_priority = priorities[agent_id]
+            task = TaskRecord(uuid4(), agent_id, input_data, task_priority or "LOW", now, deadline_ts)
+            if task_priority is None:
+                error = f"Agent {agent_id} not found"
+            elif not self._accepting:
+                error = "Orchestrator is shutting down"
+            elif capacity is not None and len(accepted) >= capacity:
+                error = "Task queue is full"
+            else:
+                accepted.append(task)
+                results.append({"task_id": task.id, "status": task.status, "error": None})
+                continue
+            task.status = REJECTED
+            task.error = error
+            self.archive.add(task)
+            results.append({"task_id": task.id, "status": REJECTED, "error": error})
+            
+        tasks = self.tasks
+        for task in accepted:
+            tasks[task.id] = task
+        self._backlog += len(accepted)
+        self._task_queue.put_many(accepted)
+        if self._subscribers:
+            for task in accepted:
+                self._publish(task)
+        logger.info(f"Submitted {len(accepted)} of {len(results)} tasks in batch")
+        return results
+
+    def _reject(self, task: TaskRecord, reason: str) -> Task:
+        task.status = REJECTED
+        task.error = reason
+        model = task_model(task)
+        self.archive.add(task)
+        logger.warning(f"Rejected task {task.id}: {reason}")
+        return model
+
+    def start(self):
+        """Start the worker pool if it is not already running"""
+        if self._workers:
+            return
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"orchestrator-worker-{i}")
+            for i in range(self.num_workers)
+        ]
+        logger.info(f"Started {self.num_workers} task workers")
+
+    async def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        """Stop accepting tasks and stop the worker pool
+        
+        With drain, queued and in-flight tasks are allowed to finish first
+        (bounded by timeout); otherwise workers are cancelled immediately.
+        """
+        self._accepting = False
+        if drain and self._workers:
+            try:
+                await asyncio.wait_for(self._task_queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timed out draining task queue")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Task workers stopped")
 
     async def process_tasks(self):
-        """Main task processing loop"""
+        """Main task processing loop
+        
+        Runs the worker pool until the orchestrator is shut down.
+        """
+        self.start()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _worker(self):
         while True:
             task = await self._task_queue.get()
+            agent_id = task.agent_id
+            if self.agent_concurrency and \
+               self._agent_inflight[agent_id] >= self.agent_concurrency:
+                # Park the task so this worker can serve other agents; it is
+                # requeued when one of the agent's running tasks finishes
+                self._deferred[agent_id].append(task)
+                continue
+            self._agent_inflight[agent_id] += 1
+            self._backlog -= 1
+            try:
+                await self._run_task(task)
+            finally:
+                self._task_queue.task_done()
+                self._agent_inflight[agent_id] -= 1
+                if not self._agent_inflight[agent_id]:
+                    del self._agent_inflight[agent_id]
+                deferred = self._deferred.get(agent_id)
+                if deferred:
+                    # Back through the scheduler, so the freed slot goes to
+                    # the most urgent parked task only when nothing of a
+                    # higher class is queued
+                    parked = min(deferred, key=lambda t:
+                                 PRIORITY_CLASSES[priority_class(t.priority)])
+                    deferred.remove(parked)
+                    if not deferred:
+                        del self._deferred[agent_id]
+                    self._task_queue.requeue(parked)
+
+    async def _run_task(self, task: TaskRecord):
+        if task.deadline is not None and task.deadline < time.time():
+            task.error = "Deadline exceeded before the task was started"
+            self._finish(task, EXPIRED)
+            logger.warning(f"Task {task.id} expired in queue")
+            return
+        status = FAILED
+        started = time.perf_counter()
+        with tracing.span("task.run") as span:
+            if span is not None:
+                span.set_attribute("nexusai.task_id", str(task.id))
+                span.set_attribute("nexusai.priority", task.priority)
             try:
                 # Update task status
-                task.status = "PROCESSING"
-                task.updated_at = datetime.utcnow()
+                task.status = PROCESSING
+                task.updated_at = time.time()
+                if self._subscribers:
+                    self._publish(task)
                 
                 # Update agent status
                 agent = self.agents[task.agent_id]
-                agent.status = "BUSY"
-                agent.last_active = datetime.utcnow()
+                agent.status = BUSY
+                agent.last_active = task.updated_at
                 
-                # Here we would integrate with actual agent execution
-                # For now, we'll just log the task
                 logger.info(f"Processing task {task.id} for agent {agent.name}")
+                handler = self._handlers.get(task.agent_id, self._default_handler)
+                if handler is not None:
+                    input_data = task.input_data if task.input_data is not None else {}
+                    task.output_data = await self._call_handler(handler, input_data)
                 
                 # Update task completion
-                task.status = "COMPLETED"
-                task.updated_at = datetime.utcnow()
-                agent.status = "READY"
+                status = COMPLETED
                 
+            except asyncio.CancelledError:
+                task.error = "Cancelled"
+                raise
             except Exception as e:
-                task.status = "FAILED"
                 task.error = str(e)
                 logger.error(f"Task {task.id} failed: {e}")
             finally:
-                self._task_queue.task_done()
+                _TASK_DURATION[status].observe(time.perf_counter() - started)
+                self._finish(task, status)
+                owner = self.agents.get(task.agent_id)
+                if owner is not None and self._agent_inflight.get(task.agent_id, 0) <= 1:
+                    owner.status = READY
+
+    def _finish(self, task: TaskRecord, status: str):
+        task.status = status
+        task.updated_at = time.time()
+        self.tasks.pop(task.id, None)
+        self.archive.add(task)
+        if self._subscribers:
+            self._publish(task)
+        waiter = self._waiters.pop(task.id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def subscribe(self, agent_id: Optional[UUID] = None,
+                  max_queued: int = 1000) -> TaskSubscription:
+        """Subscribe to task state transitions, optionally for one agent"""
+        subscription = TaskSubscription(self, agent_id, max_queued)
+        self._subscribers.setdefault(agent_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: TaskSubscription):
+        subscriptions = self._subscribers.get(subscription.agent_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.agent_id]
+
+    def _publish(self, task: TaskRecord):
+        event = task_event(task)
+        for key in (None, task.agent_id):
+            for subscription in self._subscribers.get(key, ()):
+                subscription.publish(event)
+
+    async def _call_handler(self, handler: TaskHandler, input_data: Dict) -> Any:
+        if asyncio.iscoroutinefunction(handler):
+            return await handler(input_data)
+        if self.executor is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, handler, input_data)
+        return handler(input_data)
+
+    def get_queue_stats(self) -> Dict:
+        """Queue depth and wait time percentiles per priority class"""
+        return {
+            "depth": self._task_queue.qsize(),
+            "backlog": self._backlog,
+            "wait_seconds": self._task_queue.get_wait_stats()
+        }
+
+    def _get_task(self, task_id: UUID) -> TaskRecord:
+        task = self.tasks.get(task_id) or self.archive.get(task_id)
+        if task is None:
+            raise ValueError(f"Task {task_id} not found")
+        return task
 
     async def get_agent_status(self, agent_id: UUID) -> Dict:
         """Get the current status of an agent"""
@@ -114,21 +465,43 @@ class AgentOrchestrator:
             "id": agent.id,
             "name": agent.name,
             "status": agent.status,
-            "last_active": agent.last_active,
+            "last_active": _datetime(agent.last_active),
             "compliance_level": agent.compliance_level
         }
 
+    async def get_task_result(self, task_id: UUID, timeout: Optional[float] = None) -> Dict:
+        """Wait up to timeout seconds for a task to finish and return its result
+        
+        Returns straight away for finished tasks. On timeout the task's
+        current (unfinished) state is returned with output_data None.
+        """
+        task = self._get_task(task_id)
+        if task.status not in TERMINAL_STATUSES and (timeout is None or timeout > 0):
+            waiter = self._waiters.get(task_id)
+            if waiter is None:
+                waiter = self._waiters[task_id] = asyncio.get_running_loop().create_future()
+            try:
+                # Shielded so one waiter timing out leaves the future for others
+                await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return {
+            "id": task.id,
+            "agent_id": task.agent_id,
+            "status": task.status,
+            "updated_at": _datetime(task.updated_at),
+            "output_data": task.output_data,
+            "error": task.error
+        }
+
     async def get_task_status(self, task_id: UUID) -> Dict:
-        """Get the current status of a task"""
-        if task_id not in self.tasks:
-            raise ValueError(f"Task {task_id} not found")
-            
-        task = self.tasks[task_id]
+        """Get the current status of a task, including recently finished ones"""
+        task = self._get_task(task_id)
         return {
             "id": task.id,
             "agent_id": task.agent_id,
             "status": task.status,
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
+            "created_at": _datetime(task.created_at),
+            "updated_at": _datetime(task.updated_at),
             "error": task.error
         }
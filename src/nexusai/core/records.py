@@ -0,0 +1,96 @@
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from uuid import UUID
+import sys
+import time
+
+# Status values are interned so every record shares one string object
+PENDING = sys.intern("PENDING")
+PROCESSING = sys.intern("PROCESSING")
+COMPLETED = sys.intern("COMPLETED")
+FAILED = sys.intern("FAILED")
+EXPIRED = sys.intern("EXPIRED")
+REJECTED = sys.intern("REJECTED")
+READY = sys.intern("READY")
+BUSY = sys.intern("BUSY")
+
+TERMINAL_STATUSES = frozenset({COMPLETED, FAILED, EXPIRED, REJECTED})
+
+class TaskRecord:
+    """Compact in-memory task state; timestamps are seconds since the epoch"""
+    __slots__ = ("id", "agent_id", "status", "created_at", "updated_at",
+                 "input_data", "output_data", "error", "priority", "deadline")
+
+    def __init__(self, id: UUID, agent_id: UUID, input_data: Optional[Dict],
+                 priority: str, created_at: float, deadline: Optional[float] = None):
+        self.id = id
+        self.agent_id = agent_id
+        self.status = PENDING
+        self.created_at = created_at
+        self.updated_at = created_at
+        self.input_data = input_data
+        self.output_data: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.priority = sys.intern(priority)
+        self.deadline = deadline
+
+class AgentRecord:
+    """Compact in-memory agent state; timestamps are seconds since the epoch"""
+    __slots__ = ("id", "name", "capabilities", "status", "created_at",
+                 "last_active", "security_context", "compliance_level")
+
+    def __init__(self, id: UUID, name: str, capabilities: Tuple[str, ...],
+                 security_context: Dict, compliance_level: str, created_at: float):
+        self.id = id
+        self.name = name
+        self.capabilities = capabilities
+        self.status = READY
+        self.created_at = created_at
+        self.last_active = created_at
+        self.security_context = security_context
+        self.compliance_level = sys.intern(compliance_level)
+
+class TaskArchive:
+    """Retention-bounded store of finished tasks
+
+    Tasks are kept in completion order and dropped once there are more
+    than max_tasks or they finished more than retention_seconds ago.
+    Archived tasks no longer hold their input_data.
+    """
+
+    def __init__(self, max_tasks: int = 100_000, retention_seconds: Optional[float] = 3600.0):
+        self.max_tasks = max_tasks
+        self.retention_seconds = retention_seconds
+        self._tasks: "OrderedDict[UUID, TaskRecord]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: UUID) -> bool:
+        return self.get(task_id) is not None
+
+    def add(self, task: TaskRecord):
+        task.input_data = None
+        self._tasks[task.id] = task
+        self._tasks.move_to_end(task.id)
+        self._evict(time.time())
+
+    def get(self, task_id: UUID) -> Optional[TaskRecord]:
+        task = self._tasks.get(task_id)
+        if task is not None and self._expired(task, time.time()):
+            return None
+        return task
+
+    def _expired(self, task: TaskRecord, now: float) -> bool:
+        return self.retention_seconds is not None and \
+            task.updated_at < now - self.retention_seconds
+
+    def _evict(self, now: float):
+        tasks = self._tasks
+        while len(tasks) > self.max_tasks:
+            tasks.popitem(last=False)
+        while tasks:
+            oldest = next(iter(tasks.values()))
+            if not self._expired(oldest, now):
+                break
+            tasks.popitem(last=False)
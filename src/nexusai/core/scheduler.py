@@ -0,0 +1,189 @@
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from uuid import UUID
+import asyncio
+import heapq
+import itertools
+import time
+
+# Priority classes, most urgent first; names match ComplianceLevel values
+PRIORITY_CLASSES = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+DEFAULT_PRIORITY = "LOW"
+
+def priority_class(name: str) -> str:
+    """Normalize a priority or compliance level name to a priority class"""
+    name = str(name).upper()
+    return name if name in PRIORITY_CLASSES else DEFAULT_PRIORITY
+
+class WaitTimeStats:
+    """Rolling window of queue wait times for one priority class"""
+
+    def __init__(self, window: int = 10000):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def snapshot(self) -> Dict:
+        """Summarize wait times; percentiles cover the rolling window"""
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": self.max
+        }
+
+class TaskScheduler:
+    """Priority task queue with weighted fair queuing across agents
+
+    Tasks are served strictly by priority class. Within a class each agent
+    gets a share of dispatches proportional to its weight (start-time fair
+    queuing on virtual finish tags), so a burst from one agent cannot delay
+    other agents' tasks of the same class. Enqueue and dequeue are O(log n)
+    on a single binary heap. An agent's finish tag is forgotten once its
+    last queued task in a class is dequeued, since a new task's start is
+    then the class's virtual time anyway.
+
+    The queue interface (put_nowait/get/task_done/join/qsize) mirrors
+    asyncio.Queue so it can stand in for one.
+    """
+
+    def __init__(self, stats_window: int = 10000):
+        self._heap: List[Tuple[int, float, int, Optional[float], object]] = []
+        self._seq = itertools.count()
+        self._virtual_time: Dict[int, float] = {}
+        self._last_finish: Dict[Tuple[int, UUID], float] = {}
+        self._weights: Dict[UUID, float] = {}
+        self._getters: Deque[asyncio.Future] = deque()
+        self._unfinished_tasks = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+        self.wait_stats: Dict[str, WaitTimeStats] = {
+            name: WaitTimeStats(stats_window) for name in PRIORITY_CLASSES
+        }
+
+    def set_weight(self, agent_id: UUID, weight: float):
+        """Set an agent's fair-share weight (default 1.0)"""
+        if weight <= 0:
+            raise ValueError("Weight must be positive")
+        self._weights[agent_id] = weight
+
+    def qsize(self) -> int:
+        return len(self._heap)
+
+    def empty(self) -> bool:
+        return not self._heap
+
+    def put_nowait(self, task):
+        """Enqueue a task using its priority and agent_id attributes"""
+        heapq.heappush(self._heap, self._entry(task, time.monotonic()))
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next()
+
+    def put_many(self, tasks: Iterable):
+        """Enqueue several tasks at once, waking as many waiting getters"""
+        now = time.monotonic()
+        entries = [self._entry(task, now) for task in tasks]
+        if not entries:
+            return
+        if len(entries) > len(self._heap):
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+        self._unfinished_tasks += len(entries)
+        self._finished.clear()
+        for _ in range(min(len(entries), len(self._getters))):
+            self._wakeup_next()
+
+    def requeue(self, task):
+        """Put back a dequeued task that was not run, ahead of its class
+
+        The task keeps its priority class and its place in the unfinished
+        count; it is not counted again in the wait time stats.
+        """
+        rank = PRIORITY_CLASSES[priority_class(task.priority)]
+        finish = self._virtual_time.get(rank, 0.0)
+        heapq.heappush(self._heap, (rank, finish, next(self._seq), None, task))
+        self._wakeup_next()
+
+    def _entry(self, task, enqueued_at: float) -> Tuple:
+        rank = PRIORITY_CLASSES[priority_class(task.priority)]
+        flow = (rank, task.agent_id)
+        start = max(self._virtual_time.get(rank, 0.0), self._last_finish.get(flow, 0.0))
+        finish = start + 1.0 / self._weights.get(task.agent_id, 1.0)
+        self._last_finish[flow] = finish
+        return (rank, finish, next(self._seq), enqueued_at, task)
+
+    def get_nowait(self):
+        """Dequeue the next task, raising asyncio.QueueEmpty if there is none"""
+        if not self._heap:
+            raise asyncio.QueueEmpty
+        rank, finish, _, enqueued_at, task = heapq.heappop(self._heap)
+        self._virtual_time[rank] = finish
+        flow = (rank, task.agent_id)
+        if self._last_finish.get(flow, finish) <= finish:
+            # The agent has nothing else queued in this class
+            self._last_finish.pop(flow, None)
+        if enqueued_at is not None:
+            self.wait_stats[priority_class(task.priority)].record(time.monotonic() - enqueued_at)
+        return task
+
+    async def get(self):
+        """Dequeue the next task, waiting until one is available"""
+        while not self._heap:
+            getter = asyncio.get_running_loop().create_future()
+            self._getters.append(getter)
+            try:
+                await getter
+            except BaseException:
+                getter.cancel()
+                try:
+                    self._getters.remove(getter)
+                except ValueError:
+                    pass
+                if self._heap and not getter.cancelled():
+                    self._wakeup_next()
+                raise
+        return self.get_nowait()
+
+    def task_done(self):
+        if self._unfinished_tasks <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished_tasks -= 1
+        if self._unfinished_tasks == 0:
+            self._finished.set()
+
+    async def join(self):
+        """Wait until every enqueued task has been marked done"""
+        if self._unfinished_tasks:
+            await self._finished.wait()
+
+    def get_wait_stats(self) -> Dict[str, Dict]:
+        """Queue wait time summary per priority class"""
+        return {name: stats.snapshot() for name, stats in self.wait_stats.items()}
+
+    def _wakeup_next(self):
+        while self._getters:
+            getter = self._getters.popleft()
+            if not getter.done():
+                getter.set_result(None)
+                break
@@ -0,0 +1,419 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union, cast
+from abc import ABC, abstractmethod
+from datetime import datetime
+from uuid import UUID, uuid4
+import asyncio
+import bisect
+import hashlib
+import inspect
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import threading
+
+from .orchestrator import Agent, AgentOrchestrator, Task, TaskHandler
+from .state import InMemoryStateBackend, StateBackend
+
+logger = logging.getLogger(__name__)
+
+# Orchestrator methods a shard serves; the rest stay local to a process
+SHARD_METHODS = frozenset({
+    "register_agent", "submit_task", "submit_tasks", "get_agent_status",
+    "get_task_status", "get_task_result", "get_queue_stats"
+})
+
+def _ring_hash(key: Union[str, bytes]) -> int:
+    # Stable across processes, unlike hash()
+    if isinstance(key, str):
+        key = key.encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+class ConsistentHashRing:
+    """Maps keys to nodes with consistent hashing
+
+    Each node owns replicas points on a 64-bit ring and a key belongs to
+    the first point at or after its hash. Adding or removing a node only
+    moves the keys on the arcs that node gains or loses, about 1/n of
+    them, and the virtual points keep the load even across nodes.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._nodes: Set[str] = set()
+        for node in nodes:
+            self.add_node(node)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def add_node(self, node: str):
+        if node in self._nodes:
+            raise ValueError(f"Node {node} is already on the ring")
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            point = _ring_hash(f"{node}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: str):
+        if node not in self._nodes:
+            raise ValueError(f"Node {node} not found")
+        self._nodes.discard(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key: Union[str, bytes]) -> str:
+        if not self._points:
+            raise ValueError("The hash ring has no nodes")
+        index = bisect.bisect_left(self._points, _ring_hash(key))
+        return self._owners[index % len(self._owners)]
+
+class Shard(ABC):
+    """One partition of the agents, with its own orchestrator"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        pass
+
+    @abstractmethod
+    async def call(self, method: str, *args) -> Any:
+        """Run one of the SHARD_METHODS on this shard's orchestrator"""
+        pass
+
+class LocalShard(Shard):
+    """A shard backed by an orchestrator in this process"""
+
+    def __init__(self, name: str, orchestrator: Optional[AgentOrchestrator] = None):
+        super().__init__(name)
+        self.orchestrator = orchestrator or AgentOrchestrator()
+
+    async def start(self):
+        self.orchestrator.start()
+
+    async def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        await self.orchestrator.shutdown(drain, timeout)
+
+    async def call(self, method: str, *args) -> Any:
+        if method not in SHARD_METHODS:
+            raise ValueError(f"Unknown shard method: {method}")
+        result = getattr(self.orchestrator, method)(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+class ProcessShard(Shard):
+    """A shard whose orchestrator runs in a child process
+
+    Calls are pickled over a pipe and run concurrently on the child's
+    event loop, so one shard per core lets CPU-bound handlers scale past
+    the GIL. The handler and orchestrator_options are passed to the child,
+    so the handler must be picklable (a module-level function). Arguments
+    and results are copied, so callers should batch with submit_tasks.
+    """
+
+    def __init__(self, name: str, handler: Optional[TaskHandler] = None,
+                 **orchestrator_options):
+        super().__init__(name)
+        self.handler = handler
+        self.orchestrator_options = orchestrator_options
+        self._process: Optional[multiprocessing.Process] = None
+        self._conn: Optional[multiprocessing.connection.Connection] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._call_ids = itertools.count()
+
+    async def start(self):
+        if self._process is not None:
+            return
+        # Spawn rather than fork: the parent has an event loop and threads
+        context = multiprocessing.get_context("spawn")
+        self._conn, child = context.Pipe()
+        self._process = context.Process(
+            target=_serve_shard, args=(child, self.handler, self.orchestrator_options),
+            name=f"nexusai-shard-{self.name}", daemon=True
+        )
+        self._process.start()
+        child.close()
+        threading.Thread(
+            target=self._receive, args=(asyncio.get_running_loop(),),
+            name=f"shard-{self.name}-reader", daemon=True
+        ).start()
+        await self._request("start")
+        logger.info(f"Started shard {self.name} in process {self._process.pid}")
+
+    async def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        conn = self._conn
+        try:
+            await self._request("shutdown", drain, timeout)
+            if conn is not None:
+                conn.send(None)
+        except (RuntimeError, OSError) as e:
+            logger.warning(f"Shard {self.name} did not shut down cleanly: {e}")
+        await asyncio.get_running_loop().run_in_executor(None, process.join, 5.0)
+        if process.is_alive():
+            process.terminate()
+        if conn is not None:
+            conn.close()
+        self._conn = None
+
+    async def call(self, method: str, *args) -> Any:
+        if method not in SHARD_METHODS:
+            raise ValueError(f"Unknown shard method: {method}")
+        return await self._request(method, *args)
+
+    async def _request(self, method: str, *args) -> Any:
+        if self._conn is None:
+            raise RuntimeError(f"Shard {self.name} is not running")
+        call_id = next(self._call_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        try:
+            self._conn.send((call_id, method, args))
+            return await future
+        finally:
+            self._pending.pop(call_id, None)
+
+    def _receive(self, loop: asyncio.AbstractEventLoop):
+        conn = self._conn
+        if conn is None:
+            return
+        while True:
+            try:
+                call_id, ok, value = conn.recv()
+            except (EOFError, OSError):
+                loop.call_soon_threadsafe(self._fail_pending)
+                return
+            loop.call_soon_threadsafe(self._resolve, call_id, ok, value)
+
+    def _resolve(self, call_id: int, ok: bool, value: Any):
+        future = self._pending.get(call_id)
+        if future is None or future.done():
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _fail_pending(self):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError(f"Shard {self.name} exited"))
+
+def _serve_shard(conn, handler: Optional[TaskHandler], options: Dict):
+    """Child process entry point for a ProcessShard"""
+    asyncio.run(_shard_loop(conn, handler, options))
+
+async def _shard_loop(conn, handler: Optional[TaskHandler], options: Dict):
+    orchestrator = AgentOrchestrator(**options)
+    if handler is not None:
+        orchestrator.set_task_handler(handler)
+    shard = LocalShard("child", orchestrator)
+    loop = asyncio.get_running_loop()
+    requests: asyncio.Queue = asyncio.Queue()
+
+    def receive():
+        while True:
+            try:
+                request = conn.recv()
+            except (EOFError, OSError):
+                request = None
+            loop.call_soon_threadsafe(requests.put_nowait, request)
+            if request is None:
+                return
+
+    async def serve(call_id: int, method: str, args: Tuple):
+        try:
+            if method == "start":
+                result = await shard.start()
+            elif method == "shutdown":
+                result = await shard.shutdown(*args)
+            else:
+                result = await shard.call(method, *args)
+            reply = (call_id, True, result)
+        except Exception as e:
+            reply = (call_id, False, e)
+        conn.send(reply)
+
+    threading.Thread(target=receive, name="shard-receiver", daemon=True).start()
+    running = set()
+    while True:
+        request = await requests.get()
+        if request is None:
+            break
+        task = asyncio.create_task(serve(*request))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    await orchestrator.shutdown(drain=False)
+    conn.close()
+
+class ShardedOrchestrator:
+    """Spreads agents and their tasks over shards by consistent hashing
+
+    Each agent lives on the shard its id hashes to, and every call about
+    an agent or its tasks goes to that shard alone, so shards share
+    nothing and throughput grows with their number. The state backend
+    records agent registrations and which shard each task went to, so
+    status lookups by task id are routed without asking every shard.
+    Batches are split per shard and submitted to all shards at once.
+    """
+
+    def __init__(self, shards: Iterable[Shard], state: Optional[StateBackend] = None,
+                 replicas: int = 128):
+        self.shards: Dict[str, Shard] = {}
+        self.ring = ConsistentHashRing(replicas=replicas)
+        self.state = state or InMemoryStateBackend()
+        for shard in shards:
+            self.shards[shard.name] = shard
+            self.ring.add_node(shard.name)
+
+    def shard_for_agent(self, agent_id: UUID) -> Shard:
+        return self.shards[self.ring.node_for(agent_id.bytes)]
+
+    async def start(self):
+        await asyncio.gather(*(shard.start() for shard in self.shards.values()))
+
+    async def shutdown(self, drain: bool = True, timeout: Optional[float] = None):
+        await asyncio.gather(*(shard.shutdown(drain, timeout) for shard in self.shards.values()))
+
+    async def add_shard(self, shard: Shard) -> int:
+        """Start a shard, put it on the ring and move its agents onto it
+
+        Only the agents whose ring position now falls on the new shard
+        move; they are registered there from the state backend. Tasks
+        already submitted stay on, and are still looked up on, their
+        original shard. Returns the number of agents moved.
+        """
+        if shard.name in self.shards:
+            raise ValueError(f"Shard {shard.name} already exists")
+        await shard.start()
+        self.shards[shard.name] = shard
+        self.ring.add_node(shard.name)
+        moved = 0
+        for agent_id, registration in self.state.iter_agents():
+            if self.ring.node_for(agent_id.bytes) == shard.name:
+                await self._register(shard, agent_id, registration)
+                moved += 1
+        logger.info(f"Added shard {shard.name}; moved {moved} agents to it")
+        return moved
+
+    async def restore_agents(self) -> int:
+        """Register every agent in the state backend on its shard
+
+        Run after start when the state backend outlives the shards, as a
+        SqliteStateBackend does across restarts. Returns the number of
+        agents restored.
+        """
+        agents = list(self.state.iter_agents())
+        await asyncio.gather(*(
+            self._register(self.shard_for_agent(agent_id), agent_id, registration)
+            for agent_id, registration in agents
+        ))
+        if agents:
+            logger.info(f"Restored {len(agents)} agents onto {len(self.shards)} shards")
+        return len(agents)
+
+    async def register_agent(self, name: str, capabilities: List[str],
+                             security_context: Dict, compliance_level: str) -> Agent:
+        """Register a new agent on the shard its id hashes to"""
+        agent_id = uuid4()
+        registration = {
+            "name": name,
+            "capabilities": list(capabilities),
+            "security_context": security_context,
+            "compliance_level": compliance_level
+        }
+        return await self._register(self.shard_for_agent(agent_id), agent_id, registration)
+
+    async def submit_task(self, agent_id: UUID, input_data: Dict,
+                          priority: Optional[str] = None,
+                          deadline: Optional[datetime] = None) -> Task:
+        shard = self.shard_for_agent(agent_id)
+        task = await shard.call("submit_task", agent_id, input_data, priority, deadline)
+        self.state.put_task_shards([(task.id, shard.name)])
+        return task
+
+    async def submit_tasks(self, items: Iterable[Tuple[UUID, Dict]],
+                           priority: Optional[str] = None,
+                           deadline: Optional[datetime] = None) -> List[Dict]:
+        """Submit a batch, one call per shard, returning results in order"""
+        batches: Dict[str, Tuple[List[int], List[Tuple[UUID, Dict]]]] = {}
+        # Agents repeat within a batch; hash each one once
+        owners: Dict[UUID, Tuple[List[int], List[Tuple[UUID, Dict]]]] = {}
+        count = 0
+        for count, item in enumerate(items, 1):
+            agent_id = item[0]
+            owner = owners.get(agent_id)
+            if owner is None:
+                owner = owners[agent_id] = batches.setdefault(
+                    self.ring.node_for(agent_id.bytes), ([], [])
+                )
+            owner[0].append(count - 1)
+            owner[1].append(item)
+        names = list(batches)
+        replies = await asyncio.gather(*(
+            self.shards[name].call("submit_tasks", batches[name][1], priority, deadline)
+            for name in names
+        ))
+        results: List[Optional[Dict]] = [None] * count
+        placements = []
+        for name, reply in zip(names, replies):
+            for position, result in zip(batches[name][0], reply):
+                results[position] = result
+                placements.append((result["task_id"], name))
+        self.state.put_task_shards(placements)
+        # Every position was filled by its shard's reply
+        return cast(List[Dict], results)
+
+    async def get_agent_status(self, agent_id: UUID) -> Dict:
+        return await self.shard_for_agent(agent_id).call("get_agent_status", agent_id)
+
+    async def get_task_status(self, task_id: UUID) -> Dict:
+        return await self._shard_for_task(task_id).call("get_task_status", task_id)
+
+    async def get_task_result(self, task_id: UUID, timeout: Optional[float] = None) -> Dict:
+        return await self._shard_for_task(task_id).call("get_task_result", task_id, timeout)
+
+    async def get_queue_stats(self) -> Dict:
+        """Total queue depth and backlog, with each shard's own stats"""
+        names = list(self.shards)
+        stats = await asyncio.gather(*(self.shards[name].call("get_queue_stats") for name in names))
+        return {
+            "depth": sum(s["depth"] for s in stats),
+            "backlog": sum(s["backlog"] for s in stats),
+            "shards": dict(zip(names, stats))
+        }
+
+    async def _register(self, shard: Shard, agent_id: UUID, registration: Dict) -> Agent:
+        agent = await shard.call(
+            "register_agent", registration["name"], registration["capabilities"],
+            registration["security_context"], registration["compliance_level"], agent_id
+        )
+        self.state.put_agent(agent_id, {**registration, "shard": shard.name})
+        return agent
+
+    def subscribe(self, agent_id: Optional[UUID] = None):
+        raise NotImplementedError("Task events are not available from sharded orchestrators")
+
+    def _shard_for_task(self, task_id: UUID) -> Shard:
+        name = self.state.get_task_shard(task_id)
+        if name is None or name not in self.shards:
+            raise ValueError(f"Task {task_id} not found")
+        return self.shards[name]
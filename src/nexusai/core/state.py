@@ -0,0 +1,138 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from uuid import UUID
+import json
+import sqlite3
+import threading
+
+class StateBackend(ABC):
+    """Shared state for sharded orchestration
+
+    Holds each agent's registration, so agents can be re-created on
+    another shard, and the shard each task was submitted to, so status
+    lookups by task id reach the owning shard. Task state itself stays on
+    the shards.
+    """
+
+    @abstractmethod
+    def put_agent(self, agent_id: UUID, registration: Dict):
+        """Store an agent's registration arguments and shard"""
+        pass
+
+    @abstractmethod
+    def get_agent(self, agent_id: UUID) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def iter_agents(self) -> Iterable[Tuple[UUID, Dict]]:
+        pass
+
+    @abstractmethod
+    def put_task_shards(self, placements: Iterable[Tuple[UUID, str]]):
+        """Record the shard for each (task_id, shard name) pair"""
+        pass
+
+    @abstractmethod
+    def get_task_shard(self, task_id: UUID) -> Optional[str]:
+        pass
+
+    def close(self):
+        """Release resources; the backend is not used again"""
+        pass
+
+class InMemoryStateBackend(StateBackend):
+    """State backend for a single router process, and for tests
+
+    The task index keeps the most recent max_tasks placements; lookups
+    for older tasks fail as they would once a shard archives them.
+    """
+
+    def __init__(self, max_tasks: int = 1_000_000):
+        self.max_tasks = max_tasks
+        self._agents: Dict[UUID, Dict] = {}
+        self._task_shards: "OrderedDict[UUID, str]" = OrderedDict()
+
+    def put_agent(self, agent_id: UUID, registration: Dict):
+        self._agents[agent_id] = registration
+
+    def get_agent(self, agent_id: UUID) -> Optional[Dict]:
+        return self._agents.get(agent_id)
+
+    def iter_agents(self) -> List[Tuple[UUID, Dict]]:
+        return list(self._agents.items())
+
+    def put_task_shards(self, placements: Iterable[Tuple[UUID, str]]):
+        task_shards = self._task_shards
+        task_shards.update(placements)
+        while len(task_shards) > self.max_tasks:
+            task_shards.popitem(last=False)
+
+    def get_task_shard(self, task_id: UUID) -> Optional[str]:
+        return self._task_shards.get(task_id)
+
+class SqliteStateBackend(StateBackend):
+    """State backend in a SQLite database file, kept across restarts
+
+    Agent registrations outlive the router and its shards, so a restarted
+    ShardedOrchestrator re-creates every agent with restore_agents. The
+    database runs in WAL mode, so readers do not block the writer. As in
+    memory, only the most recent max_tasks task placements are kept.
+    """
+
+    def __init__(self, path: str, max_tasks: int = 1_000_000):
+        self.path = path
+        self.max_tasks = max_tasks
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS agents (id BLOB PRIMARY KEY, registration TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS task_shards (task_id BLOB PRIMARY KEY, shard TEXT NOT NULL)"
+        )
+
+    def put_agent(self, agent_id: UUID, registration: Dict):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO agents VALUES (?, ?)",
+                (agent_id.bytes, json.dumps(registration, default=str))
+            )
+
+    def get_agent(self, agent_id: UUID) -> Optional[Dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT registration FROM agents WHERE id = ?", (agent_id.bytes,)
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def iter_agents(self) -> List[Tuple[UUID, Dict]]:
+        with self._lock:
+            rows = self._db.execute("SELECT id, registration FROM agents ORDER BY rowid").fetchall()
+        return [(UUID(bytes=agent_id), json.loads(registration)) for agent_id, registration in rows]
+
+    def put_task_shards(self, placements: Iterable[Tuple[UUID, str]]):
+        rows = [(task_id.bytes, shard) for task_id, shard in placements]
+        if not rows:
+            return
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO task_shards VALUES (?, ?)", rows)
+            # Rowids only grow, so everything this far behind the newest is oldest
+            self._db.execute(
+                "DELETE FROM task_shards WHERE rowid <= "
+                "(SELECT MAX(rowid) FROM task_shards) - ?", (self.max_tasks,)
+            )
+
+    def get_task_shard(self, task_id: UUID) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT shard FROM task_shards WHERE task_id = ?", (task_id.bytes,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
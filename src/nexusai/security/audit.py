@@ -0,0 +1,174 @@
+from typing import Deque, Dict, List, Optional
+from collections import deque
+import asyncio
+import logging
+import threading
+
+from ..storage.base import AuditRecord, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+class AuditPipeline:
+    """Bounded buffer of audit records flushed to storage in batches
+
+    Producers append to an in-memory ring of at most capacity records;
+    deque appends and pops are atomic, so the non-blocking policies take
+    no lock. A background thread drains the ring in batches of up to
+    batch_size, at least every flush_interval seconds, into the storage
+    backend (a SegmentLogBackend writes compact binary frames to rotating
+    segment files). When the ring is full the policy decides: drop the
+    new record, drop the oldest buffered one, or block the producer for
+    up to block_timeout seconds before dropping. Blocking producers check
+    for room and append under one lock. On a thread running an event
+    loop submit does not wait, since that would stall the loop; async
+    producers use asubmit, which waits in an executor thread instead.
+    """
+
+    def __init__(self, store: StorageBackend, capacity: int = 65536, batch_size: int = 1024,
+                 flush_interval: float = 0.5, policy: str = DROP_NEWEST,
+                 block_timeout: float = 1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown audit overflow policy: {policy}")
+        self.store = store
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._buffer: Deque[AuditRecord] = deque()
+        self._wake = threading.Event()
+        self._space = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._reported_drops = 0
+        self._writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._writer.start()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def submit(self, record: AuditRecord) -> bool:
+        """Buffer a record; returns False if it was dropped"""
+        if self.policy == BLOCK:
+            return self._block(record, 0.0 if _in_event_loop() else self.block_timeout)
+        buffer = self._buffer
+        if len(buffer) >= self.capacity and not self._make_room():
+            self.dropped += 1
+            return False
+        buffer.append(record)
+        self.submitted += 1
+        if len(buffer) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    async def asubmit(self, record: AuditRecord) -> bool:
+        """Like submit, but waits for room without blocking the event loop"""
+        if self.policy != BLOCK:
+            return self.submit(record)
+        if self._offer(record, 0.0):
+            return True
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._block, record, self.block_timeout)
+
+    def flush(self):
+        """Write every buffered record and make it durable"""
+        self._drain()
+        self.store.flush()
+
+    def close(self):
+        """Stop the writer after flushing what is buffered"""
+        self._stopping = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+
+    def get_stats(self) -> Dict:
+        return {
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "policy": self.policy,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches
+        }
+
+    def _make_room(self) -> bool:
+        if self.policy == DROP_OLDEST:
+            try:
+                self._buffer.popleft()
+                self.dropped += 1
+            except IndexError:
+                pass
+            return True
+        return False
+
+    def _block(self, record: AuditRecord, timeout: float) -> bool:
+        if self._offer(record, timeout):
+            return True
+        self.dropped += 1
+        return False
+
+    def _offer(self, record: AuditRecord, timeout: float) -> bool:
+        # Only producers add to the buffer, so holding the lock from the
+        # capacity check to the append keeps it within capacity
+        buffer = self._buffer
+        with self._space:
+            if len(buffer) >= self.capacity:
+                self._wake.set()
+                if not self._space.wait_for(lambda: len(buffer) < self.capacity, timeout):
+                    return False
+            buffer.append(record)
+            self.submitted += 1
+        if len(buffer) >= self.batch_size:
+            self._wake.set()
+        return True
+
+    def _drain(self):
+        buffer = self._buffer
+        with self._flush_lock:
+            while buffer:
+                batch: List[AuditRecord] = []
+                try:
+                    for _ in range(min(self.batch_size, len(buffer))):
+                        batch.append(buffer.popleft())
+                except IndexError:
+                    pass
+                if not batch:
+                    break
+                try:
+                    self.store.append_audit(batch)
+                    self.written += len(batch)
+                    self.batches += 1
+                except Exception as e:
+                    self.dropped += len(batch)
+                    logger.error(f"Failed to write {len(batch)} audit records: {e}")
+                if self.policy == BLOCK:
+                    with self._space:
+                        self._space.notify_all()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+            if self.dropped != self._reported_drops:
+                # One warning per flush interval, however many were dropped
+                logger.warning(f"Dropped {self.dropped - self._reported_drops} audit records")
+                self._reported_drops = self.dropped
@@ -0,0 +1,178 @@
+from typing import Dict, Iterable, Iterator, List, Union
+from functools import lru_cache
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import base64
+import json
+import os
+import struct
+
+ALGORITHM = "AES-256-GCM"
+NONCE_SIZE = 12
+TAG_SIZE = 16
+KEY_INFO = b"nexusai-data-encryption-v1"
+STREAM_KEY_INFO = b"nexusai-stream-encryption-v1"
+
+# Streams: a header of a random 32-byte salt and a random 7-byte nonce
+# prefix, then frames of a 4-byte ciphertext length and the ciphertext.
+# Each stream is sealed under its own key, HKDF-SHA256 of the encryption
+# key with the stream's salt (the AES-GCM-HKDF streaming construction), so
+# nonces only need to be unique within a stream. Each chunk's nonce is
+# prefix + 4-byte counter + a final-chunk flag byte (the STREAM
+# construction), so reordering, truncation or extension fails to
+# authenticate.
+STREAM_SALT_SIZE = 32
+STREAM_PREFIX_SIZE = 7
+STREAM_HEADER_SIZE = STREAM_SALT_SIZE + STREAM_PREFIX_SIZE
+FRAME_LENGTH = struct.Struct(">I")
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+@lru_cache(maxsize=128)
+def cipher_for(encryption_key: str) -> AESGCM:
+    """AES-GCM cipher keyed by HKDF-SHA256 of encryption_key, cached per key"""
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=KEY_INFO).derive(
+        encryption_key.encode()
+    )
+    return AESGCM(key)
+
+def stream_cipher_for(encryption_key: str, salt: bytes) -> AESGCM:
+    """AES-GCM cipher for one stream, keyed by HKDF-SHA256 of encryption_key and the stream salt"""
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=STREAM_KEY_INFO).derive(
+        encryption_key.encode()
+    )
+    return AESGCM(key)
+
+def encrypt_bytes(data: Buffer, encryption_key: str) -> bytes:
+    """Encrypt to nonce + ciphertext + tag; data may be any bytes-like object"""
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + cipher_for(encryption_key).encrypt(nonce, data, None)
+
+def decrypt_bytes(token: Buffer, encryption_key: str) -> bytes:
+    view = memoryview(token)
+    try:
+        return cipher_for(encryption_key).decrypt(view[:NONCE_SIZE], view[NONCE_SIZE:], None)
+    except InvalidTag:
+        raise ValueError("Decryption failed: data was tampered with or the key is wrong")
+
+def encrypt_record(record: Dict, encryption_key: str) -> bytes:
+    return encrypt_bytes(_serialize(record), encryption_key)
+
+def decrypt_record(token: Buffer, encryption_key: str) -> Dict:
+    return json.loads(decrypt_bytes(token, encryption_key))
+
+def encrypt_records(records: List[Dict], encryption_key: str) -> bytes:
+    """Encrypt a list of records as one token
+
+    One serialization and one AEAD call cover the whole list, which is
+    several times cheaper than a token per record.
+    """
+    return encrypt_bytes(_serialize(records), encryption_key)
+
+def decrypt_records(token: Buffer, encryption_key: str) -> List[Dict]:
+    return json.loads(decrypt_bytes(token, encryption_key))
+
+def encrypt_stream(chunks: Iterable[Buffer], encryption_key: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encrypt a byte stream in chunk_size pieces, yielding output as it goes
+
+    Input chunks of any size are re-cut to chunk_size. Whole pieces are
+    encrypted straight from a memoryview of the input, and only partial
+    pieces are buffered, so memory use stays around one chunk however
+    long the stream is. The stream always ends with a final chunk, which
+    may be empty.
+    """
+    salt = os.urandom(STREAM_SALT_SIZE)
+    cipher = stream_cipher_for(encryption_key, salt)
+    prefix = os.urandom(STREAM_PREFIX_SIZE)
+    yield salt + prefix
+    pending = bytearray()
+    counter = 0
+    for chunk in chunks:
+        with memoryview(chunk) as base, base.cast("B") as view:
+            offset = 0
+            if pending:
+                offset = min(chunk_size - len(pending), len(view))
+                pending += view[:offset]
+                if len(pending) == chunk_size:
+                    yield _seal(cipher, prefix, counter, pending, False)
+                    counter += 1
+                    pending.clear()
+            while len(view) - offset >= chunk_size:
+                yield _seal(cipher, prefix, counter, view[offset:offset + chunk_size], False)
+                counter += 1
+                offset += chunk_size
+            pending += view[offset:]
+    yield _seal(cipher, prefix, counter, pending, True)
+
+def decrypt_stream(chunks: Iterable[Buffer], encryption_key: str) -> Iterator[bytes]:
+    """Decrypt a stream from encrypt_stream, split into pieces of any size
+
+    Frames are decrypted in place from each input piece; only a frame
+    split across pieces is copied. Raises ValueError on tampering or if
+    the stream ends before its final chunk; plaintext yielded before the
+    error must be discarded.
+    """
+    cipher = None
+    pending = b""
+    prefix = b""
+    counter = 0
+    finished = False
+    for chunk in chunks:
+        data = pending + chunk if pending else chunk
+        with memoryview(data) as base, base.cast("B") as view:
+            offset = 0
+            if cipher is None:
+                if len(view) < STREAM_HEADER_SIZE:
+                    pending = bytes(view)
+                    continue
+                cipher = stream_cipher_for(encryption_key, bytes(view[:STREAM_SALT_SIZE]))
+                prefix = bytes(view[STREAM_SALT_SIZE:STREAM_HEADER_SIZE])
+                offset = STREAM_HEADER_SIZE
+            while len(view) - offset >= FRAME_LENGTH.size:
+                if finished:
+                    raise ValueError("Data found after the final chunk")
+                (length,) = FRAME_LENGTH.unpack_from(view, offset)
+                end = offset + FRAME_LENGTH.size + length
+                if len(view) < end:
+                    break
+                plain, finished = _open_chunk(cipher, prefix, counter, view[offset + FRAME_LENGTH.size:end])
+                counter += 1
+                offset = end
+                yield plain
+            pending = bytes(view[offset:])
+    if not finished or pending:
+        raise ValueError("Encrypted stream is truncated")
+
+def to_envelope(token: bytes) -> Dict:
+    """JSON-safe wrapper for an encrypted token"""
+    return {"encrypted": True, "algorithm": ALGORITHM, "data": base64.b64encode(token).decode()}
+
+def from_envelope(envelope: Dict) -> bytes:
+    if not envelope.get("encrypted"):
+        raise ValueError("Data is not encrypted")
+    if envelope.get("algorithm") != ALGORITHM:
+        raise ValueError(f"Unsupported encryption algorithm: {envelope.get('algorithm')}")
+    return base64.b64decode(envelope["data"])
+
+def _serialize(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+def _seal(cipher: AESGCM, prefix: bytes, counter: int, data: Buffer, final: bool) -> bytes:
+    sealed = cipher.encrypt(_chunk_nonce(prefix, counter, final), data, None)
+    return FRAME_LENGTH.pack(len(sealed)) + sealed
+
+def _chunk_nonce(prefix: bytes, counter: int, final: bool) -> bytes:
+    return prefix + counter.to_bytes(4, "big") + (b"\x01" if final else b"\x00")
+
+def _open_chunk(cipher: AESGCM, prefix: bytes, counter: int, sealed: memoryview):
+    # The final flag is not stored; try the common case first
+    for final in (False, True):
+        try:
+            return cipher.decrypt(_chunk_nonce(prefix, counter, final), sealed, None), final
+        except InvalidTag:
+            continue
+    raise ValueError("Decryption failed: stream was tampered with or the key is wrong")
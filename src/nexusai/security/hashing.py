@@ -0,0 +1,135 @@
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+import asyncio
+import logging
+import time
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT = "[passlib]\nschemes = bcrypt\ndeprecated = auto\n"
+
+@lru_cache(maxsize=8)
+def _context(config: str) -> "CryptContext":
+    # One context per configuration per process, built on first use; passlib
+    # is imported here too, so importing this module stays cheap
+    from passlib.context import CryptContext
+    return CryptContext.from_string(config)
+
+def _hash(config: str, password: str) -> str:
+    return _context(config).hash(password)
+
+def _verify(config: str, password: str, hashed: str) -> bool:
+    return _context(config).verify(password, hashed)
+
+class PasswordHasher:
+    """Runs password hashing off the event loop on a bounded pool
+
+    At most max_workers hashes run at once and at most max_queued more
+    wait for a slot; further calls fail fast with RuntimeError instead of
+    piling up, so a login storm sheds load rather than stalling the API.
+    Calls that wait longer than queue_timeout seconds also fail. The
+    passlib context is described by its ini config and built lazily in
+    whichever thread or process does the work; use_processes suits
+    schemes whose implementation holds the GIL.
+    """
+
+    def __init__(self, config: str = DEFAULT_CONTEXT, max_workers: int = 4,
+                 max_queued: int = 64, queue_timeout: Optional[float] = 10.0,
+                 use_processes: bool = False):
+        self.config = config
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self._stats = {
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "max_queued_seen": 0
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    @property
+    def context(self) -> "CryptContext":
+        """The passlib context, for synchronous use in this process"""
+        return _context(self.config)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, self.config, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit(_verify, self.config, password, hashed)
+
+    def get_stats(self) -> Dict:
+        """Occupancy and latency counters"""
+        started = self._stats["completed"] + self._stats["failed"]
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            **self._stats,
+            "wait_mean": self._wait_total / started if started else 0.0,
+            "wait_max": self._wait_max,
+            "run_mean": self._run_total / started if started else 0.0
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, func: Callable, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self.in_flight + self.queued >= self.max_workers + self.max_queued:
+            self._stats["rejected"] += 1
+            raise RuntimeError("Password hashing queue is full")
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self._stats["max_queued_seen"] = max(self._stats["max_queued_seen"], self.queued)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise RuntimeError(f"Timed out after {self.queue_timeout}s waiting to hash")
+        finally:
+            self.queued -= 1
+        started = time.perf_counter()
+        waited = started - queued_at
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self.in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+            self._stats["completed"] += 1
+            return result
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            self._run_total += time.perf_counter() - started
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+            logger.info(f"Started password hashing pool with {self.max_workers} workers")
+        return self._executor
@@ -0,0 +1,144 @@
+from typing import Callable, Deque, Dict, Optional, Tuple
+from collections import deque
+from contextlib import contextmanager
+import time
+import tracemalloc
+
+class TokenBucket:
+    """Token-bucket rate limiter; every operation is O(1)
+
+    Tokens refill continuously at rate per second up to capacity, so
+    capacity is the largest burst allowed after a quiet period.
+    """
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "_clock")
+
+    def __init__(self, rate: float, capacity: float,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("Rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self.updated_at = clock()
+
+    def try_acquire(self, cost: float = 1.0) -> bool:
+        """Take cost tokens if available, without waiting"""
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def delay(self, cost: float = 1.0) -> float:
+        """Seconds until cost tokens will be available (0 if they are now)"""
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+# Allocations made by tracemalloc itself are not the tracked block's
+_SNAPSHOT_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+class ResourceAccountant:
+    """CPU and memory accounting for work run on behalf of one agent
+
+    CPU time is the calling thread's CPU clock across each tracked block,
+    summed in one-second buckets over a sliding window of window_seconds
+    and reported as a percentage of one core. Memory is the tracemalloc
+    growth retained by a tracked block, the difference between snapshots
+    taken around it, sampled on one block in memory_sample_rate since
+    snapshots are costly. It is only measured while tracemalloc is
+    tracing; trace_memory starts it. A measurement counts for
+    window_seconds, like CPU time, so work refused for using too much
+    memory is allowed again once it has aged out.
+    """
+
+    def __init__(self, window_seconds: float = 60.0, memory_sample_rate: int = 10,
+                 clock: Callable[[], float] = time.monotonic,
+                 cpu_clock: Callable[[], float] = time.thread_time):
+        self.window_seconds = window_seconds
+        self.memory_sample_rate = max(1, memory_sample_rate)
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+        # (second, cpu seconds used in it), oldest first
+        self._samples: Deque[Tuple[int, float]] = deque()
+        self._window_cpu = 0.0
+        self.total_cpu = 0.0
+        self.calls = 0
+        self.peak_memory = 0
+        self.last_memory = 0
+        self._memory_measured_at = 0.0
+
+    @staticmethod
+    def trace_memory():
+        """Start tracemalloc (process-wide) if it is not already tracing"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def track(self):
+        """Account the CPU (and sampled memory) used inside the block"""
+        self.calls += 1
+        baseline = None
+        if self.calls % self.memory_sample_rate == 0 and tracemalloc.is_tracing():
+            # A snapshot per block, rather than the process-wide peak, so
+            # blocks tracked concurrently do not reset each other's counts
+            baseline = _snapshot()
+        cpu_start = self._cpu_clock()
+        try:
+            yield self
+        finally:
+            used = self._cpu_clock() - cpu_start
+            self.total_cpu += used
+            self._window_cpu += used
+            second = int(self._clock())
+            if self._samples and self._samples[-1][0] == second:
+                self._samples[-1] = (second, self._samples[-1][1] + used)
+            else:
+                self._samples.append((second, used))
+                self._expire()
+            if baseline is not None and tracemalloc.is_tracing():
+                growth = sum(stat.size_diff for stat in _snapshot().compare_to(baseline, "filename"))
+                self.last_memory = max(0, growth)
+                self._memory_measured_at = self._clock()
+                self.peak_memory = max(self.peak_memory, self.last_memory)
+
+    def cpu_percent(self) -> float:
+        """CPU used over the sliding window, as a percentage of one core"""
+        self._expire()
+        return max(0.0, self._window_cpu) / self.window_seconds * 100
+
+    def memory_used(self) -> int:
+        """Bytes retained by the last sampled block, 0 once it is out of the window"""
+        if self._clock() - self._memory_measured_at > self.window_seconds:
+            return 0
+        return self.last_memory
+
+    def _expire(self):
+        cutoff = self._clock() - self.window_seconds
+        samples = self._samples
+        while samples and samples[0][0] < cutoff:
+            self._window_cpu -= samples.popleft()[1]
+
+    def get_usage(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "cpu_seconds": self.total_cpu,
+            "cpu_percent": self.cpu_percent(),
+            "last_memory_mb": self.memory_used() / (1024 * 1024),
+            "peak_memory_mb": self.peak_memory / (1024 * 1024)
+        }
+
+def rate_limiter(calls_per_minute: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> TokenBucket:
+    """Token bucket allowing calls_per_minute, with bursts of up to burst calls"""
+    return TokenBucket(calls_per_minute / 60.0, burst or calls_per_minute, clock)
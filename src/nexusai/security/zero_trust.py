@@ -1,21 +1,92 @@
-from typing import Dict, Optional
-from datetime import datetime, timedelta
-from uuid import UUID
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+import asyncio
+import hashlib
 import logging
+import secrets
+import time
+
+from ..storage.base import AuditRecord, StorageBackend
+from . import encryption
+from .audit import AuditPipeline
+from .hashing import PasswordHasher
+from .limits import ResourceAccountant, TokenBucket, rate_limiter
 
 logger = logging.getLogger(__name__)
 
+_UTC_EPOCH = datetime(1970, 1, 1)
+
+def _epoch(timestamp: datetime) -> float:
+    # Naive timestamps are UTC; subtracting is cheaper than attaching a tzinfo
+    if timestamp.tzinfo is None:
+        return (timestamp - _UTC_EPOCH).total_seconds()
+    return timestamp.timestamp()
+
 class SecurityContext:
-    """Manages security context for zero-trust architecture"""
+    """Manages security context for zero-trust architecture
     
-    def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    Signing keys are held by key id. New tokens are signed with the active
+    key and carry its kid header; tokens signed with any key still in
+    keys keep verifying until that key is retired. Verified payloads are
+    cached by token digest until the token's exp (or at most
+    token_cache_ttl seconds), so repeat requests skip signature checks.
+    Password hashing runs on the bounded pool of password_hasher.
+    """
+    
+    def __init__(self, token_cache_size: int = 10000, token_cache_ttl: float = 300.0,
+                 password_hasher: Optional[PasswordHasher] = None):
+        self.password_hasher = password_hasher or PasswordHasher()
         # In production, these would be loaded from secure environment variables
         self.SECRET_KEY = "your-secret-key"
         self.ALGORITHM = "HS256"
         self.ACCESS_TOKEN_EXPIRE_MINUTES = 30
+        self.keys: Dict[str, str] = {"default": self.SECRET_KEY}
+        self.active_kid = "default"
+        self.token_cache_size = token_cache_size
+        self.token_cache_ttl = token_cache_ttl
+        # token digest -> (payload, kid, expires_at)
+        self._token_cache: "OrderedDict[bytes, Tuple[Dict, str, float]]" = OrderedDict()
+        self.token_cache_hits = 0
+        self.token_cache_misses = 0
+        
+    @property
+    def pwd_context(self):
+        """The bcrypt CryptContext, created on first use"""
+        return self.password_hasher.context
+        
+    async def hash_password(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self.password_hasher.hash(password)
+        
+    async def verify_password(self, password: str, hashed: str) -> bool:
+        """Check a password against its hash without blocking the event loop"""
+        return await self.password_hasher.verify(password, hashed)
+        
+    def add_key(self, kid: str, secret: str, activate: bool = False):
+        """Add a signing key, optionally making it the one new tokens use"""
+        self.keys[kid] = secret
+        if activate:
+            self.active_kid = kid
+            
+    def rotate_key(self, secret: Optional[str] = None) -> str:
+        """Activate a new signing key and return its kid; older keys still verify"""
+        kid = uuid4().hex
+        self.add_key(kid, secret or secrets.token_urlsafe(32), activate=True)
+        logger.info(f"Rotated signing key to {kid}")
+        return kid
+        
+    def retire_key(self, kid: str):
+        """Stop accepting tokens signed with a key"""
+        if kid == self.active_kid:
+            raise ValueError("Cannot retire the active signing key")
+        if kid not in self.keys:
+            raise ValueError(f"Key {kid} not found")
+        del self.keys[kid]
+        for digest in [d for d, (_, key_id, _) in self._token_cache.items() if key_id == kid]:
+            del self._token_cache[digest]
+        logger.info(f"Retired signing key {kid}")
         
     def create_access_token(self, data: Dict, expires_delta: Optional[timedelta] = None) -> str:
         """Create a JWT access token"""
@@ -25,26 +96,105 @@ class SecurityContext:
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        from jose import jwt
+        encoded_jwt = jwt.encode(
+            to_encode, self.keys[self.active_kid], algorithm=self.ALGORITHM,
+            headers={"kid": self.active_kid}
+        )
         return encoded_jwt
 
     def verify_token(self, token: str) -> Dict:
         """Verify a JWT token"""
+        digest = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        entry = self._token_cache.get(digest)
+        if entry is not None:
+            payload, _, expires_at = entry
+            if expires_at > now:
+                self._token_cache.move_to_end(digest)
+                self.token_cache_hits += 1
+                return dict(payload)
+            # Expired entries fall through so decoding reports the expiry
+            del self._token_cache[digest]
+        self.token_cache_misses += 1
+        # python-jose loads its crypto backends on import; defer it to first use
+        from jose import JWTError, jwt
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            return payload
+            kid, payload = self._decode(token)
         except JWTError as e:
             logger.error(f"Token verification failed: {e}")
             raise ValueError("Could not validate credentials")
+        if self.token_cache_size > 0:
+            expires_at = now + self.token_cache_ttl
+            if isinstance(payload.get("exp"), (int, float)):
+                expires_at = min(expires_at, payload["exp"])
+            self._token_cache[digest] = (payload, kid, expires_at)
+            if len(self._token_cache) > self.token_cache_size:
+                self._token_cache.popitem(last=False)
+        return dict(payload)
+        
+    def _decode(self, token: str) -> Tuple[str, Dict]:
+        """Check a token's signature and claims; returns the verifying kid and payload"""
+        from jose import ExpiredSignatureError, JWTError, jwt
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is not None:
+            # The header is unverified input; only a known string names a key
+            if not isinstance(kid, str) or kid not in self.keys:
+                raise JWTError(f"Unknown key id {kid!r}")
+            return kid, jwt.decode(token, self.keys[kid], algorithms=[self.ALGORITHM])
+        # Tokens issued without a kid are tried against the active key first,
+        # then the other keys still held, so they survive a rotation
+        error: Optional[JWTError] = None
+        for key_id in [self.active_kid] + [k for k in self.keys if k != self.active_kid]:
+            try:
+                return key_id, jwt.decode(token, self.keys[key_id], algorithms=[self.ALGORITHM])
+            except ExpiredSignatureError:
+                raise
+            except JWTError as e:
+                error = e
+        raise error or JWTError("No signing keys")
+        
+    def get_token_cache_stats(self) -> Dict:
+        """Verification cache counters"""
+        lookups = self.token_cache_hits + self.token_cache_misses
+        return {
+            "size": len(self._token_cache),
+            "maxsize": self.token_cache_size,
+            "hits": self.token_cache_hits,
+            "misses": self.token_cache_misses,
+            "hit_rate": self.token_cache_hits / lookups if lookups else 0.0
+        }
 
 class AgentSandbox:
-    """Provides isolated execution environment for agents"""
+    """Provides isolated execution environment for agents
+    
+    With an audit pipeline, entries are batched to its storage backend in
+    the background; with only a storage backend they are written there
+    directly. Otherwise the last audit_log_size entries are kept in the
+    in-memory audit_log.
+    
+    Resource limits are enforced by verify_operation: calls are rate
+    limited by token buckets (sandbox-wide network_calls_per_minute and
+    optional per-operation limits), and refused while CPU or sampled
+    memory use of work run under track(), over the accountant's window,
+    is over its limit. Setting a memory limit starts tracemalloc, which
+    memory accounting needs.
+    """
     
-    def __init__(self, agent_id: UUID):
+    def __init__(self, agent_id: UUID, store: Optional[StorageBackend] = None,
+                 audit: Optional[AuditPipeline] = None, audit_log_size: int = 10000):
         self.agent_id = agent_id
         self.allowed_operations = set()
         self.resource_limits = {}
-        self.audit_log = []
+        self.audit_log = deque(maxlen=audit_log_size)
+        self.audit = audit
+        self.store = audit.store if audit is not None else store
+        self.accountant = ResourceAccountant()
+        self.rejections = {"not_allowed": 0, "rate_limited": 0, "cpu": 0, "memory": 0}
+        self._call_limit: Optional[TokenBucket] = None
+        self._operation_limits: Dict[str, TokenBucket] = {}
+        self._memory_limit = 0
+        self._cpu_limit = 0.0
         
     def add_allowed_operation(self, operation: str):
         """Add an allowed operation to the sandbox"""
@@ -58,42 +208,154 @@ class AgentSandbox:
             "memory_mb": memory_mb,
             "network_calls_per_minute": network_calls_per_minute
         }
+        self._cpu_limit = cpu_percent
+        self._memory_limit = memory_mb * 1024 * 1024
+        if self._memory_limit:
+            self.accountant.trace_memory()
+        self._call_limit = rate_limiter(network_calls_per_minute) if network_calls_per_minute > 0 else None
+        
+    def set_rate_limit(self, operation: str, calls_per_minute: float, burst: Optional[float] = None):
+        """Limit one operation on top of the sandbox-wide call rate"""
+        self._operation_limits[operation] = rate_limiter(calls_per_minute, burst)
         
     def verify_operation(self, operation: str) -> bool:
         """Verify if an operation is allowed in the sandbox"""
-        return operation in self.allowed_operations
+        if operation not in self.allowed_operations:
+            self.rejections["not_allowed"] += 1
+            return False
+        if self._cpu_limit and self.accountant.cpu_percent() > self._cpu_limit:
+            self.rejections["cpu"] += 1
+            return False
+        if self._memory_limit and self.accountant.memory_used() > self._memory_limit:
+            self.rejections["memory"] += 1
+            return False
+        bucket = self._operation_limits.get(operation)
+        if bucket is not None and not bucket.try_acquire():
+            self.rejections["rate_limited"] += 1
+            return False
+        if self._call_limit is not None and not self._call_limit.try_acquire():
+            if bucket is not None:
+                # Give back the operation's token; the call is not made
+                bucket.tokens += 1
+            self.rejections["rate_limited"] += 1
+            return False
+        return True
+        
+    async def throttle(self, operation: str, max_wait: float = 1.0) -> bool:
+        """Like verify_operation, but wait up to max_wait seconds for rate limits"""
+        buckets = [b for b in (self._operation_limits.get(operation), self._call_limit) if b is not None]
+        wait = max((bucket.delay() for bucket in buckets), default=0.0)
+        if 0 < wait <= max_wait:
+            await asyncio.sleep(wait)
+        return self.verify_operation(operation)
+        
+    def track(self):
+        """Context manager accounting CPU and memory used for this agent"""
+        return self.accountant.track()
+        
+    def get_usage(self) -> Dict:
+        """Resource use against limits, and rejection counts"""
+        return {**self.accountant.get_usage(), "limits": self.resource_limits,
+                "rejections": dict(self.rejections)}
         
     def log_operation(self, operation: str, timestamp: datetime, 
                      success: bool, details: Dict):
         """Log an operation for audit purposes"""
-        log_entry = {
-            "agent_id": self.agent_id,
-            "operation": operation,
-            "timestamp": timestamp,
-            "success": success,
-            "details": details
-        }
-        self.audit_log.append(log_entry)
-        logger.info(f"Logged operation: {operation} for agent {self.agent_id}")
+        if self.store is not None:
+            record = AuditRecord(self.agent_id, operation, _epoch(timestamp), success, details)
+            if self.audit is not None:
+                self.audit.submit(record)
+            else:
+                self.store.append_audit([record])
+        else:
+            log_entry = {
+                "agent_id": self.agent_id,
+                "operation": operation,
+                "timestamp": timestamp,
+                "success": success,
+                "details": details
+            }
+            self.audit_log.append(log_entry)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Logged operation: {operation} for agent {self.agent_id}")
+        
+    def iter_audit_log(self) -> Iterator[Dict]:
+        """Iterate over this sandbox's audit entries, oldest first"""
+        if self.store is None:
+            yield from self.audit_log
+            return
+        if self.audit is not None:
+            self.audit.flush()
+        for record in self.store.iter_audit(self.agent_id):
+            yield {
+                "agent_id": record.agent_id,
+                "operation": record.operation,
+                "timestamp": datetime.fromtimestamp(record.timestamp, timezone.utc),
+                "success": record.success,
+                "details": record.details
+            }
+
+class SandboxManager:
+    """Keeps one sandbox per agent so limits and accounting persist across calls"""
+    
+    def __init__(self, store: Optional[StorageBackend] = None,
+                 default_operations: Iterable[str] = (),
+                 default_limits: Optional[Dict] = None,
+                 audit: Optional[AuditPipeline] = None):
+        self.store = store
+        self.audit = audit
+        self.default_operations = tuple(default_operations)
+        self.default_limits = default_limits
+        self.sandboxes: Dict[UUID, AgentSandbox] = {}
+        
+    def get_sandbox(self, agent_id: UUID) -> AgentSandbox:
+        """Return the agent's sandbox, creating it with the defaults on first use"""
+        sandbox = self.sandboxes.get(agent_id)
+        if sandbox is None:
+            sandbox = AgentSandbox(agent_id, self.store, self.audit)
+            for operation in self.default_operations:
+                sandbox.add_allowed_operation(operation)
+            if self.default_limits:
+                sandbox.set_resource_limits(**self.default_limits)
+            self.sandboxes[agent_id] = sandbox
+        return sandbox
+        
+    def remove_sandbox(self, agent_id: UUID):
+        self.sandboxes.pop(agent_id, None)
 
 class DataEncryption:
-    """Handles data encryption for sensitive information"""
+    """Handles data encryption for sensitive information
+    
+    AES-256-GCM with a key derived from encryption_key by HKDF-SHA256; the
+    derived cipher is cached per key. See security.encryption for the
+    token and stream formats.
+    """
     
     @staticmethod
     def encrypt_data(data: Dict, encryption_key: str) -> Dict:
         """Encrypt sensitive data"""
-        # In a real implementation, this would use proper encryption
-        # For now, we'll just mark it as encrypted
-        return {
-            "encrypted": True,
-            "data": str(data)  # In reality, this would be encrypted
-        }
+        return encryption.to_envelope(encryption.encrypt_record(data, encryption_key))
         
     @staticmethod
     def decrypt_data(encrypted_data: Dict, encryption_key: str) -> Dict:
         """Decrypt sensitive data"""
-        # In a real implementation, this would use proper decryption
-        if not encrypted_data.get("encrypted"):
-            raise ValueError("Data is not encrypted")
-        # In reality, this would be decrypted
-        return {"decrypted": True, "data": encrypted_data["data"]}
+        return encryption.decrypt_record(encryption.from_envelope(encrypted_data), encryption_key)
+        
+    @staticmethod
+    def encrypt_records(records: List[Dict], encryption_key: str) -> bytes:
+        """Encrypt a list of records, e.g. a connector result chunk, as one token"""
+        return encryption.encrypt_records(records, encryption_key)
+        
+    @staticmethod
+    def decrypt_records(token: bytes, encryption_key: str) -> List[Dict]:
+        return encryption.decrypt_records(token, encryption_key)
+        
+    @staticmethod
+    def encrypt_stream(chunks: Iterable[bytes], encryption_key: str,
+                       chunk_size: int = encryption.DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Encrypt a large payload chunk by chunk"""
+        return encryption.encrypt_stream(chunks, encryption_key, chunk_size)
+        
+    @staticmethod
+    def decrypt_stream(chunks: Iterable[bytes], encryption_key: str) -> Iterator[bytes]:
+        return encryption.decrypt_stream(chunks, encryption_key)
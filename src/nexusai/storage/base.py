@@ -0,0 +1,69 @@
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional
+from abc import ABC, abstractmethod
+from uuid import UUID
+
+class StoredViolation(NamedTuple):
+    """A violation as persisted; timestamp is seconds since the epoch (UTC)"""
+    seq: int
+    rule_id: UUID
+    agent_id: UUID
+    timestamp: float
+    details: Dict
+    status: str = "OPEN"
+    resolution: Optional[str] = None
+
+class AuditRecord(NamedTuple):
+    """An audit log entry as persisted; timestamp is seconds since the epoch (UTC)"""
+    agent_id: UUID
+    operation: str
+    timestamp: float
+    success: bool
+    details: Dict
+
+class StorageBackend(ABC):
+    """Base class for durable violation and audit storage"""
+    
+    @abstractmethod
+    def append_violations(self, violations: Iterable[StoredViolation]):
+        """Persist newly created violations"""
+        pass
+        
+    @abstractmethod
+    def update_violation(self, seq: int, status: str, resolution: Optional[str]):
+        """Persist a violation status change"""
+        pass
+        
+    @abstractmethod
+    def iter_violations(self) -> Iterator[StoredViolation]:
+        """Yield every stored violation with its latest status, oldest first"""
+        pass
+        
+    @abstractmethod
+    def append_audit(self, records: Iterable[AuditRecord]):
+        """Persist audit log entries"""
+        pass
+        
+    @abstractmethod
+    def iter_audit(self, agent_id: Optional[UUID] = None) -> Iterator[AuditRecord]:
+        """Yield stored audit entries, oldest first, optionally for one agent"""
+        pass
+        
+    @abstractmethod
+    def compact(self, resolved_before: Optional[float] = None) -> int:
+        """Drop resolved violations (older than resolved_before, if given)"""
+        pass
+        
+    @abstractmethod
+    def last_seq(self) -> int:
+        """Highest violation seq ever appended, including compacted violations"""
+        pass
+        
+    @abstractmethod
+    def flush(self):
+        """Make all appended records durable"""
+        pass
+        
+    @abstractmethod
+    def close(self):
+        """Flush and release resources"""
+        pass
@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+from uuid import UUID
+import json
+import logging
+import struct
+
+from .base import AuditRecord, StorageBackend, StoredViolation
+from .segment_log import SegmentLog
+
+logger = logging.getLogger(__name__)
+
+VIOLATION_RECORD = 1
+STATUS_RECORD = 2
+AUDIT_RECORD = 3
+SEQUENCE_RECORD = 4
+
+STATUS_CODES = {"OPEN": 0, "RESOLVED": 1, "IGNORED": 2}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# seq, rule_id, agent_id, timestamp; followed by details as compact JSON
+VIOLATION_HEADER = struct.Struct("<Q16s16sd")
+# seq, status code; followed by the UTF-8 resolution (empty for None)
+STATUS_HEADER = struct.Struct("<QBB")
+# agent_id, timestamp, success, operation length; followed by operation and details
+AUDIT_HEADER = struct.Struct("<16sd?H")
+# Highest violation seq ever appended; outlives the violations compaction drops
+SEQUENCE = struct.Struct("<Q")
+
+def _dump_json(value: Dict) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+def encode_violation(v: StoredViolation) -> bytes:
+    return VIOLATION_HEADER.pack(v.seq, v.rule_id.bytes, v.agent_id.bytes, v.timestamp) \
+        + _dump_json(v.details)
+
+def decode_violation(payload: bytes) -> StoredViolation:
+    seq, rule_id, agent_id, timestamp = VIOLATION_HEADER.unpack_from(payload)
+    details = json.loads(payload[VIOLATION_HEADER.size:])
+    return StoredViolation(seq, UUID(bytes=rule_id), UUID(bytes=agent_id), timestamp, details)
+
+def encode_status(seq: int, status: str, resolution: Optional[str]) -> bytes:
+    return STATUS_HEADER.pack(seq, STATUS_CODES[status], resolution is not None) \
+        + (resolution or "").encode()
+
+def decode_status(payload: bytes) -> Tuple[int, str, Optional[str]]:
+    seq, code, has_resolution = STATUS_HEADER.unpack_from(payload)
+    resolution = payload[STATUS_HEADER.size:].decode() if has_resolution else None
+    return seq, STATUS_NAMES[code], resolution
+
+def encode_audit(record: AuditRecord) -> bytes:
+    operation = record.operation.encode()
+    return AUDIT_HEADER.pack(record.agent_id.bytes, record.timestamp, record.success,
+                             len(operation)) + operation + _dump_json(record.details)
+
+def decode_audit(payload: bytes) -> AuditRecord:
+    agent_id, timestamp, success, op_length = AUDIT_HEADER.unpack_from(payload)
+    start = AUDIT_HEADER.size
+    operation = payload[start:start + op_length].decode()
+    details = json.loads(payload[start + op_length:])
+    return AuditRecord(UUID(bytes=agent_id), operation, timestamp, success, details)
+
+class SegmentLogBackend(StorageBackend):
+    """Storage backend on an append-only segmented log of binary records
+    
+    Violations, status changes and audit entries are appended as compact
+    struct-packed records; the latest status of a violation is found by
+    replaying its status records. Reads stream from the log, so history
+    does not have to be held in memory.
+    """
+    
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 sync_every: int = 256):
+        self.log = SegmentLog(directory, segment_bytes=segment_bytes, sync_every=sync_every)
+        
+    def append_violations(self, violations: Iterable[StoredViolation]):
+        self.log.append_many((VIOLATION_RECORD, encode_violation(v)) for v in violations)
+        
+    def update_violation(self, seq: int, status: str, resolution: Optional[str]):
+        self.log.append(STATUS_RECORD, encode_status(seq, status, resolution))
+        
+    def iter_violations(self) -> Iterator[StoredViolation]:
+        statuses = self._latest_statuses()
+        for _, payload in self.log.scan((VIOLATION_RECORD,)):
+            violation = decode_violation(payload)
+            status = statuses.get(violation.seq)
+            if status is not None:
+                violation = violation._replace(status=status[0], resolution=status[1])
+            yield violation
+            
+    def append_audit(self, records: Iterable[AuditRecord]):
+        self.log.append_many((AUDIT_RECORD, encode_audit(r)) for r in records)
+        
+    def iter_audit(self, agent_id: Optional[UUID] = None) -> Iterator[AuditRecord]:
+        agent_bytes = agent_id.bytes if agent_id is not None else None
+        for _, payload in self.log.scan((AUDIT_RECORD,)):
+            # Compare the raw agent id before decoding the rest of the record
+            if agent_bytes is not None and payload[:16] != agent_bytes:
+                continue
+            yield decode_audit(payload)
+            
+    def compact(self, resolved_before: Optional[float] = None) -> int:
+        statuses = self._latest_statuses()
+        dropped: Set[int] = set()
+        live: Set[int] = set()
+        high_water = 0
+        for record_type, payload in self.log.scan((VIOLATION_RECORD, SEQUENCE_RECORD)):
+            if record_type == SEQUENCE_RECORD:
+                high_water = max(high_water, SEQUENCE.unpack(payload)[0])
+                continue
+            seq, _, _, timestamp = VIOLATION_HEADER.unpack_from(payload)
+            high_water = max(high_water, seq)
+            status = statuses.get(seq)
+            if status is not None and status[0] == "RESOLVED" and \
+               (resolved_before is None or timestamp < resolved_before):
+                dropped.add(seq)
+            else:
+                live.add(seq)
+        if not dropped:
+            return 0
+        # Recorded before anything is dropped, so seqs are never handed out twice
+        self.log.append(SEQUENCE_RECORD, SEQUENCE.pack(high_water))
+            
+        def keep(record_type: int, payload: bytes) -> bool:
+            seq = struct.unpack_from("<Q", payload)[0]
+            if record_type == VIOLATION_RECORD:
+                return seq not in dropped
+            if record_type == STATUS_RECORD:
+                # Also drops statuses left over from earlier compactions
+                return seq in live
+            if record_type == SEQUENCE_RECORD:
+                return seq >= high_water
+            return True
+            
+        return self.log.compact(keep)
+        
+    def last_seq(self) -> int:
+        last = 0
+        for record_type, payload in self.log.scan((VIOLATION_RECORD, SEQUENCE_RECORD)):
+            last = max(last, struct.unpack_from("<Q", payload)[0])
+        return last
+        
+    def flush(self):
+        self.log.sync()
+        
+    def close(self):
+        self.log.close()
+        
+    def _latest_statuses(self) -> Dict[int, Tuple[str, Optional[str]]]:
+        statuses = {}
+        for _, payload in self.log.scan((STATUS_RECORD,)):
+            seq, status, resolution = decode_status(payload)
+            statuses[seq] = (status, resolution)
+        return statuses
@@ -0,0 +1,187 @@
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Frame header: payload length, CRC32 of type byte + payload, record type
+FRAME_HEADER = struct.Struct("<IIB")
+SEGMENT_SUFFIX = ".seg"
+
+class SegmentLog:
+    """Append-only log of typed binary records split across segment files
+
+    Records are framed with a length and CRC so a torn write at the tail
+    of the active segment is detected and truncated on open. The active
+    segment is rotated once it reaches segment_bytes; sealed segments are
+    immutable except through compact(). Writes are buffered and fsynced
+    every sync_every records (0 leaves syncing to explicit sync() calls),
+    trading a bounded window of unsynced records for throughput.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024,
+                 sync_every: int = 256):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.sync_every = sync_every
+        self._lock = threading.RLock()
+        self._unsynced = 0
+        os.makedirs(directory, exist_ok=True)
+        self._segments = self._list_segments()
+        if not self._segments:
+            self._segments.append(0)
+        self._active_size = self._recover(self._path(self._segments[-1]))
+        self._file = open(self._path(self._segments[-1]), "ab")
+
+    @property
+    def segments(self) -> List[str]:
+        """Paths of all segment files, oldest first"""
+        return [self._path(segment_id) for segment_id in self._segments]
+
+    def append(self, record_type: int, payload: bytes):
+        """Append one record"""
+        self.append_many(((record_type, payload),))
+
+    def append_many(self, records: Iterable[Tuple[int, bytes]]):
+        """Append several records with one lock acquisition"""
+        with self._lock:
+            for record_type, payload in records:
+                crc = zlib.crc32(payload, zlib.crc32(bytes((record_type,))))
+                self._file.write(FRAME_HEADER.pack(len(payload), crc, record_type))
+                self._file.write(payload)
+                self._active_size += FRAME_HEADER.size + len(payload)
+                self._unsynced += 1
+                if self._active_size >= self.segment_bytes:
+                    self._rotate()
+            if self.sync_every and self._unsynced >= self.sync_every:
+                self.sync()
+
+    def sync(self):
+        """Flush buffered records and fsync the active segment"""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def scan(self, record_types: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, bytes]]:
+        """Yield (record_type, payload) for every record, oldest first
+
+        Segments are read through mmap, so a scan pages data in on demand
+        rather than loading whole segments into memory.
+        """
+        wanted = frozenset(record_types) if record_types is not None else None
+        with self._lock:
+            self._file.flush()
+            segments = list(self._segments)
+        for segment_id in segments:
+            yield from self._scan_segment(self._path(segment_id), wanted)
+
+    def compact(self, keep: Callable[[int, bytes], bool]) -> int:
+        """Rewrite sealed segments keeping only records where keep() is true
+
+        The active segment is left alone. Returns the number of records
+        dropped.
+        """
+        dropped = 0
+        with self._lock:
+            sealed = self._segments[:-1]
+        for segment_id in sealed:
+            path = self._path(segment_id)
+            kept = []
+            for record_type, payload in self._scan_segment(path):
+                if keep(record_type, payload):
+                    kept.append((record_type, payload))
+                else:
+                    dropped += 1
+            if not kept:
+                with self._lock:
+                    self._segments.remove(segment_id)
+                os.remove(path)
+                continue
+            tmp_path = path + ".compact"
+            with open(tmp_path, "wb") as f:
+                for record_type, payload in kept:
+                    crc = zlib.crc32(payload, zlib.crc32(bytes((record_type,))))
+                    f.write(FRAME_HEADER.pack(len(payload), crc, record_type))
+                    f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        if dropped:
+            logger.info(f"Compacted {dropped} records from {self.directory}")
+        return dropped
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self.sync()
+                self._file.close()
+
+    def _rotate(self):
+        self.sync()
+        self._file.close()
+        self._segments.append(self._segments[-1] + 1)
+        self._file = open(self._path(self._segments[-1]), "ab")
+        self._active_size = 0
+
+    def _path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{segment_id:010d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        return sorted(
+            int(name[:-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()
+        )
+
+    def _recover(self, path: str) -> int:
+        """Truncate a torn tail off the active segment and return its size"""
+        if not os.path.exists(path):
+            return 0
+        valid = 0
+        for _, end in self._frames(path):
+            valid = end
+        if valid != os.path.getsize(path):
+            logger.warning(f"Truncating torn records at offset {valid} in {path}")
+            with open(path, "r+b") as f:
+                f.truncate(valid)
+        return valid
+
+    def _scan_segment(self, path: str,
+                      wanted: Optional[frozenset] = None) -> Iterator[Tuple[int, bytes]]:
+        for frame, _ in self._frames(path, wanted):
+            yield frame
+
+    @staticmethod
+    def _frames(path: str, wanted: Optional[frozenset] = None
+                ) -> Iterator[Tuple[Tuple[int, bytes], int]]:
+        """Yield ((record_type, payload), end_offset) for each intact frame
+
+        Frames whose type is not in wanted are skipped without being
+        copied out of the mapping or checksummed.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offset = 0
+                header_size = FRAME_HEADER.size
+                while offset + header_size <= size:
+                    length, crc, record_type = FRAME_HEADER.unpack_from(mm, offset)
+                    start = offset + header_size
+                    end = start + length
+                    if end > size:
+                        break
+                    if wanted is not None and record_type not in wanted:
+                        offset = end
+                        continue
+                    payload = mm[start:end]
+                    if zlib.crc32(payload, zlib.crc32(bytes((record_type,)))) != crc:
+                        break
+                    yield (record_type, payload), end
+                    offset = end
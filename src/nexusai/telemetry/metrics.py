@@ -0,0 +1,130 @@
+from typing import Iterator, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, GCCollector, Histogram,
+    ProcessCollector, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, SummaryMetricFamily
+from prometheus_client.registry import Collector
+
+# Everything NexusAI exports lives in its own registry, so /metrics is not
+# affected by whatever else registers with the prometheus_client default
+REGISTRY = CollectorRegistry()
+ProcessCollector(registry=REGISTRY)
+GCCollector(registry=REGISTRY)
+
+# Latencies run from sub-millisecond cache hits to multi-second calls
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+REQUEST_LATENCY = Histogram(
+    "nexusai_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+TASK_DURATION = Histogram(
+    "nexusai_task_duration_seconds",
+    "Task handler run time, from dequeue to completion",
+    ["status"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+# Labels are bounded sets; per-rule counts are in /compliance/summary, since
+# rules are created at runtime and a rule id label would grow without bound
+COMPLIANCE_CHECKS = Counter(
+    "nexusai_compliance_checks",
+    "Actions evaluated against the compliance rules, by outcome",
+    ["outcome"], registry=REGISTRY
+)
+COMPLIANCE_VIOLATIONS = Counter(
+    "nexusai_compliance_violations",
+    "Violations raised, by rule level and violation type",
+    ["level", "violation_type"], registry=REGISTRY
+)
+CONNECTOR_LATENCY = Histogram(
+    "nexusai_connector_call_duration_seconds",
+    "Connector calls that reach the source, by connector and operation",
+    ["connector", "operation"], buckets=LATENCY_BUCKETS, registry=REGISTRY
+)
+
+class PlatformCollector(Collector):
+    """Exports counters the components already keep, read at scrape time
+
+    Queue depth and wait times, compliance decision cache counters and
+    connector pool occupancy are maintained by the components themselves,
+    so exporting them adds nothing to the hot path.
+    """
+
+    def __init__(self, orchestrator=None, compliance_monitor=None, connector_registry=None):
+        self.orchestrator = orchestrator
+        self.compliance_monitor = compliance_monitor
+        self.connector_registry = connector_registry
+
+    def collect(self) -> Iterator:
+        if self.orchestrator is not None:
+            yield from self._collect_queue()
+        if self.compliance_monitor is not None:
+            yield from self._collect_compliance()
+        if self.connector_registry is not None:
+            yield from self._collect_connectors()
+
+    def _collect_queue(self) -> Iterator:
+        stats = self.orchestrator.get_queue_stats()
+        yield GaugeMetricFamily("nexusai_task_queue_depth", "Tasks waiting in the queue", stats["depth"])
+        yield GaugeMetricFamily(
+            "nexusai_task_backlog", "Tasks queued or deferred and not yet started", stats["backlog"]
+        )
+        wait = SummaryMetricFamily(
+            "nexusai_task_queue_wait_seconds", "Time tasks spent queued", labels=["priority"]
+        )
+        window = GaugeMetricFamily(
+            "nexusai_task_queue_wait_window_seconds",
+            "Queue wait percentiles over the recent window", labels=["priority", "quantile"]
+        )
+        for priority, summary in stats["wait_seconds"].items():
+            wait.add_metric([priority], summary["count"], summary["mean"] * summary["count"])
+            for quantile in ("p50", "p95", "p99"):
+                window.add_metric([priority, f"0.{quantile[1:]}"], summary[quantile])
+        yield wait
+        yield window
+
+    def _collect_compliance(self) -> Iterator:
+        stats = self.compliance_monitor.get_cache_stats()
+        decisions = CounterMetricFamily(
+            "nexusai_compliance_decisions", "Compliance decisions by source", labels=["source"]
+        )
+        decisions.add_metric(["cache"], stats["hits"])
+        decisions.add_metric(["evaluated"], stats["misses"])
+        yield decisions
+        yield GaugeMetricFamily(
+            "nexusai_compliance_rules", "Active compliance rules",
+            len(self.compliance_monitor.rules)
+        )
+
+    def _collect_connectors(self) -> Iterator:
+        connections = GaugeMetricFamily(
+            "nexusai_connector_pool_connections", "Pooled connections by state",
+            labels=["connector", "state"]
+        )
+        waiting = GaugeMetricFamily(
+            "nexusai_connector_pool_waiting", "Callers waiting for a pooled connection",
+            labels=["connector"]
+        )
+        for connector in list(self.connector_registry.connectors.values()):
+            name = connector.config.name
+            stats = connector.get_pool_stats()
+            connections.add_metric([name, "idle"], stats["idle"])
+            connections.add_metric([name, "in_use"], stats["in_use"])
+            waiting.add_metric([name], stats["waiting"])
+        yield connections
+        yield waiting
+
+def register(collector: Collector) -> Collector:
+    REGISTRY.register(collector)
+    return collector
+
+def unregister(collector: Optional[Collector]):
+    if collector is not None:
+        REGISTRY.unregister(collector)
+
+def render() -> Tuple[bytes, str]:
+    """The registry in Prometheus text format, with its content type"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,68 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+from starlette.routing import Match
+import time
+
+from . import metrics, tracing
+
+UNMATCHED = "<unmatched>"
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template
+
+    Requests are labelled with the route's path template rather than the
+    raw path, so label cardinality stays bounded by the number of routes;
+    requests that match no route share one label. Streaming responses are
+    timed until their last chunk is sent. A plain ASGI middleware is used
+    because the BaseHTTPMiddleware wrapper costs far more per request.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        # Histogram children by (method, route, status); labels() locks
+        self._histograms: Dict[Tuple[str, str, int], Any] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        with tracing.span("http.request") as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = _route_template(scope)
+                key = (scope["method"], route, status)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = metrics.REQUEST_LATENCY.labels(
+                        key[0], route, str(status)
+                    )
+                histogram.observe(time.perf_counter() - start)
+                if span is not None:
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.request.method", scope["method"])
+                    span.set_attribute("http.route", route)
+                    span.set_attribute("http.response.status_code", status)
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        # Older Starlette does not record the matched route in the scope
+        route = _match_route(scope)
+    return getattr(route, "path", None) or UNMATCHED
+
+def _match_route(scope) -> Optional[object]:
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
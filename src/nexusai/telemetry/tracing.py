@@ -0,0 +1,46 @@
+from typing import ContextManager, Optional
+from contextlib import nullcontext
+import os
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover - tracing is optional
+    trace = None  # type: ignore[assignment]
+
+TRACER_NAME = "nexusai"
+
+_NO_SPAN = nullcontext()
+_tracer = None
+
+def enable_tracing(tracer_provider=None) -> bool:
+    """Emit OpenTelemetry spans; returns False if OpenTelemetry is not installed
+
+    Spans go to tracer_provider, or to the globally configured provider
+    (for example one set up by opentelemetry-instrument).
+    """
+    global _tracer
+    if trace is None:
+        return False
+    _tracer = trace.get_tracer(TRACER_NAME, tracer_provider=tracer_provider)
+    return True
+
+def disable_tracing():
+    global _tracer
+    _tracer = None
+
+def tracing_enabled() -> bool:
+    return _tracer is not None
+
+def span(name: str) -> ContextManager[Optional["trace.Span"]]:
+    """A span around the block, yielding None when tracing is off
+
+    With tracing off this returns a shared no-op context manager, so
+    instrumented code pays one function call. Callers set attributes only
+    when a span is yielded, keeping attribute formatting off the fast path.
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(name)
+
+if os.getenv("NEXUSAI_TRACING", "").lower() in ("1", "true", "yes"):
+    enable_tracing()
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import pytest
+import threading
+from uuid import UUID, uuid4
+from fastapi.testclient import TestClient
+from src.nexusai.api.components import Components, build_connector_registry, build_orchestrator
+from src.nexusai.api.main import create_app
+from src.nexusai.compliance.monitor import ComplianceLevel, ComplianceMonitor
+from src.nexusai.connectors.base import ConnectorRegistry
+from src.nexusai.core.orchestrator import AgentOrchestrator
+from src.nexusai.core.sharding import LocalShard, ProcessShard, ShardedOrchestrator
+from src.nexusai.core.state import SqliteStateBackend
+
+def test_app_lifespan_runs_task_workers():
+    orchestrator = AgentOrchestrator()
+    orchestrator.set_task_handler(lambda data: {"echo": data})
+    components = Components(orchestrator=orchestrator)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/agents/register",
+            params={"name": "test_agent", "compliance_level": "LOW"},
+            json={"capabilities": ["text_processing"], "security_context": {"role": "test"}},
+            headers=headers
+        )
+        agent_id = response.json()["agent_id"]
+        response = client.post(
+            "/tasks/submit", params={"agent_id": agent_id},
+            json={"text": "hello"}, headers=headers
+        )
+        task_id = response.json()["task_id"]
+        result = client.get(f"/tasks/{task_id}/result", params={"timeout": 5}, headers=headers)
+
+    assert result.json()["status"] == "COMPLETED"
+    assert result.json()["output_data"] == {"echo": {"text": "hello"}}
+    assert not orchestrator._workers
+    assert not components.built("connector_registry")
+
+def test_components_are_built_on_first_use():
+    components = Components()
+    app = create_app(components)
+    assert not any(components.built(name) for name in (
+        "orchestrator", "security_context", "compliance_monitor", "connector_registry"
+    ))
+
+    with TestClient(app) as client:
+        assert components.built("orchestrator")
+        missing = client.get("/tasks/queue/stats")
+        response = client.get("/tasks/queue/stats", headers={"Authorization": "Bearer invalid"})
+
+    assert missing.status_code == 401
+    assert missing.headers["www-authenticate"] == "Bearer"
+    assert response.status_code == 401
+    assert components.built("security_context")
+    assert not components.built("compliance_monitor")
+
+def test_app_routes_tasks_through_sharded_orchestrator():
+    shards = [LocalShard(f"shard-{i}") for i in range(2)]
+    for shard in shards:
+        shard.orchestrator.set_task_handler(lambda data: {"echo": data})
+    components = Components(orchestrator=ShardedOrchestrator(shards))
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        agent_ids = [client.post(
+            "/agents/register",
+            params={"name": f"agent-{i}", "compliance_level": "LOW"},
+            json={"capabilities": ["text_processing"], "security_context": {"role": "test"}},
+            headers=headers
+        ).json()["agent_id"] for i in range(4)]
+        response = client.post("/tasks/submit:batch", json=[
+            {"agent_id": agent_id, "input_data": {"n": i}} for i, agent_id in enumerate(agent_ids)
+        ], headers=headers)
+        results = [client.get(f"/tasks/{r['task_id']}/result", params={"timeout": 5},
+                              headers=headers).json() for r in response.json()["results"]]
+        stats = client.get("/tasks/queue/stats", headers=headers).json()
+        events = client.get("/tasks/events", headers=headers)
+
+    assert [r["output_data"] for r in results] == [{"echo": {"n": i}} for i in range(4)]
+    assert set(stats["shards"]) == {"shard-0", "shard-1"}
+    assert events.status_code == 501
+
+def test_build_orchestrator_from_environment(monkeypatch, tmp_path):
+    assert isinstance(build_orchestrator(), AgentOrchestrator)
+    monkeypatch.setenv("NEXUSAI_SHARDS", "3")
+    monkeypatch.setenv("NEXUSAI_STATE_DB", str(tmp_path / "state.db"))
+
+    orchestrator = build_orchestrator()
+
+    assert isinstance(orchestrator, ShardedOrchestrator)
+    assert all(isinstance(shard, ProcessShard) for shard in orchestrator.shards.values())
+    assert len(orchestrator.shards) == 3
+    assert isinstance(orchestrator.state, SqliteStateBackend)
+    orchestrator.state.close()
+
+def test_query_cache_is_opt_in(monkeypatch):
+    components = Components()
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+
+    with TestClient(app) as client:
+        response = client.get("/connectors/cache/stats", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 404
+    monkeypatch.setenv("NEXUSAI_QUERY_CACHE_TTL", "2.5")
+    assert build_connector_registry().cache.ttl == 2.5
+
+def test_shutdown_drains_tasks_before_closing_connectors():
+    registry = ConnectorRegistry()
+    connector = registry.get_connector(registry.register_connector("db", "database", {}, {}))
+    orchestrator = AgentOrchestrator()
+
+    async def handler(input_data):
+        await asyncio.sleep(0.05)
+        return await connector.fetch_data({"table": "t"})
+
+    orchestrator.set_task_handler(handler)
+    components = Components(orchestrator=orchestrator, connector_registry=registry)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        agent_id = client.post(
+            "/agents/register",
+            params={"name": "test_agent", "compliance_level": "LOW"},
+            json={"capabilities": [], "security_context": {}},
+            headers=headers
+        ).json()["agent_id"]
+        task_id = client.post("/tasks/submit", params={"agent_id": agent_id},
+                              json={}, headers=headers).json()["task_id"]
+
+    task = orchestrator.archive.get(UUID(task_id))
+    assert task.status == "COMPLETED", task.error
+    assert connector.get_pool_stats()["size"] == 0
+
+def test_violations_endpoint_lists_active_violations_in_pages():
+    monitor = ComplianceMonitor()
+    rule = monitor.add_rule(name="no_delete", description="", level=ComplianceLevel.HIGH,
+                            parameters={"restricted_operations": ["delete"]})
+    agent_id = uuid4()
+    resolved = monitor.check_compliance(agent_id, {"operation": "delete"})[0]
+    monitor.resolve_violation(resolved.id, "approved")
+    monitor.check_compliance_batch((agent_id, {"operation": "delete"}) for _ in range(150))
+    components = Components(compliance_monitor=monitor)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        first = client.get("/compliance/violations", headers=headers).json()
+        rest = client.get("/compliance/violations", params={"cursor": first["next_cursor"]},
+                          headers=headers).json()
+        closed = client.get("/compliance/violations", params={"status": "RESOLVED"},
+                            headers=headers).json()
+        too_many = client.get("/compliance/violations", params={"limit": 1001}, headers=headers)
+
+    assert len(first["violations"]) == 100 and first["next_cursor"] is not None
+    assert len(rest["violations"]) == 50 and rest["next_cursor"] is None
+    listed = first["violations"] + rest["violations"]
+    assert all(v["status"] == "OPEN" and v["rule_id"] == str(rule.id) for v in listed)
+    assert [v["id"] for v in closed["violations"]] == [str(resolved.id)]
+    assert too_many.status_code == 422
+
+def test_compliance_check_batch_endpoint():
+    monitor = ComplianceMonitor()
+    rule = monitor.add_rule(name="no_delete", description="", level=ComplianceLevel.HIGH,
+                            parameters={"restricted_operations": ["delete"]})
+    components = Components(compliance_monitor=monitor)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+    agent_id = str(uuid4())
+    items = [{"agent_id": agent_id, "action": {"operation": operation}}
+             for operation in ("read", "delete", "write", "delete")]
+
+    with TestClient(app) as client:
+        missing = client.post("/compliance/check:batch", json=items)
+        response = client.post("/compliance/check:batch", json=items, headers=headers)
+        invalid = client.post("/compliance/check:batch", json=[{"agent_id": "nope"}],
+                              headers=headers)
+
+    assert missing.status_code == 401
+    body = response.json()
+    assert (body["checked"], body["violation_count"]) == (4, 2)
+    assert body["violations"]["item_index"] == [1, 3]
+    assert body["violations"]["rule_id"] == [str(rule.id)] * 2
+    assert body["violations"]["violation_type"] == ["restricted_operation"] * 2
+    assert invalid.status_code == 422
+
+def test_task_result_endpoint_waits_up_to_timeout():
+    release = threading.Event()
+    orchestrator = AgentOrchestrator()
+
+    async def handler(input_data):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        return {"done": input_data["n"]}
+
+    orchestrator.set_task_handler(handler)
+    components = Components(orchestrator=orchestrator)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        agent_id = client.post(
+            "/agents/register",
+            params={"name": "test_agent", "compliance_level": "LOW"},
+            json={"capabilities": [], "security_context": {}},
+            headers=headers
+        ).json()["agent_id"]
+        task_id = client.post("/tasks/submit", params={"agent_id": agent_id},
+                              json={"n": 1}, headers=headers).json()["task_id"]
+        path = f"/tasks/{task_id}/result"
+        missing = client.get(path, params={"timeout": 0})
+        pending = client.get(path, params={"timeout": 0.05}, headers=headers).json()
+        too_long = client.get(path, params={"timeout": 61}, headers=headers)
+        unknown = client.get(f"/tasks/{uuid4()}/result", params={"timeout": 0}, headers=headers)
+        release.set()
+        finished = client.get(path, params={"timeout": 5}, headers=headers).json()
+
+    assert missing.status_code == 401
+    assert pending["status"] in ("PENDING", "PROCESSING") and pending["output_data"] is None
+    assert too_long.status_code == 422
+    assert unknown.status_code == 404
+    assert finished["status"] == "COMPLETED" and finished["output_data"] == {"done": 1}
+
+async def read_events(app, query: bytes, token: str, until: str) -> str:
+    """Read a server-sent event stream until it contains until, then disconnect"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/tasks/events", "raw_path": b"/tasks/events", "root_path": "",
+        "query_string": query, "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"authorization", f"Bearer {token}".encode())]
+    }
+    disconnected = asyncio.Event()
+    body = []
+    received = asyncio.Event()
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b"").decode())
+            received.set()
+
+    request = asyncio.ensure_future(app(scope, receive, send))
+    try:
+        while until not in "".join(body):
+            received.clear()
+            await asyncio.wait_for(received.wait(), 5)
+    finally:
+        disconnected.set()
+        await asyncio.wait_for(request, 5)
+    return "".join(body)
+
+@pytest.mark.asyncio
+async def test_task_events_endpoint_streams_transitions():
+    orchestrator = AgentOrchestrator()
+    orchestrator.set_task_handler(lambda data: data)
+    components = Components(orchestrator=orchestrator)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    agent = await orchestrator.register_agent(
+        name="test_agent", capabilities=[], security_context={}, compliance_level="LOW"
+    )
+    other = await orchestrator.register_agent(
+        name="other", capabilities=[], security_context={}, compliance_level="LOW"
+    )
+    await components.start()
+    try:
+        reading = asyncio.ensure_future(
+            read_events(app, f"agent_id={agent.id}".encode(), token, "COMPLETED")
+        )
+        await asyncio.sleep(0.05)
+        await orchestrator.submit_task(agent_id=other.id, input_data={})
+        task = await orchestrator.submit_task(agent_id=agent.id, input_data={})
+        stream = await reading
+    finally:
+        await components.stop(timeout=5)
+
+    events = [json.loads(line[len("data: "):]) for line in stream.splitlines()
+              if line.startswith("data: ")]
+    assert [e["status"] for e in events] == ["PENDING", "PROCESSING", "COMPLETED"]
+    assert {e["task_id"] for e in events} == {str(task.id)}
+    assert not orchestrator._subscribers
+
+    with TestClient(app) as client:
+        missing = client.get("/tasks/events")
+        invalid = client.get("/tasks/events", params={"agent_id": "nope"},
+                             headers={"Authorization": f"Bearer {token}"})
+    assert missing.status_code == 401
+    assert invalid.status_code == 422
+
+def test_task_submit_batch_endpoint():
+    orchestrator = AgentOrchestrator()
+    orchestrator.set_task_handler(lambda data: {"echo": data})
+    monitor = ComplianceMonitor()
+    rule = monitor.add_rule(name="large", description="", level=ComplianceLevel.HIGH,
+                            parameters={"condition": {"field": "data.n", "gt": 1}})
+    components = Components(orchestrator=orchestrator, compliance_monitor=monitor)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        agent_id = client.post(
+            "/agents/register",
+            params={"name": "test_agent", "compliance_level": "LOW"},
+            json={"capabilities": [], "security_context": {}},
+            headers=headers
+        ).json()["agent_id"]
+        batch = [{"agent_id": agent_id, "input_data": {"n": 0}},
+                 {"agent_id": agent_id, "input_data": {"n": 2}},
+                 {"agent_id": str(uuid4()), "input_data": {"n": 1}}]
+        missing = client.post("/tasks/submit:batch", json=batch)
+        response = client.post("/tasks/submit:batch", json=batch, params={"priority": "HIGH"},
+                               headers=headers).json()
+        result = client.get(f"/tasks/{response['results'][0]['task_id']}/result",
+                            params={"timeout": 5}, headers=headers).json()
+        invalid = client.post("/tasks/submit:batch", json=[{"agent_id": agent_id}], headers=headers)
+
+    assert missing.status_code == 401
+    accepted, flagged, unknown = response["results"]
+    assert response["submitted"] == 1
+    assert accepted["status"] == "PENDING" and accepted["error"] is None
+    assert flagged["status"] == "rejected"
+    assert [monitor.violations[UUID(v)].rule_id for v in flagged["violation_ids"]] == [rule.id]
+    assert unknown["status"] == "REJECTED" and "not found" in unknown["error"]
+    assert result["output_data"] == {"echo": {"n": 0}}
+    assert orchestrator.archive.get(UUID(accepted["task_id"])).priority == "HIGH"
+    assert invalid.status_code == 422
+
+def test_rejected_task_response_and_log_do_not_echo_secrets(caplog):
+    monitor = ComplianceMonitor()
+    monitor.add_rule(name="sensitive", description="", level=ComplianceLevel.CRITICAL,
+                     parameters={"data_sensitivity": "restricted"})
+    components = Components(compliance_monitor=monitor)
+    app = create_app(components)
+    token = components.security_context.create_access_token({"sub": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with TestClient(app) as client:
+        response = client.post("/tasks/submit", params={"agent_id": str(uuid4())},
+                               json={"password": "hunter2"}, headers=headers)
+        listed = client.get("/compliance/violations", headers=headers)
+
+    assert response.json()["status"] == "rejected"
+    details = response.json()["violations"][0]["details"]
+    assert details["action"]["payload_findings"] == [{"path": "password", "kind": "sensitive_field"}]
+    assert "hunter2" not in response.text + listed.text + caplog.text
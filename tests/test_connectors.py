@@ -0,0 +1,271 @@
+import pytest
+import asyncio
+from uuid import uuid4
+from aiohttp import web
+from src.nexusai.connectors.base import ConnectorRegistry, DatabaseConnector
+from src.nexusai.connectors.cache import QueryResultCache
+from src.nexusai.connectors.pool import ConnectionPool
+
+class FakeBackend:
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.healthy = True
+
+    async def create(self):
+        self.opened += 1
+        return {"id": self.opened}
+
+    async def close(self, connection):
+        self.closed += 1
+
+    async def check(self, connection):
+        return self.healthy
+
+class TableConnector(DatabaseConnector):
+    """Database connector over an in-memory table that records page reads"""
+
+    def __init__(self, config, rows=0, cache=None):
+        super().__init__(config, cache)
+        self.rows = [{"n": i} for i in range(rows)]
+        self.pages_read = 0
+        self.written = []
+
+    async def _execute_query(self, connection, query):
+        self.pages_read += 1
+        return self.rows[query["offset"]:query["offset"] + query["limit"]]
+
+    async def _execute_write(self, connection, data):
+        self.written.extend(data)
+        return True
+
+def add_table(registry, name, rows=0):
+    connector_id = registry.register_connector(name, "database", {}, {})
+    registry.connectors[connector_id] = TableConnector(
+        registry.connectors[connector_id].config, rows, registry.cache
+    )
+    return connector_id
+
+@pytest.mark.asyncio
+async def test_pool_shares_connections_up_to_max_size():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend.create, backend.close, max_size=3, max_idle=None)
+
+    async def use():
+        async with pool.connection():
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(use() for _ in range(30)))
+
+    stats = pool.get_stats()
+    assert backend.opened == 3
+    assert stats["acquired"] == 30
+    assert stats["idle"] == 3 and stats["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_pool_acquire_times_out_when_exhausted():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend.create, backend.close, max_size=1, acquire_timeout=0.01)
+    held = await pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        await pool.acquire()
+    assert pool.get_stats()["timeouts"] == 1
+
+    await pool.release(held)
+    assert await pool.acquire() is held
+
+@pytest.mark.asyncio
+async def test_pool_evicts_idle_and_replaces_unhealthy_connections():
+    backend = FakeBackend()
+    pool = ConnectionPool(backend.create, backend.close, backend.check,
+                          min_size=1, max_size=4, max_idle=0.01, check_interval=0)
+    connections = [await pool.acquire() for _ in range(3)]
+    for connection in connections:
+        await pool.release(connection)
+    await asyncio.sleep(0.02)
+
+    assert await pool.evict_idle() == 2
+    assert pool.size == 1
+
+    pool.max_idle = None
+    backend.healthy = False
+    replacement = await pool.acquire()
+    assert replacement["id"] == 4
+    assert pool.get_stats()["failed_checks"] == 1
+
+@pytest.mark.asyncio
+async def test_database_connector_keeps_connection_warm():
+    registry = ConnectorRegistry()
+    connector_id = registry.register_connector("db", "database", {}, {"pool_max_size": 2})
+    connector = registry.get_connector(connector_id)
+
+    assert await registry.test_connector(connector_id)
+    await connector.fetch_data({"table": "t"})
+    await connector.write_data([{"a": 1}])
+    assert connector.get_pool_stats()["created"] == 1
+
+    await registry.close()
+    assert connector.get_pool_stats()["size"] == 0
+
+@pytest.mark.asyncio
+async def test_api_connector_reuses_session():
+    async def rows(request):
+        if "offset" in request.query:
+            offset, limit = int(request.query["offset"]), int(request.query["limit"])
+            return web.json_response([{"n": i} for i in range(offset, min(offset + limit, 25))])
+        return web.json_response([{"page": request.query.get("page")}])
+
+    async def unpaged(request):
+        return web.json_response([{"n": i} for i in range(int(request.match_info["count"]))])
+
+    async def read(stream):
+        return [chunk async for chunk in stream]
+
+    app = web.Application()
+    app.router.add_get("/rows", rows)
+    app.router.add_get("/unpaged/{count}", unpaged)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        registry = ConnectorRegistry()
+        connector_id = registry.register_connector(
+            "api", "api", {}, {"base_url": f"http://127.0.0.1:{port}", "read_path": "/rows"}
+        )
+        connector = registry.get_connector(connector_id)
+        results = await asyncio.gather(*(connector.fetch_data({"page": str(i)}) for i in range(5)))
+
+        assert [r[0]["page"] for r in results] == [str(i) for i in range(5)]
+        session = connector._session
+        await connector.fetch_data({"page": "again"})
+        assert connector._session is session
+        streamed = [chunk async for chunk in connector.stream_data({}, chunk_size=10)]
+        assert [len(chunk) for chunk in streamed] == [10, 10, 5]
+
+        # A backend without paging support returns everything every time
+        for count, sizes in ((25, [10, 10, 5]), (10, [10]), (0, [])):
+            unpaged = registry.get_connector(registry.register_connector(
+                f"unpaged-{count}", "api", {},
+                {"base_url": f"http://127.0.0.1:{port}", "read_path": f"/unpaged/{count}"}
+            ))
+            streamed = await asyncio.wait_for(read(unpaged.stream_data({}, chunk_size=10)), 1)
+            assert [len(chunk) for chunk in streamed] == sizes
+            assert [row["n"] for chunk in streamed for row in chunk] == list(range(count))
+        await registry.close()
+        assert session.closed
+    finally:
+        await runner.cleanup()
+
+@pytest.mark.asyncio
+async def test_stream_data_ends_on_short_page():
+    registry = ConnectorRegistry()
+    connector = registry.get_connector(registry.register_connector("db", "database", {}, {}))
+
+    async def read(chunk_size):
+        return [chunk async for chunk in connector.stream_data({"table": "t"}, chunk_size=chunk_size)]
+
+    assert await asyncio.wait_for(read(1), 1) == [[{"sample": "data"}]]
+    assert await asyncio.wait_for(read(10), 1) == [[{"sample": "data"}]]
+    await registry.close()
+
+@pytest.mark.asyncio
+async def test_stream_data_applies_backpressure():
+    registry = ConnectorRegistry()
+    source = registry.get_connector(add_table(registry, "source", rows=1000))
+    stream = source.stream_data({}, chunk_size=10, prefetch=2)
+
+    first = await stream.__anext__()
+    await asyncio.sleep(0.01)
+    assert first == [{"n": i} for i in range(10)]
+    # One chunk consumed, two queued and one waiting to be queued
+    assert source.pages_read == 4
+
+    await stream.aclose()
+    assert source.get_pool_stats()["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_transfer_moves_rows_between_connectors():
+    registry = ConnectorRegistry()
+    source_id = add_table(registry, "source", rows=2505)
+    target_id = add_table(registry, "target")
+
+    assert await registry.transfer(source_id, target_id, {}, chunk_size=100) == 2505
+    assert registry.get_connector(target_id).written == registry.get_connector(source_id).rows
+
+@pytest.mark.asyncio
+async def test_query_cache_coalesces_and_invalidates_on_write():
+    uncached = ConnectorRegistry()
+    connector = uncached.get_connector(add_table(uncached, "table", rows=50))
+    await connector.fetch_data({"offset": 0, "limit": 10})
+    await connector.fetch_data({"offset": 0, "limit": 10})
+    assert uncached.cache is None and connector.pages_read == 2
+
+    registry = ConnectorRegistry(QueryResultCache())
+    connector = registry.get_connector(add_table(registry, "table", rows=50))
+    query = {"offset": 0, "limit": 10}
+
+    results = await asyncio.gather(*(connector.fetch_data(dict(query)) for _ in range(5)))
+    assert connector.pages_read == 1
+    assert all(result == results[0] for result in results)
+    await connector.fetch_data({"limit": 10, "offset": 0})
+    assert connector.pages_read == 1
+
+    await connector.write_data([{"n": 50}])
+    await connector.fetch_data(query)
+    stats = registry.cache.get_stats()
+    assert connector.pages_read == 2
+    assert (stats["misses"], stats["coalesced"], stats["hits"], stats["invalidations"]) == (2, 4, 1, 1)
+
+@pytest.mark.asyncio
+async def test_query_cache_expires_and_evicts_by_bytes():
+    now = [0.0]
+    cache = QueryResultCache(max_bytes=100, ttl=5.0, clock=lambda: now[0])
+    calls = []
+
+    async def fetch(rows):
+        calls.append(rows)
+        return [{"n": "x" * 20}] * rows
+
+    connector_id = uuid4()
+    await cache.get_or_fetch(connector_id, {"q": 1}, lambda: fetch(1))
+    await cache.get_or_fetch(connector_id, {"q": 2}, lambda: fetch(1))
+    assert len(cache) == 2
+    await cache.get_or_fetch(connector_id, {"q": 3}, lambda: fetch(2))
+    assert cache.get_stats()["evictions"] == 1
+    assert cache.bytes <= 100 and len(cache) == 2
+
+    now[0] = 10.0
+    await cache.get_or_fetch(connector_id, {"q": 3}, lambda: fetch(2))
+    assert len(calls) == 4
+    assert cache.get_stats()["expirations"] == 1
+
+@pytest.mark.asyncio
+async def test_health_monitor_checks_concurrently_with_timeouts():
+    registry = ConnectorRegistry()
+    registry.health.timeout = 0.05
+    registry.health.concurrency = 4
+    healthy_ids = [add_table(registry, f"table-{i}") for i in range(8)]
+    slow_id = add_table(registry, "slow")
+    slow = registry.get_connector(slow_id)
+
+    async def hang():
+        await asyncio.sleep(1)
+        return True
+    slow.test_connection = hang
+
+    warmed = await registry.health.warm_up()
+    assert all(check.healthy for check in warmed.values())
+    assert all(registry.get_connector(i).get_pool_stats()["idle"] == 1 for i in healthy_ids)
+
+    started = asyncio.get_running_loop().time()
+    results = await registry.health.check_all()
+    assert asyncio.get_running_loop().time() - started < 0.5
+    assert results[slow_id].error == "Timed out after 0.05s"
+    assert all(results[i].healthy for i in healthy_ids)
+
+    health = registry.health.get_health(slow_id)[slow_id]
+    assert health["healthy"] is False and health["consecutive_failures"] == 1
+    assert len(health["history"]) == 2
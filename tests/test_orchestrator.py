@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 from src.nexusai.core.orchestrator import AgentOrchestrator
 
@@ -87,3 +87,224 @@ async def test_get_task_status(orchestrator):
     assert status["status"] in ["PENDING", "PROCESSING"]
     assert isinstance(status["created_at"], datetime)
     assert isinstance(status["updated_at"], datetime)
+
+@pytest.mark.asyncio
+async def test_worker_pool_runs_tasks_concurrently():
+    orchestrator = AgentOrchestrator(num_workers=4)
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    running = 0
+    peak = 0
+
+    async def handler(input_data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"echo": input_data["text"]}
+
+    orchestrator.set_task_handler(handler)
+    orchestrator.start()
+    tasks = [
+        await orchestrator.submit_task(agent_id=agent.id, input_data={"text": str(i)})
+        for i in range(8)
+    ]
+    await orchestrator.shutdown(drain=True, timeout=5)
+
+    assert peak == 4
+    assert all(orchestrator.archive.get(t.id).status == "COMPLETED" for t in tasks)
+    assert orchestrator.archive.get(tasks[3].id).output_data == {"echo": "3"}
+
+@pytest.mark.asyncio
+async def test_agent_concurrency_limit_does_not_block_other_agents():
+    orchestrator = AgentOrchestrator(num_workers=4, agent_concurrency=1)
+    busy = await orchestrator.register_agent(
+        name="busy", capabilities=[], security_context={}, compliance_level="LOW"
+    )
+    other = await orchestrator.register_agent(
+        name="other", capabilities=[], security_context={}, compliance_level="LOW"
+    )
+    running: dict = {}
+    peak: dict = {}
+    order = []
+
+    async def handler(input_data):
+        agent = input_data["agent"]
+        running[agent] = running.get(agent, 0) + 1
+        peak[agent] = max(peak.get(agent, 0), running[agent])
+        await asyncio.sleep(0.01)
+        running[agent] -= 1
+        order.append(agent)
+
+    orchestrator.set_task_handler(handler)
+    orchestrator.start()
+    for _ in range(5):
+        await orchestrator.submit_task(agent_id=busy.id, input_data={"agent": "busy"})
+    await orchestrator.submit_task(agent_id=other.id, input_data={"agent": "other"})
+    await orchestrator.shutdown(drain=True, timeout=5)
+
+    assert peak == {"busy": 1, "other": 1}
+    assert order.index("other") < 2
+    assert len(order) == 6
+
+@pytest.mark.asyncio
+async def test_parked_tasks_do_not_jump_higher_priority_tasks():
+    orchestrator = AgentOrchestrator(num_workers=2, agent_concurrency=1)
+    agents = {}
+    for name in ("busy", "other", "urgent"):
+        agents[name] = await orchestrator.register_agent(
+            name=name, capabilities=[], security_context={}, compliance_level="LOW"
+        )
+    release = asyncio.Event()
+    order = []
+
+    async def handler(input_data):
+        if input_data["wait"]:
+            await release.wait()
+        order.append(input_data["n"])
+
+    orchestrator.set_task_handler(handler)
+    orchestrator.start()
+    await orchestrator.submit_task(agent_id=agents["busy"].id, input_data={"n": 1, "wait": True})
+    await orchestrator.submit_task(agent_id=agents["busy"].id, input_data={"n": 2, "wait": False})
+    await asyncio.sleep(0.01)
+    await orchestrator.submit_task(agent_id=agents["other"].id, input_data={"n": 3, "wait": True})
+    await asyncio.sleep(0.01)
+    # Both workers are busy and task 2 is parked behind task 1
+    await orchestrator.submit_task(agent_id=agents["urgent"].id, input_data={"n": 4, "wait": False},
+                                   priority="CRITICAL")
+    release.set()
+    await orchestrator.shutdown(drain=True, timeout=5)
+
+    assert order.index(4) < order.index(2)
+    assert sorted(order) == [1, 2, 3, 4]
+    assert not orchestrator._deferred and not orchestrator._agent_inflight
+
+@pytest.mark.asyncio
+async def test_submit_task_rejects_when_queue_full():
+    orchestrator = AgentOrchestrator(max_queue_size=2)
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    for _ in range(2):
+        task = await orchestrator.submit_task(agent_id=agent.id, input_data={})
+        assert task.status == "PENDING"
+
+    task = await orchestrator.submit_task(agent_id=agent.id, input_data={})
+    assert task.status == "REJECTED"
+    assert task.error == "Task queue is full"
+
+@pytest.mark.asyncio
+async def test_shutdown_rejects_new_tasks():
+    orchestrator = AgentOrchestrator()
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    orchestrator.start()
+    await orchestrator.shutdown()
+
+    task = await orchestrator.submit_task(agent_id=agent.id, input_data={})
+    assert task.status == "REJECTED"
+
+@pytest.mark.asyncio
+async def test_finished_tasks_move_to_bounded_archive():
+    orchestrator = AgentOrchestrator(archive_size=2)
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    tasks = [
+        await orchestrator.submit_task(agent_id=agent.id, input_data={"n": i})
+        for i in range(3)
+    ]
+    orchestrator.start()
+    await orchestrator.shutdown(drain=True, timeout=5)
+
+    assert orchestrator.tasks == {}
+    assert len(orchestrator.archive) == 2
+    status = await orchestrator.get_task_status(tasks[2].id)
+    assert status["status"] == "COMPLETED"
+    assert isinstance(status["updated_at"], datetime)
+    with pytest.raises(ValueError):
+        await orchestrator.get_task_status(tasks[0].id)
+
+@pytest.mark.asyncio
+async def test_get_task_result_waits_for_completion():
+    orchestrator = AgentOrchestrator()
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    orchestrator.set_task_handler(lambda data: {"length": len(data["text"])})
+    task = await orchestrator.submit_task(agent_id=agent.id, input_data={"text": "abc"})
+
+    pending = await orchestrator.get_task_result(task.id, timeout=0.01)
+    assert pending["status"] == "PENDING"
+
+    waiter = asyncio.create_task(orchestrator.get_task_result(task.id, timeout=5))
+    orchestrator.start()
+    result = await waiter
+    await orchestrator.shutdown()
+
+    assert result["status"] == "COMPLETED"
+    assert result["output_data"] == {"length": 3}
+
+@pytest.mark.asyncio
+async def test_subscribe_streams_transitions_for_agent():
+    orchestrator = AgentOrchestrator()
+    watched = await orchestrator.register_agent(
+        name="watched", capabilities=[], security_context={}, compliance_level="LOW"
+    )
+    other = await orchestrator.register_agent(
+        name="other", capabilities=[], security_context={}, compliance_level="LOW"
+    )
+    subscription = orchestrator.subscribe(agent_id=watched.id)
+    task = await orchestrator.submit_task(agent_id=watched.id, input_data={})
+    await orchestrator.submit_task(agent_id=other.id, input_data={})
+    orchestrator.start()
+    await orchestrator.shutdown(drain=True, timeout=5)
+
+    statuses = []
+    while (event := await subscription.get(timeout=0)) is not None:
+        assert event["task_id"] == task.id
+        statuses.append(event["status"])
+    subscription.close()
+    assert statuses == ["PENDING", "PROCESSING", "COMPLETED"]
+    assert orchestrator._subscribers == {}
+
+@pytest.mark.asyncio
+async def test_submit_tasks_returns_per_item_results():
+    orchestrator = AgentOrchestrator(max_queue_size=3)
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    unknown = uuid4()
+    items = [(agent.id, {"n": 0}), (unknown, {"n": 1})] + [(agent.id, {"n": i}) for i in range(2, 5)]
+
+    results = await orchestrator.submit_tasks(items)
+
+    assert [r["status"] for r in results] == ["PENDING", "REJECTED", "PENDING", "PENDING", "REJECTED"]
+    assert results[1]["error"] == f"Agent {unknown} not found"
+    assert results[4]["error"] == "Task queue is full"
+    orchestrator.start()
+    await orchestrator.shutdown(drain=True, timeout=5)
+    status = await orchestrator.get_task_status(results[0]["task_id"])
+    assert status["status"] == "COMPLETED"
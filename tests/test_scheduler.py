@@ -0,0 +1,104 @@
+import pytest
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+from datetime import datetime, timedelta, UTC
+from src.nexusai.core.orchestrator import AgentOrchestrator
+from src.nexusai.core.scheduler import TaskScheduler
+
+def make_task(agent_id, priority="LOW", n=0):
+    return SimpleNamespace(agent_id=agent_id, priority=priority, n=n)
+
+def test_higher_priority_class_is_served_first():
+    scheduler = TaskScheduler()
+    agent = uuid4()
+    scheduler.put_nowait(make_task(agent, "LOW"))
+    scheduler.put_nowait(make_task(agent, "CRITICAL"))
+    scheduler.put_nowait(make_task(agent, "HIGH"))
+
+    order = [scheduler.get_nowait().priority for _ in range(3)]
+    assert order == ["CRITICAL", "HIGH", "LOW"]
+
+def test_fair_share_across_agents_within_class():
+    scheduler = TaskScheduler()
+    noisy, quiet = uuid4(), uuid4()
+    for i in range(10):
+        scheduler.put_nowait(make_task(noisy, n=i))
+    scheduler.put_nowait(make_task(quiet))
+
+    first_two = {scheduler.get_nowait().agent_id for _ in range(2)}
+    assert first_two == {noisy, quiet}
+
+def test_weights_set_dispatch_share():
+    scheduler = TaskScheduler()
+    heavy, light = uuid4(), uuid4()
+    scheduler.set_weight(heavy, 3.0)
+    for i in range(30):
+        scheduler.put_nowait(make_task(heavy, n=i))
+        scheduler.put_nowait(make_task(light, n=i))
+
+    served = [scheduler.get_nowait().agent_id for _ in range(20)]
+    assert served.count(heavy) == 15
+
+def test_requeued_task_goes_ahead_of_its_class_only():
+    scheduler = TaskScheduler()
+    agent, other = uuid4(), uuid4()
+    scheduler.put_nowait(make_task(agent, "LOW", n=1))
+    parked = scheduler.get_nowait()
+    scheduler.put_nowait(make_task(other, "LOW", n=2))
+    scheduler.put_nowait(make_task(other, "HIGH", n=3))
+    scheduler.requeue(parked)
+
+    assert [scheduler.get_nowait().n for _ in range(3)] == [3, 1, 2]
+    assert scheduler.get_wait_stats()["LOW"]["count"] == 2
+
+def test_finish_tags_are_dropped_once_an_agent_drains():
+    scheduler = TaskScheduler()
+    agents = [uuid4() for _ in range(100)]
+    for agent in agents:
+        scheduler.put_nowait(make_task(agent))
+        scheduler.put_nowait(make_task(agent, "HIGH"))
+    for _ in range(150):
+        scheduler.get_nowait()
+    assert len(scheduler._last_finish) == 50
+
+    while not scheduler.empty():
+        scheduler.get_nowait()
+    assert not scheduler._last_finish
+    # A returning agent starts at the class's virtual time, as before
+    scheduler.put_nowait(make_task(agents[0], n=1))
+    scheduler.put_nowait(make_task(uuid4(), n=2))
+    assert [scheduler.get_nowait().n for _ in range(2)] == [1, 2]
+
+def test_wait_stats_are_reported_per_class():
+    scheduler = TaskScheduler()
+    scheduler.put_nowait(make_task(uuid4(), "CRITICAL"))
+    scheduler.get_nowait()
+
+    stats = scheduler.get_wait_stats()
+    assert stats["CRITICAL"]["count"] == 1
+    assert stats["LOW"]["count"] == 0
+    assert stats["CRITICAL"]["p99"] >= 0.0
+
+@pytest.mark.asyncio
+async def test_priority_defaults_to_compliance_level_and_deadlines_expire():
+    orchestrator = AgentOrchestrator()
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=[],
+        security_context={},
+        compliance_level="critical"
+    )
+    task = await orchestrator.submit_task(agent_id=agent.id, input_data={})
+    late = await orchestrator.submit_task(
+        agent_id=agent.id,
+        input_data={},
+        deadline=datetime.now(UTC) - timedelta(seconds=1)
+    )
+    orchestrator.start()
+    await orchestrator.shutdown(drain=True, timeout=5)
+
+    assert task.priority == "CRITICAL"
+    assert orchestrator.archive.get(task.id).status == "COMPLETED"
+    assert orchestrator.archive.get(late.id).status == "EXPIRED"
+    assert orchestrator.get_queue_stats()["wait_seconds"]["CRITICAL"]["count"] == 2
@@ -0,0 +1,207 @@
+import pytest
+import asyncio
+import hashlib
+import time
+import tracemalloc
+from datetime import timedelta
+from uuid import uuid4
+from src.nexusai.security import encryption
+from src.nexusai.security.hashing import PasswordHasher
+from src.nexusai.security.limits import ResourceAccountant, TokenBucket
+from src.nexusai.security.zero_trust import DataEncryption, SandboxManager, SecurityContext
+
+def test_verify_token_caches_until_expiry():
+    context = SecurityContext()
+    token = context.create_access_token({"sub": "agent"}, timedelta(minutes=5))
+
+    assert context.verify_token(token)["sub"] == "agent"
+    claims = context.verify_token(token)
+    claims["sub"] = "tampered"
+    assert context.verify_token(token)["sub"] == "agent"
+    assert context.get_token_cache_stats()["hits"] == 2
+
+    expired = context.create_access_token({"sub": "agent"}, timedelta(seconds=-5))
+    with pytest.raises(ValueError):
+        context.verify_token(expired)
+    # Even a cached entry is not served past its exp
+    payload, kid, _ = next(iter(context._token_cache.values()))
+    context._token_cache[hashlib.sha256(expired.encode()).digest()] = (payload, kid, time.time() - 1)
+    with pytest.raises(ValueError):
+        context.verify_token(expired)
+
+def test_key_rotation_by_kid():
+    context = SecurityContext()
+    old_token = context.create_access_token({"sub": "old"})
+    kid = context.rotate_key()
+    new_token = context.create_access_token({"sub": "new"})
+
+    assert context.verify_token(old_token)["sub"] == "old"
+    assert context.verify_token(new_token)["sub"] == "new"
+
+    context.retire_key("default")
+    with pytest.raises(ValueError):
+        context.verify_token(old_token)
+    with pytest.raises(ValueError):
+        context.retire_key(kid)
+
+def test_verify_token_checks_kid_and_accepts_tokens_without_one():
+    from jose import jwt
+    context = SecurityContext()
+    expires = time.time() + 60
+    legacy = jwt.encode({"sub": "legacy", "exp": expires}, context.SECRET_KEY, algorithm="HS256")
+    context.rotate_key()
+
+    # Issued before kids, signed with a key that is no longer the active one
+    assert context.verify_token(legacy)["sub"] == "legacy"
+    for kid in (["default"], {"k": 1}, 7, "unknown"):
+        token = jwt.encode({"sub": "x", "exp": expires}, context.SECRET_KEY,
+                           algorithm="HS256", headers={"kid": kid})
+        with pytest.raises(ValueError):
+            context.verify_token(token)
+    forged = jwt.encode({"sub": "forged", "exp": expires}, "not-a-key", algorithm="HS256")
+    with pytest.raises(ValueError):
+        context.verify_token(forged)
+
+FAST_CONTEXT = "[passlib]\nschemes = sha256_crypt\nsha256_crypt__default_rounds = 1000\n"
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_password_off_loop():
+    context = SecurityContext(password_hasher=PasswordHasher(FAST_CONTEXT, max_workers=2))
+
+    hashed = await context.hash_password("secret")
+    assert await context.verify_password("secret", hashed)
+    assert not await context.verify_password("wrong", hashed)
+    stats = context.password_hasher.get_stats()
+    assert stats["completed"] == 3 and stats["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_password_hasher_sheds_load_beyond_queue():
+    hasher = PasswordHasher(FAST_CONTEXT, max_workers=1, max_queued=2)
+
+    results = await asyncio.gather(*(hasher.hash("pw") for _ in range(6)), return_exceptions=True)
+
+    rejected = [r for r in results if isinstance(r, RuntimeError)]
+    assert len(rejected) == 3
+    assert hasher.get_stats()["rejected"] == 3
+    stats = hasher.get_stats()
+    assert (stats["completed"], stats["queued"], stats["in_flight"]) == (3, 0, 0)
+    hasher.shutdown()
+
+def test_token_bucket_refills_over_time():
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=lambda: now[0])
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.delay() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.try_acquire()
+    now[0] = 100.0
+    assert bucket.tokens <= 3 and bucket.delay() == 0
+
+@pytest.fixture
+def stop_tracing():
+    tracing = tracemalloc.is_tracing()
+    yield
+    if not tracing:
+        tracemalloc.stop()
+
+def test_sandbox_enforces_rate_and_cpu_limits(stop_tracing):
+    manager = SandboxManager(default_operations=["fetch", "write"])
+    agent_id = uuid4()
+    sandbox = manager.get_sandbox(agent_id)
+    assert manager.get_sandbox(agent_id) is sandbox
+
+    sandbox.set_resource_limits(cpu_percent=50, memory_mb=64, network_calls_per_minute=5)
+    sandbox.set_rate_limit("write", calls_per_minute=2)
+    assert [sandbox.verify_operation("write") for _ in range(3)] == [True, True, False]
+    assert [sandbox.verify_operation("fetch") for _ in range(4)] == [True, True, True, False]
+    assert not sandbox.verify_operation("delete")
+
+    cpu = [0.0]
+    sandbox.accountant = ResourceAccountant(window_seconds=1, cpu_clock=lambda: cpu[0])
+    sandbox.set_resource_limits(cpu_percent=50, memory_mb=64, network_calls_per_minute=600)
+    with sandbox.track():
+        cpu[0] += 0.8
+    assert not sandbox.verify_operation("fetch")
+    assert sandbox.get_usage()["rejections"] == {"not_allowed": 1, "rate_limited": 2, "cpu": 1, "memory": 0}
+
+def test_sandbox_memory_limit_starts_tracing_and_measures_each_block(stop_tracing):
+    sandbox = SandboxManager(default_operations=["fetch"]).get_sandbox(uuid4())
+    sandbox.accountant = ResourceAccountant(memory_sample_rate=1)
+    sandbox.set_resource_limits(cpu_percent=0, memory_mb=1, network_calls_per_minute=0)
+    assert tracemalloc.is_tracing()
+
+    retained = []
+    with sandbox.track():
+        # A block tracked inside another does not reset the outer one's count
+        with ResourceAccountant(memory_sample_rate=1).track() as inner:
+            retained.append(bytearray(512 * 1024))
+        retained.append(bytearray(1024 * 1024))
+    assert inner.last_memory >= 512 * 1024
+    assert sandbox.accountant.last_memory >= 1536 * 1024
+    assert not sandbox.verify_operation("fetch")
+    assert sandbox.rejections["memory"] == 1
+
+    retained.clear()
+    with sandbox.track():
+        pass
+    assert sandbox.accountant.last_memory < 1024 * 1024
+    assert sandbox.verify_operation("fetch")
+
+def test_sandbox_memory_rejection_expires_with_the_window(stop_tracing):
+    now = [0.0]
+    sandbox = SandboxManager(default_operations=["fetch"]).get_sandbox(uuid4())
+    sandbox.accountant = ResourceAccountant(window_seconds=10, memory_sample_rate=1,
+                                            clock=lambda: now[0])
+    sandbox.set_resource_limits(cpu_percent=0, memory_mb=1, network_calls_per_minute=0)
+
+    retained = []
+    with sandbox.track():
+        retained.append(bytearray(3 * 1024 * 1024))
+    retained.clear()
+    # Refused callers never start a new block to re-measure
+    assert [sandbox.verify_operation("fetch") for _ in range(5)] == [False] * 5
+    now[0] = 11.0
+    assert sandbox.verify_operation("fetch")
+    assert sandbox.get_usage()["last_memory_mb"] == 0
+    assert sandbox.get_usage()["peak_memory_mb"] >= 3
+
+def test_encrypt_data_round_trip_and_tamper_detection():
+    envelope = DataEncryption.encrypt_data({"ssn": "123-45-6789", "n": 1}, "key-1")
+
+    assert "123-45-6789" not in envelope["data"]
+    assert DataEncryption.decrypt_data(envelope, "key-1") == {"ssn": "123-45-6789", "n": 1}
+    with pytest.raises(ValueError):
+        DataEncryption.decrypt_data(envelope, "key-2")
+    with pytest.raises(ValueError):
+        DataEncryption.decrypt_data({"encrypted": False}, "key-1")
+
+    records = [{"i": i} for i in range(5)]
+    token = DataEncryption.encrypt_records(records, "key-1")
+    assert DataEncryption.decrypt_records(memoryview(token), "key-1") == records
+
+@pytest.mark.parametrize("size", [0, 100, 4096, 10_000])
+def test_stream_encryption_round_trip_with_any_split(size):
+    payload = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+    pieces = [payload[i:i + 777] for i in range(0, len(payload), 777)]
+    encrypted = b"".join(DataEncryption.encrypt_stream(pieces, "key", chunk_size=1024))
+
+    split = [encrypted[i:i + 333] for i in range(0, len(encrypted), 333)]
+    assert b"".join(DataEncryption.decrypt_stream(split, "key")) == payload
+
+    with pytest.raises(ValueError):
+        b"".join(DataEncryption.decrypt_stream([encrypted[:-1]], "key"))
+    tampered = bytearray(encrypted)
+    tampered[20] ^= 1
+    with pytest.raises(ValueError):
+        b"".join(DataEncryption.decrypt_stream([bytes(tampered)], "key"))
+
+def test_stream_encryption_derives_a_key_per_stream():
+    first = b"".join(DataEncryption.encrypt_stream([b"same payload"], "key"))
+    second = b"".join(DataEncryption.encrypt_stream([b"same payload"], "key"))
+    assert first[:encryption.STREAM_SALT_SIZE] != second[:encryption.STREAM_SALT_SIZE]
+
+    # The same prefix under another stream's salt is a different key
+    spliced = second[:encryption.STREAM_SALT_SIZE] + first[encryption.STREAM_SALT_SIZE:]
+    with pytest.raises(ValueError):
+        b"".join(DataEncryption.decrypt_stream([spliced], "key"))
@@ -0,0 +1,119 @@
+import pytest
+from collections import Counter
+from uuid import uuid4
+from src.nexusai.core.sharding import (
+    ConsistentHashRing, LocalShard, ProcessShard, ShardedOrchestrator
+)
+from src.nexusai.core.state import InMemoryStateBackend, SqliteStateBackend
+
+async def register(orchestrator, name="test_agent"):
+    return await orchestrator.register_agent(
+        name=name,
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+
+def test_ring_balances_and_moves_few_keys():
+    ring = ConsistentHashRing(["a", "b", "c", "d"])
+    keys = [uuid4().bytes for _ in range(20_000)]
+    before = {key: ring.node_for(key) for key in keys}
+    counts = Counter(before.values())
+    assert min(counts.values()) > 0.7 * len(keys) / 4
+
+    ring.add_node("e")
+    moved = [key for key in keys if ring.node_for(key) != before[key]]
+    # Only keys taken by the new node move, about a fifth of them
+    assert all(ring.node_for(key) == "e" for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+    ring.remove_node("e")
+    assert all(ring.node_for(key) == before[key] for key in keys)
+
+@pytest.mark.asyncio
+async def test_sharded_orchestrator_routes_to_owning_shard():
+    state = InMemoryStateBackend()
+    sharded = ShardedOrchestrator([LocalShard(f"shard-{i}") for i in range(3)], state=state)
+    agents = [await register(sharded, f"agent-{i}") for i in range(12)]
+    for agent in agents:
+        shard = sharded.shard_for_agent(agent.id)
+        assert agent.id in shard.orchestrator.agents
+        assert state.get_agent(agent.id)["shard"] == shard.name
+
+    unknown = uuid4()
+    results = await sharded.submit_tasks(
+        [(agent.id, {"n": i}) for i, agent in enumerate(agents)] + [(unknown, {})]
+    )
+    assert [r["status"] for r in results] == ["PENDING"] * 12 + ["REJECTED"]
+    await sharded.start()
+    await sharded.shutdown(drain=True)
+
+    for agent, result in zip(agents, results):
+        status = await sharded.get_task_status(result["task_id"])
+        assert status["agent_id"] == agent.id
+        assert status["status"] == "COMPLETED"
+    assert (await sharded.get_task_status(results[-1]["task_id"]))["status"] == "REJECTED"
+    with pytest.raises(ValueError):
+        await sharded.get_task_status(uuid4())
+    stats = await sharded.get_queue_stats()
+    assert stats["depth"] == 0 and len(stats["shards"]) == 3
+
+@pytest.mark.asyncio
+async def test_add_shard_moves_only_its_agents():
+    sharded = ShardedOrchestrator([LocalShard("a"), LocalShard("b")])
+    agents = [await register(sharded, f"agent-{i}") for i in range(30)]
+    task = await sharded.submit_task(agents[0].id, {})
+
+    moved = await sharded.add_shard(LocalShard("c"))
+
+    new_shard = sharded.shards["c"]
+    assert moved == len(new_shard.orchestrator.agents)
+    for agent in agents:
+        status = await sharded.get_agent_status(agent.id)
+        assert status["name"] == agent.name
+    # Tasks stay on the shard they were submitted to
+    assert (await sharded.get_task_status(task.id))["status"] == "PENDING"
+
+@pytest.mark.asyncio
+async def test_process_shard_runs_tasks_in_child():
+    sharded = ShardedOrchestrator([ProcessShard("p0", handler=dict)])
+    await sharded.start()
+    try:
+        agent = await register(sharded)
+        task = await sharded.submit_task(agent.id, {"x": 1})
+        result = await sharded.get_task_result(task.id, timeout=10)
+        assert result["status"] == "COMPLETED"
+        assert result["output_data"] == {"x": 1}
+        with pytest.raises(ValueError):
+            await sharded.submit_task(uuid4(), {})
+    finally:
+        await sharded.shutdown()
+
+@pytest.mark.asyncio
+async def test_sqlite_state_restores_agents_after_restart(tmp_path):
+    path = str(tmp_path / "state.db")
+    sharded = ShardedOrchestrator([LocalShard("a"), LocalShard("b")],
+                                  state=SqliteStateBackend(path, max_tasks=2))
+    agents = [await register(sharded, f"agent-{i}") for i in range(6)]
+    tasks = [await sharded.submit_task(agents[0].id, {"n": i}) for i in range(3)]
+    sharded.state.close()
+
+    state = SqliteStateBackend(path)
+    # Only the most recent max_tasks placements are kept
+    assert [state.get_task_shard(task.id) for task in tasks][0] is None
+    assert state.get_task_shard(tasks[-1].id) == sharded.shard_for_agent(agents[0].id).name
+    shards = [LocalShard("a"), LocalShard("b")]
+    for shard in shards:
+        shard.orchestrator.set_task_handler(dict)
+    restarted = ShardedOrchestrator(shards, state=state)
+    await restarted.start()
+    try:
+        assert await restarted.restore_agents() == len(agents)
+        for agent in agents:
+            assert (await restarted.get_agent_status(agent.id))["name"] == agent.name
+        task = await restarted.submit_task(agents[1].id, {"x": 1})
+        result = await restarted.get_task_result(task.id, timeout=5)
+        assert result["output_data"] == {"x": 1}
+    finally:
+        await restarted.shutdown(drain=False)
+        state.close()
@@ -0,0 +1,161 @@
+import pytest
+import asyncio
+import threading
+import time
+from uuid import uuid4
+from datetime import datetime
+from src.nexusai.compliance.monitor import ComplianceMonitor, ComplianceLevel
+from src.nexusai.security.audit import AuditPipeline
+from src.nexusai.security.zero_trust import AgentSandbox, SandboxManager
+from src.nexusai.storage.base import AuditRecord, StoredViolation
+from src.nexusai.storage.log_backend import SegmentLogBackend
+from src.nexusai.storage.segment_log import SegmentLog
+
+def test_segment_log_rotates_and_scans(tmp_path):
+    log = SegmentLog(str(tmp_path), segment_bytes=64, sync_every=0)
+    log.append_many((1, f"record-{i}".encode()) for i in range(20))
+    log.append(2, b"other")
+
+    assert len(log.segments) > 1
+    assert [p for _, p in log.scan((1,))] == [f"record-{i}".encode() for i in range(20)]
+    assert list(log.scan((2,))) == [(2, b"other")]
+
+def test_segment_log_truncates_torn_tail(tmp_path):
+    log = SegmentLog(str(tmp_path))
+    log.append(1, b"complete")
+    log.close()
+    with open(log.segments[-1], "ab") as f:
+        f.write(b"\x20\x00\x00\x00torn")
+
+    reopened = SegmentLog(str(tmp_path))
+    reopened.append(1, b"after")
+    assert [p for _, p in reopened.scan()] == [b"complete", b"after"]
+
+def test_backend_tracks_status_and_compacts_resolved(tmp_path):
+    backend = SegmentLogBackend(str(tmp_path), segment_bytes=128)
+    rule_id, agent_id = uuid4(), uuid4()
+    backend.append_violations(
+        StoredViolation(seq, rule_id, agent_id, 1000.0 + seq, {"n": seq}) for seq in range(1, 6)
+    )
+    backend.update_violation(2, "RESOLVED", "fixed")
+    backend.append_audit([AuditRecord(agent_id, "read", 5.0, True, {})])
+
+    assert [(v.seq, v.status) for v in backend.iter_violations()][:3] == \
+        [(1, "OPEN"), (2, "RESOLVED"), (3, "OPEN")]
+    assert backend.compact() > 0
+    assert [v.seq for v in backend.iter_violations()] == [1, 3, 4, 5]
+    assert [r.operation for r in backend.iter_audit(agent_id)] == ["read"]
+    assert list(backend.iter_audit(uuid4())) == []
+
+def test_monitor_persists_and_restores_open_violations(tmp_path):
+    monitor = ComplianceMonitor(store=SegmentLogBackend(str(tmp_path)))
+    monitor.add_rule("restricted", "", ComplianceLevel.HIGH,
+                     {"restricted_operations": ["delete"]})
+    agent_id = uuid4()
+    first = monitor.check_compliance(agent_id, {"operation": "delete"})[0]
+    monitor.check_compliance_batch([(agent_id, {"operation": "delete"})])
+    monitor.resolve_violation(first.id, "approved")
+
+    assert first.id not in monitor.violations
+    assert len(monitor.get_active_violations()) == 1
+    monitor.store.close()
+
+    restored = ComplianceMonitor(store=SegmentLogBackend(str(tmp_path)))
+    assert [v.id.int for v in restored.get_active_violations()] == [2]
+    history = list(restored.iter_violation_history())
+    assert [(v.id, v.status, v.resolution) for v in history][0] == (first.id, "RESOLVED", "approved")
+    restored.add_rule("restricted", "", ComplianceLevel.HIGH,
+                      {"restricted_operations": ["delete"]})
+    assert restored.check_compliance(agent_id, {"operation": "delete"})[0].id.int == 3
+
+def test_compaction_never_reuses_violation_ids(tmp_path):
+    def open_monitor():
+        monitor = ComplianceMonitor(store=SegmentLogBackend(str(tmp_path), segment_bytes=256))
+        monitor.add_rule("restricted", "", ComplianceLevel.HIGH,
+                         {"restricted_operations": ["delete"]})
+        return monitor
+
+    agent_id = uuid4()
+    monitor = open_monitor()
+    first = monitor.check_compliance(agent_id, {"operation": "delete"})[0]
+    # Fill the first segment so the resolved violation is compactable
+    monitor.store.append_audit(
+        AuditRecord(agent_id, "read", float(i), True, {}) for i in range(10)
+    )
+    monitor.resolve_violation(first.id, "approved")
+    assert monitor.store.compact() > 0
+    monitor.store.close()
+
+    monitor = open_monitor()
+    second = monitor.check_compliance(agent_id, {"operation": "delete"})[0]
+    assert second.id != first.id
+    monitor.store.close()
+
+    restored = open_monitor()
+    assert [v.id for v in restored.get_active_violations()] == [second.id]
+    assert [(v.id, v.status) for v in restored.iter_violation_history()] == [(second.id, "OPEN")]
+
+def test_sandbox_audit_log_uses_store(tmp_path):
+    sandbox = AgentSandbox(uuid4(), store=SegmentLogBackend(str(tmp_path)))
+    sandbox.log_operation("read", datetime.utcnow(), True, {"rows": 3})
+
+    assert not sandbox.audit_log
+    entries = list(sandbox.iter_audit_log())
+    assert entries[0]["operation"] == "read"
+    assert entries[0]["details"] == {"rows": 3}
+
+def test_audit_pipeline_batches_to_store(tmp_path):
+    store = SegmentLogBackend(str(tmp_path))
+    pipeline = AuditPipeline(store, batch_size=10, flush_interval=60)
+    manager = SandboxManager(audit=pipeline)
+    agents = [uuid4(), uuid4()]
+    for i in range(25):
+        manager.get_sandbox(agents[i % 2]).log_operation("read", datetime.utcnow(), True, {"i": i})
+
+    entries = list(manager.get_sandbox(agents[0]).iter_audit_log())
+    assert [e["details"]["i"] for e in entries] == list(range(0, 25, 2))
+    pipeline.close()
+    assert pipeline.get_stats()["written"] == 25
+    assert pipeline.get_stats()["batches"] >= 3
+
+@pytest.mark.parametrize("policy, kept", [("drop_newest", [0, 1, 2]), ("drop_oldest", [2, 3, 4])])
+def test_audit_pipeline_overflow_policies(tmp_path, policy, kept):
+    class StalledStore(SegmentLogBackend):
+        def append_audit(self, records):
+            raise AssertionError("writer should not run")
+
+    pipeline = AuditPipeline(StalledStore(str(tmp_path)), capacity=3, batch_size=100,
+                             flush_interval=60, policy=policy)
+    agent_id = uuid4()
+    accepted = [pipeline.submit(AuditRecord(agent_id, "op", float(i), True, {})) for i in range(5)]
+
+    assert [r.timestamp for r in pipeline._buffer] == kept
+    assert pipeline.dropped == 2
+    assert accepted == ([True] * 3 + [False] * 2 if policy == "drop_newest" else [True] * 5)
+
+@pytest.mark.asyncio
+async def test_audit_pipeline_block_policy_does_not_stall_event_loop(tmp_path):
+    class SlowStore(SegmentLogBackend):
+        def append_audit(self, records):
+            release.wait(5)
+            super().append_audit(records)
+
+    release = threading.Event()
+    pipeline = AuditPipeline(SlowStore(str(tmp_path)), capacity=2, batch_size=1,
+                             flush_interval=60, policy="block", block_timeout=5)
+    agent_id = uuid4()
+    records = [AuditRecord(agent_id, "op", float(i), True, {}) for i in range(5)]
+    assert all([await pipeline.asubmit(record) for record in records[:3]])
+
+    # The writer holds one record; the buffer is full again
+    started = time.monotonic()
+    assert not pipeline.submit(records[3])
+    assert time.monotonic() - started < 1
+    waiting = asyncio.ensure_future(pipeline.asubmit(records[4]))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    release.set()
+    assert await asyncio.wait_for(waiting, 5)
+    pipeline.close()
+    assert pipeline.get_stats()["written"] == 4
+    assert pipeline.dropped == 1
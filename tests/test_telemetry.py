@@ -0,0 +1,96 @@
+import pytest
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from src.nexusai.api import main as api
+from src.nexusai.compliance.monitor import ComplianceLevel, ComplianceMonitor
+from src.nexusai.core.orchestrator import AgentOrchestrator
+from src.nexusai.telemetry import metrics, tracing
+
+def test_metrics_endpoint_labels_requests_by_route():
+    headers = {"Authorization": f"Bearer {api.security_context.create_access_token({'sub': 'test'})}"}
+    labels = {"method": "GET", "route": "/tasks/{task_id}/status", "status": "404"}
+    before = metrics.REGISTRY.get_sample_value("nexusai_http_request_duration_seconds_count", labels) or 0
+
+    with TestClient(api.app) as client:
+        client.get(f"/tasks/{uuid4()}/status", headers=headers)
+        # Scrapers do not authenticate
+        response = client.get("/metrics")
+        unauthenticated = client.get(f"/tasks/{uuid4()}/status")
+
+    assert response.status_code == 200
+    assert unauthenticated.status_code == 401
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "nexusai_task_queue_depth" in response.text
+    assert metrics.REGISTRY.get_sample_value(
+        "nexusai_http_request_duration_seconds_count", labels
+    ) == before + 1
+
+@pytest.mark.asyncio
+async def test_collector_exports_queue_and_compliance_counters():
+    orchestrator = AgentOrchestrator()
+    monitor = ComplianceMonitor()
+    registry = CollectorRegistry()
+    registry.register(metrics.PlatformCollector(orchestrator, monitor))
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    for _ in range(3):
+        await orchestrator.submit_task(agent_id=agent.id, input_data={})
+    monitor.add_rule("restricted", "", ComplianceLevel.HIGH, {"restricted_operations": ["delete"]})
+    clean = {"outcome": "clean"}
+    violations = {"level": "HIGH", "violation_type": "restricted_operation"}
+    before = [metrics.REGISTRY.get_sample_value(name, labels) or 0 for name, labels in (
+        ("nexusai_compliance_checks_total", clean),
+        ("nexusai_compliance_violations_total", violations)
+    )]
+    monitor.check_compliance(agent.id, {"operation": "read"})
+    monitor.check_compliance(agent.id, {"operation": "read"})
+    monitor.check_compliance_batch([(agent.id, {"operation": "delete"}), (agent.id, {})])
+
+    assert registry.get_sample_value("nexusai_task_queue_depth") == 3
+    assert registry.get_sample_value("nexusai_compliance_decisions_total", {"source": "cache"}) == 1
+    assert registry.get_sample_value("nexusai_compliance_decisions_total", {"source": "evaluated"}) == 3
+    assert metrics.REGISTRY.get_sample_value("nexusai_compliance_checks_total", clean) == before[0] + 3
+    assert metrics.REGISTRY.get_sample_value(
+        "nexusai_compliance_violations_total", violations
+    ) == before[1] + 1
+
+@pytest.mark.asyncio
+async def test_task_spans_and_duration():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    completed = {"status": "COMPLETED"}
+    before = metrics.REGISTRY.get_sample_value("nexusai_task_duration_seconds_count", completed) or 0
+    orchestrator = AgentOrchestrator()
+    agent = await orchestrator.register_agent(
+        name="test_agent",
+        capabilities=["text_processing"],
+        security_context={"role": "test"},
+        compliance_level="HIGH"
+    )
+    orchestrator.set_task_handler(lambda data: data)
+
+    assert tracing.enable_tracing(provider)
+    try:
+        task = await orchestrator.submit_task(agent_id=agent.id, input_data={"x": 1})
+        orchestrator.start()
+        await orchestrator.shutdown(drain=True)
+    finally:
+        tracing.disable_tracing()
+
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == ["task.run"]
+    assert spans[0].attributes["nexusai.task_id"] == str(task.id)
+    assert metrics.REGISTRY.get_sample_value(
+        "nexusai_task_duration_seconds_count", completed
+    ) == before + 1
+    with tracing.span("ignored") as span:
+        assert span is None